@@ -0,0 +1,186 @@
+import http.client
+import io
+import threading
+import urllib.error
+import urllib.request
+import zlib
+from typing import Dict, List, Tuple
+from urllib.parse import urlsplit
+
+
+CHUNK_SIZE = 64 * 1024
+
+# Ошибки, по которым переиспользованное соединение считается закрытым сервером
+_STALE_CONNECTION_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.CannotSendRequest,
+    ConnectionResetError,
+    BrokenPipeError,
+)
+
+
+class PooledResponse:
+    """Ответ поверх соединения из пула с потоковой распаковкой gzip"""
+
+    def __init__(self, pool: 'ConnectionPool', key: Tuple[str, str, int],
+                 connection: http.client.HTTPConnection, response: http.client.HTTPResponse):
+        self.status = response.status
+        self.reason = response.reason
+        self.headers = response.headers
+
+        self._pool = pool
+        self._key = key
+        self._connection = connection
+        self._response = response
+        self._buffer = bytearray()
+        self._eof = False
+        self._closed = False
+
+        encoding = (response.getheader('Content-Encoding') or '').lower()
+        self._decoder = zlib.decompressobj(16 + zlib.MAX_WBITS) if encoding == 'gzip' else None
+
+    def _fill(self, amt: int = None):
+
+        while not self._eof and (amt is None or len(self._buffer) < amt):
+            chunk = self._response.read(CHUNK_SIZE)
+            if not chunk:
+                self._eof = True
+                if self._decoder is not None:
+                    self._buffer += self._decoder.flush()
+                break
+
+            self._pool.count_bytes(len(chunk))
+            self._buffer += self._decoder.decompress(chunk) if self._decoder is not None else chunk
+
+    def read(self, amt: int = None) -> bytes:
+
+        self._fill(amt)
+
+        if amt is None:
+            data = bytes(self._buffer)
+            self._buffer.clear()
+        else:
+            data = bytes(self._buffer[:amt])
+            del self._buffer[:amt]
+
+        if self._eof and not self._buffer:
+            self.close()
+
+        return data
+
+    def close(self):
+
+        if self._closed:
+            return
+        self._closed = True
+
+        # Вернуть в пул можно только полностью прочитанное keep-alive соединение
+        if self._eof and not self._response.will_close:
+            self._pool.release(self._key, self._connection)
+        else:
+            self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class ConnectionPool:
+    """Пул HTTP/1.1 keep-alive соединений, отдельный для каждого хоста"""
+
+    def __init__(self, max_per_host: int = 8, timeout: float = 30.0):
+        if max_per_host < 1:
+            raise ValueError("max_per_host must be >= 1")
+
+        self.max_per_host = max_per_host
+        self.timeout = timeout
+        self.connections_opened = 0
+        self.connections_reused = 0
+        self.bytes_received = 0
+
+        self._idle: Dict[Tuple[str, str, int], List[http.client.HTTPConnection]] = {}
+        self._lock = threading.Lock()
+
+    def count_bytes(self, count: int):
+
+        with self._lock:
+            self.bytes_received += count
+
+    def acquire(self, key: Tuple[str, str, int]) -> Tuple[http.client.HTTPConnection, bool]:
+
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                self.connections_reused += 1
+                return idle.pop(), True
+            self.connections_opened += 1
+
+        scheme, host, port = key
+        if scheme == 'https':
+            return http.client.HTTPSConnection(host, port, timeout=self.timeout), False
+        return http.client.HTTPConnection(host, port, timeout=self.timeout), False
+
+    def release(self, key: Tuple[str, str, int], connection: http.client.HTTPConnection):
+
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_per_host:
+                idle.append(connection)
+                return
+
+        connection.close()
+
+    def urlopen(self, request: urllib.request.Request) -> PooledResponse:
+        # Аналог urllib.request.urlopen: ответы кроме 2xx поднимаются как HTTPError
+
+        parts = urlsplit(request.full_url)
+        scheme = parts.scheme.lower()
+        if scheme not in ('http', 'https'):
+            raise urllib.error.URLError(f"unsupported scheme: {scheme}")
+
+        port = parts.port or (443 if scheme == 'https' else 80)
+        key = (scheme, parts.hostname, port)
+
+        path = parts.path or '/'
+        if parts.query:
+            path += '?' + parts.query
+
+        headers = dict(request.header_items())
+        headers.setdefault('Accept-Encoding', 'gzip')
+        headers.setdefault('Connection', 'keep-alive')
+        headers.setdefault('User-Agent', 'graphVisualizer')
+
+        while True:
+            connection, reused = self.acquire(key)
+            try:
+                connection.request(request.get_method(), path, body=request.data, headers=headers)
+                response = connection.getresponse()
+                break
+            except _STALE_CONNECTION_ERRORS as e:
+                connection.close()
+                # Сервер закрыл простаивающее соединение: повторяем на новом
+                if not reused:
+                    raise urllib.error.URLError(e)
+            except OSError as e:
+                connection.close()
+                raise urllib.error.URLError(e)
+
+        pooled = PooledResponse(self, key, connection, response)
+
+        if not 200 <= pooled.status < 300:
+            body = pooled.read()
+            raise urllib.error.HTTPError(request.full_url, pooled.status, pooled.reason, pooled.headers,
+                                         io.BytesIO(body))
+
+        return pooled
+
+    def close(self):
+
+        with self._lock:
+            idle, self._idle = self._idle, {}
+
+        for connections in idle.values():
+            for connection in connections:
+                connection.close()
@@ -0,0 +1,235 @@
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, FrozenSet, Iterable, List, Tuple, Optional
+
+from NPMDependencyFetcher import NPMDependencyFetcher, merge_dependency_sets
+from PackageFilter import PackageFilter
+from RequestScheduler import RegistryUnavailable
+
+
+class ConcurrentCrawler:
+    """
+    Обход реестра в ширину по уровням с ограниченным пулом потоков. Пакеты, исключённые
+    package_filter, не запрашиваются, и их поддеревья не обходятся. kinds - виды зависимостей,
+    по которым идёт обход (None - все), root_kinds - виды для корней (по умолчанию kinds).
+    Если реестр не ответил на запрос пакета и после повторов, обход прерывается RegistryUnavailable
+    """
+
+    def __init__(self, fetcher: NPMDependencyFetcher, concurrency: int = 8, package_filter: PackageFilter = None,
+                 kinds: Iterable[str] = None, root_kinds: Iterable[str] = None):
+        if concurrency < 1:
+            raise ValueError("concurrency must be >= 1")
+
+        self.fetcher = fetcher
+        self.concurrency = concurrency
+        # Во время обхода отсекаем только шаблоны exclude; --only применяется к результату
+        self.package_filter = package_filter.pruning() if package_filter else None
+        self.kinds: Optional[FrozenSet[str]] = frozenset(kinds) if kinds is not None else None
+        self.root_kinds: Optional[FrozenSet[str]] = frozenset(root_kinds) if root_kinds is not None else self.kinds
+        # Виды рёбер не из dependencies: {package: {dep: kind}}
+        self.edge_kinds: Dict[str, Dict[str, str]] = {}
+        self.skipped = 0
+
+    def _excluded(self, package_name: str) -> bool:
+
+        if self.package_filter is not None and self.package_filter.excluded(package_name):
+            self.skipped += 1
+            return True
+        return False
+
+    def _fetch_dependencies(self, item: Tuple[str, Optional[str]],
+                            kinds: Optional[FrozenSet[str]]) -> Tuple[Dict[str, str], Dict[str, str]]:
+
+        package_name, version = item
+
+        return merge_dependency_sets(self.fetcher.get_dependency_sets(package_name, version), kinds)
+
+    def crawl(self, start_package: str, version: str = None, max_depth: int = 3) -> Dict[str, Dict[str, str]]:
+
+        return self.crawl_many([(start_package, version)], max_depth)
+
+    def crawl_many(self, roots: List[Tuple[str, Optional[str]]], max_depth: int = 3) -> Dict[str, Dict[str, str]]:
+        """
+        Обход объединения нескольких корней одним BFS: общие пакеты запрашиваются один раз,
+        глубина узла - расстояние до ближайшего корня
+        """
+
+        graph = {}
+        visited = set()
+        frontier: List[Tuple[str, Optional[str]]] = []
+        self.edge_kinds = {}
+        self.skipped = 0
+        # Корни запрошены явно и обходятся даже под фильтром
+        for package, version in roots:
+            if package not in visited:
+                visited.add(package)
+                frontier.append((package, version))
+        depth = 0
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            while frontier:
+                visited.update(package for package, _ in frontier)
+
+                # Ограничение глубины: узлы последнего уровня не запрашиваем
+                if depth >= max_depth:
+                    for package, _ in frontier:
+                        graph[package] = {}
+                    break
+
+                # Весь уровень запрашивается параллельно, результаты разбираем
+                # в исходном порядке, чтобы граф совпадал с последовательным обходом
+                kinds = self.root_kinds if depth == 0 else self.kinds
+                results = executor.map(self._fetch_dependencies, frontier, [kinds] * len(frontier))
+
+                next_frontier = []
+                queued = set()
+                for (package, _), (dependencies, edge_kinds) in zip(frontier, results):
+                    graph[package] = dependencies
+                    if edge_kinds:
+                        self.edge_kinds[package] = edge_kinds
+
+                    for dep_name, dep_version in dependencies.items():
+                        if dep_name not in visited and dep_name not in queued:
+                            queued.add(dep_name)
+                            # Исключённый пакет остаётся ребром родителя, но не запрашивается
+                            if not self._excluded(dep_name):
+                                next_frontier.append((dep_name, dep_version))
+
+                frontier = next_frontier
+                depth += 1
+
+        return graph
+
+
+class IncrementalCrawler(ConcurrentCrawler):
+    """
+    Повторный обход с сохранённым состоянием: каждый узел ревалидируется по ETag/Last-Modified,
+    неизменённые узлы берут зависимости из прошлого запуска, а заново раскрываются
+    только поддеревья, чьи карты зависимостей изменились
+    """
+
+    STATE_FORMAT = 3
+
+    def __init__(self, fetcher: NPMDependencyFetcher, state_path: str, concurrency: int = 8,
+                 package_filter: PackageFilter = None, kinds: Iterable[str] = None, root_kinds: Iterable[str] = None):
+        super().__init__(fetcher, concurrency, package_filter, kinds, root_kinds)
+
+        self.state_path = state_path
+        self.previous: Dict[str, Dict] = {}
+        self.nodes: Dict[str, Dict] = {}
+        self.reused = 0
+        self.refetched = 0
+        self.changed = 0
+        self.stale = 0
+        self._lock = threading.Lock()
+
+    def _load_state(self, roots: List[Tuple[str, Optional[str]]]):
+
+        self.previous = {}
+        if not os.path.exists(self.state_path):
+            return
+
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Unable to read crawl state {self.state_path}: {e}")
+            return
+
+        # Состояние других корней, реестра или видов зависимостей не переиспользуем
+        if (state.get('format') != self.STATE_FORMAT or state.get('registry') != self.fetcher.registry_url
+                or state.get('roots') != [list(root) for root in roots]
+                or state.get('kinds') != self._kinds_state()):
+            return
+
+        self.previous = state.get('nodes', {})
+
+    def _save_state(self, roots: List[Tuple[str, Optional[str]]], max_depth: int):
+
+        state = {
+            'format': self.STATE_FORMAT,
+            'registry': self.fetcher.registry_url,
+            'roots': [list(root) for root in roots],
+            'kinds': self._kinds_state(),
+            'max_depth': max_depth,
+            'nodes': self.nodes
+        }
+
+        # Атомарная запись: прерванный запуск не портит прошлое состояние
+        temp_path = self.state_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(temp_path, self.state_path)
+
+    def _kinds_state(self) -> Optional[List[List[str]]]:
+
+        if self.kinds is None and self.root_kinds is None:
+            return None
+        return [sorted(kinds) if kinds is not None else None for kinds in (self.kinds, self.root_kinds)]
+
+    @staticmethod
+    def _previous_result(previous: Dict) -> Tuple[Dict[str, str], Dict[str, str]]:
+
+        return dict(previous['dependencies']), dict(previous.get('edge_kinds', {}))
+
+    def _fetch_dependencies(self, item: Tuple[str, Optional[str]],
+                            kinds: Optional[FrozenSet[str]]) -> Tuple[Dict[str, str], Dict[str, str]]:
+
+        package_name, spec = item
+        previous = self.previous.get(package_name)
+        if previous and previous.get('spec') != spec:
+            previous = None
+
+        try:
+            if previous:
+                record = self.fetcher.fetch_record(package_name, spec, previous.get('etag'),
+                                                   previous.get('last_modified'), kinds=kinds)
+            else:
+                record = self.fetcher.fetch_record(package_name, spec, kinds=kinds)
+        except RegistryUnavailable:
+            if not previous:
+                raise
+            record = None
+
+        with self._lock:
+            if record is None:
+                # Реестр недоступен: лучше устаревшие данные, чем пропавший узел
+                if previous:
+                    self.stale += 1
+                    self.nodes[package_name] = previous
+                    return self._previous_result(previous)
+                return {}, {}
+
+            if record.not_modified:
+                self.reused += 1
+                self.nodes[package_name] = previous
+                return self._previous_result(previous)
+
+            self.refetched += 1
+            if previous and previous['dependencies'] != record.dependencies:
+                self.changed += 1
+
+            self.nodes[package_name] = {
+                'spec': spec,
+                'version': record.version,
+                'etag': record.etag,
+                'last_modified': record.last_modified,
+                'dependencies': record.dependencies,
+                'edge_kinds': record.edge_kinds or {}
+            }
+
+        return dict(record.dependencies), dict(record.edge_kinds or {})
+
+    def crawl_many(self, roots: List[Tuple[str, Optional[str]]], max_depth: int = 3) -> Dict[str, Dict[str, str]]:
+
+        self._load_state(roots)
+        self.nodes = {}
+        self.reused = self.refetched = self.changed = self.stale = 0
+
+        graph = super().crawl_many(roots, max_depth)
+
+        self._save_state(roots, max_depth)
+
+        return graph
@@ -1,64 +1,664 @@
-from collections import deque
-from typing import Dict, Any, Set, List
+import threading
+from array import array
+from collections.abc import Mapping
+from typing import Dict, Any, List, Optional, Iterable, Iterator, Sequence
+
+from PackageFilter import FilterSpec, compile_filter
+
+
+class CompactGraph(Mapping):
+    """
+    Компактное представление графа: имена пакетов интернированы в целые id,
+    смежность хранится в CSR-массивах, диапазоны версий - в общей таблице
+    """
+
+    def __init__(self, names: Sequence[str], has_entry: bytearray, offsets: array, targets: array,
+                 range_ids: array, range_table: Sequence[str], ids=None):
+        self.names = names
+        # ids - любой объект с методом get(name); снимок на mmap использует бинарный поиск
+        self.ids = ids if ids is not None else {name: node_id for node_id, name in enumerate(names)}
+        self.has_entry = has_entry
+        self.offsets = offsets
+        self.targets = targets
+        self.range_ids = range_ids
+        self.range_table = range_table
+
+    @classmethod
+    def from_dict(cls, graph: Dict[str, Dict[str, str]]) -> 'CompactGraph':
+
+        builder = CompactGraphBuilder()
+        for package in graph:
+            builder.intern(package)
+        for package, dependencies in graph.items():
+            builder.add(package, dependencies)
+
+        return builder.build()
+
+    @property
+    def node_count(self) -> int:
+        return len(self.names)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.targets)
+
+    def id_of(self, package: str) -> Optional[int]:
+
+        return self.ids.get(package)
+
+    def successors(self, node_id: int) -> array:
+
+        return self.targets[self.offsets[node_id]:self.offsets[node_id + 1]]
+
+    def __getitem__(self, package: str) -> Dict[str, str]:
+
+        node_id = self.ids.get(package)
+        if node_id is None or not self.has_entry[node_id]:
+            raise KeyError(package)
+
+        start, end = self.offsets[node_id], self.offsets[node_id + 1]
+        return {self.names[self.targets[k]]: self.range_table[self.range_ids[k]] for k in range(start, end)}
+
+    def __contains__(self, package) -> bool:
+
+        node_id = self.ids.get(package)
+        return node_id is not None and bool(self.has_entry[node_id])
+
+    def __iter__(self) -> Iterator[str]:
+
+        return (name for node_id, name in enumerate(self.names) if self.has_entry[node_id])
+
+    def __len__(self) -> int:
+
+        return sum(self.has_entry)
+
+    def to_dict(self) -> Dict[str, Dict[str, str]]:
+
+        return {package: self[package] for package in self}
+
+    def edge_kinds_of(self, node_id: int) -> Dict[str, str]:
+        """Виды рёбер узла не из dependencies, хранящиеся в самом графе (у снимка); обычно - в DependencyGraph"""
+
+        return {}
+
+
+class CompactGraphBuilder:
+    """Пошаговое построение CompactGraph без промежуточного словаря всего графа"""
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.names: List[str] = []
+        self._range_index: Dict[str, int] = {}
+        self._range_table: List[str] = []
+        self._targets = array('i')
+        self._range_ids = array('i')
+        # Границы рёбер каждого пакета в порядке добавления; -1 - записи нет
+        self._starts = array('q')
+        self._ends = array('q')
+
+    def intern(self, name: str) -> int:
+
+        node_id = self.ids.get(name)
+        if node_id is None:
+            node_id = self.ids[name] = len(self.names)
+            self.names.append(name)
+            self._starts.append(-1)
+            self._ends.append(-1)
+
+        return node_id
+
+    def has_entry(self, name: str) -> bool:
+
+        node_id = self.ids.get(name)
+        return node_id is not None and self._starts[node_id] >= 0
+
+    def add(self, package: str, dependencies: Dict[str, str]):
+
+        node_id = self.intern(package)
+        start = len(self._targets)
+
+        for dep, version_range in dependencies.items():
+            self._targets.append(self.intern(dep))
+            range_id = self._range_index.get(version_range)
+            if range_id is None:
+                range_id = self._range_index[version_range] = len(self._range_table)
+                self._range_table.append(version_range)
+            self._range_ids.append(range_id)
+
+        self._starts[node_id] = start
+        self._ends[node_id] = len(self._targets)
+
+    def dependencies_of(self, package: str) -> List[str]:
+
+        node_id = self.ids[package]
+        return [self.names[self._targets[k]] for k in range(self._starts[node_id], self._ends[node_id])]
+
+    def build(self) -> CompactGraph:
+
+        # Переупорядочиваем рёбра в порядок id (CSR), пропуская перезаписанные записи
+        offsets = array('q', [0])
+        targets = array('i')
+        range_ids = array('i')
+        has_entry = bytearray(len(self.names))
+
+        for node_id in range(len(self.names)):
+            start, end = self._starts[node_id], self._ends[node_id]
+            if start >= 0:
+                has_entry[node_id] = 1
+                targets.extend(self._targets[start:end])
+                range_ids.extend(self._range_ids[start:end])
+            offsets.append(len(targets))
+
+        return CompactGraph(self.names, has_entry, offsets, targets, range_ids, self._range_table, ids=self.ids)
+
+
+class _SparseArray(dict):
+    # Замена массива на весь граф в ограниченных обходах: значения хранятся только
+    # для затронутых id, остальные читаются как default
+
+    def __init__(self, default: int, *args):
+        super().__init__(*args)
+        self.default = default
+
+    def __missing__(self, node_id: int) -> int:
+        return self.default
 
 
 class DependencyGraph:
 
     def __init__(self):
-        self.graph = {}  # {package: {dependencies}}
+        self.graph = {}  # {package: {dependencies}}, после freeze() - CompactGraph
         self.visited = set()
+        self._compact = None
+        self._reachability = None
+        self._reachability_lock = threading.Lock()
+        self._reverse: Optional[Dict[str, set]] = None  # {package: {dependents}}, строится по требованию
+        # Виды рёбер не из dependencies (dev, peer, optional): {package: {dep: kind}}
+        self.edge_kinds: Dict[str, Dict[str, str]] = {}
+
+    @classmethod
+    def from_compact(cls, compact: CompactGraph) -> 'DependencyGraph':
+
+        graph = cls()
+        graph.graph = compact
+
+        return graph
 
-    def add_dependency(self, package: str, dependencies: Dict[str, str]):
+    def add_dependency(self, package: str, dependencies: Dict[str, str], kinds: Dict[str, str] = None):
+
+        # Замороженный граф снова становится изменяемым словарём, виды его рёбер переходят в edge_kinds
+        if isinstance(self.graph, CompactGraph):
+            compact = self.graph
+            self.graph = compact.to_dict()
+            for name in self.graph:
+                stored = compact.edge_kinds_of(compact.id_of(name))
+                if stored:
+                    self.edge_kinds.setdefault(name, stored)
+
+        # Обратный индекс обновляется только по изменившимся рёбрам пакета
+        if self._reverse is not None:
+            previous = self.graph.get(package, {})
+            for dep in previous:
+                if dep not in dependencies:
+                    self._reverse[dep].discard(package)
+            for dep in dependencies:
+                if dep not in previous:
+                    self._reverse.setdefault(dep, set()).add(package)
 
         self.graph[package] = dependencies
+        if kinds:
+            self.edge_kinds[package] = {dep: kind for dep, kind in kinds.items() if dep in dependencies}
+        else:
+            self.edge_kinds.pop(package, None)
+        self._compact = None
+        self._reachability = None
+
+    def compact(self) -> CompactGraph:
+        """Компактное представление текущего графа (кэшируется до следующего add_dependency)"""
+
+        if isinstance(self.graph, CompactGraph):
+            return self.graph
+
+        if self._compact is None:
+            self._compact = CompactGraph.from_dict(self.graph)
+
+        return self._compact
+
+    def freeze(self) -> CompactGraph:
+        """Перевести граф в компактную форму, освободив словари"""
+
+        self.graph = self.compact()
+        self._compact = None
+
+        return self.graph
+
+    def kinds_of(self, package: str) -> Dict[str, str]:
+        """Виды рёбер пакета не из dependencies: {dep: kind}"""
+
+        kinds = self.edge_kinds.get(package)
+        if kinds is None and isinstance(self.graph, CompactGraph):
+            node_id = self.graph.id_of(package)
+            kinds = self.graph.edge_kinds_of(node_id) if node_id is not None else None
+
+        return kinds or {}
+
+    def edge_kind(self, package: str, dependency: str) -> str:
+        """Вид ребра: prod, dev, peer или optional"""
+
+        return self.kinds_of(package).get(dependency, 'prod')
+
+    def reachability(self) -> 'ReachabilityIndex':
+        """Индекс достижимости текущего графа (строится один раз, сбрасывается add_dependency)"""
+
+        compact = self.compact()
+        # Параллельные первые запросы сервера строят индекс один раз, остальные ждут на блокировке.
+        # freeze() подменяет граф тем же компактным объектом, индекс остаётся верным
+        with self._reachability_lock:
+            if self._reachability is None or self._reachability.compact is not compact:
+                self._reachability = ReachabilityIndex(compact)
+
+            return self._reachability
 
-    def bfs_traversal(self, start_package: str, filter_substring: str = None) -> Dict[str, Any]:
+    def depends_on(self, package: str, dependency: str) -> bool:
 
-        if start_package not in self.graph:
-            return {'dependencies': {}, 'cycles': []}
+        return self.reachability().reaches(package, dependency)
 
-        visited = set()
-        queue = deque([(start_package, 0, [start_package])])  # (package, level, path)
-        dependencies = {}
-        cycles = []
-        visited_paths = set()
+    def reverse_index(self) -> Dict[str, set]:
+        """Обратная смежность {package: {пакеты, напрямую зависящие от него}}"""
 
-        while queue:
-            current_package, level, path = queue.popleft()
+        if self._reverse is None:
+            reverse = {}
+            graph = self.graph
+            if isinstance(graph, CompactGraph):
+                # Рёбра берём прямо из CSR, не материализуя словари зависимостей
+                names = graph.names
+                for node_id in range(graph.node_count):
+                    if graph.has_entry[node_id]:
+                        package = names[node_id]
+                        for dep in graph.successors(node_id):
+                            reverse.setdefault(names[dep], set()).add(package)
+            else:
+                for package, dependencies in graph.items():
+                    for dep in dependencies:
+                        reverse.setdefault(dep, set()).add(package)
+            self._reverse = reverse
 
-            # Пропускаем пакеты, содержащие фильтрующую подстроку
-            if filter_substring and filter_substring.lower() in current_package.lower():
+        return self._reverse
+
+    def dependents(self, package: str) -> List[str]:
+
+        return sorted(self.reverse_index().get(package, ()))
+
+    def reverse_dependencies(self, package: str, filter_substring: FilterSpec = None) -> Dict[str, int]:
+        """Все пакеты, транзитивно зависящие от package, с расстоянием до него (BFS по обратным рёбрам)"""
+
+        reverse = self.reverse_index()
+        package_filter = compile_filter(filter_substring)
+        pruning = package_filter.pruning() if package_filter else None
+
+        distances = {package: 0}
+        queue = [package]
+        for current in queue:
+            distance = distances[current] + 1
+            for dependent in sorted(reverse.get(current, ())):
+                if dependent in distances or (pruning and pruning.excluded(dependent)):
+                    continue
+                distances[dependent] = distance
+                queue.append(dependent)
+
+        del distances[package]
+        if package_filter is not None and package_filter.include:
+            return {dependent: distance for dependent, distance in distances.items()
+                    if not package_filter.excluded(dependent)}
+
+        return distances
+
+    @staticmethod
+    def _excluded(compact: CompactGraph, filter_substring: FilterSpec = None) -> bytearray:
+        # Маска отфильтрованных пакетов: скомпилированный фильтр строит её один раз на граф
+
+        package_filter = compile_filter(filter_substring)
+        if package_filter is None:
+            return bytearray(compact.node_count)
+
+        return package_filter.mask(compact)
+
+    @staticmethod
+    def _scc_ids(compact: CompactGraph, starts: Iterable[int], excluded: bytearray,
+                 sparse: bool = False) -> List[List[int]]:
+        # Итеративный алгоритм Тарьяна по части графа, достижимой из starts, O(V+E).
+        # Компоненты выдаются в обратном топологическом порядке: стоки первыми.
+        # sparse - состояние в словарях по посещённым id вместо массивов на весь граф
+
+        offsets, targets = compact.offsets, compact.targets
+        if sparse:
+            index, low, on_stack = _SparseArray(-1), _SparseArray(-1), _SparseArray(0)
+        else:
+            index = array('i', [-1]) * compact.node_count
+            low = array('i', [-1]) * compact.node_count
+            on_stack = bytearray(compact.node_count)
+        stack = []
+        components = []
+        counter = 0
+
+        for start in starts:
+            if index[start] >= 0 or excluded[start]:
+                continue
+
+            index[start] = low[start] = counter
+            counter += 1
+            stack.append(start)
+            on_stack[start] = 1
+            work = [(start, offsets[start])]
+
+            while work:
+                node, position = work[-1]
+                end = offsets[node + 1]
+
+                descended = False
+                while position < end:
+                    dep = targets[position]
+                    position += 1
+                    if excluded[dep]:
+                        continue
+                    if index[dep] < 0:
+                        work[-1] = (node, position)
+                        index[dep] = low[dep] = counter
+                        counter += 1
+                        stack.append(dep)
+                        on_stack[dep] = 1
+                        work.append((dep, offsets[dep]))
+                        descended = True
+                        break
+                    elif on_stack[dep] and index[dep] < low[node]:
+                        low[node] = index[dep]
+
+                if descended:
+                    continue
+
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    if low[node] < low[parent]:
+                        low[parent] = low[node]
+
+                # Корень компоненты: снимаем её со стека целиком
+                if low[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = 0
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(component)
+
+        return components
+
+    @staticmethod
+    def _representative_cycle(compact: CompactGraph, root: int, component: set, excluded: Sequence[int]) -> List[int]:
+        # Кратчайший цикл через root внутри компоненты (BFS по её рёбрам)
+
+        parents = {root: None}
+        queue = [root]
+
+        for node in queue:
+            for dep in compact.successors(node):
+                if excluded[dep]:
+                    continue
+                if dep == root:
+                    cycle = []
+                    while node is not None:
+                        cycle.append(node)
+                        node = parents[node]
+                    return cycle[::-1] + [root]
+                if dep in component and dep not in parents:
+                    parents[dep] = node
+                    queue.append(dep)
+
+        return []
+
+    def strongly_connected_components(self, start_package: str, filter_substring: FilterSpec = None) -> List[List[str]]:
+        """Компоненты сильной связности достижимой части графа (итеративный Тарьян, O(V+E))"""
+
+        compact = self.compact()
+        start = compact.id_of(start_package)
+        if start is None:
+            return []
+
+        excluded = self._excluded(compact, filter_substring)
+        return [[compact.names[node] for node in component]
+                for component in self._scc_ids(compact, [start], excluded)]
+
+    def bfs_traversal(self, start_package: str, filter_substring: FilterSpec = None, max_depth: Optional[int] = None,
+                      max_nodes: Optional[int] = None, build_tree: bool = False) -> Dict[str, Any]:
+        """
+        BFS от пакета. max_depth и max_nodes ограничивают обход прямо в цикле: пакеты глубже max_depth
+        не посещаются, после max_nodes пакетов обход останавливается (truncated). Циклы ищутся только
+        среди посещённых пакетов, а с build_tree тем же проходом строится дерево {package: [children]},
+        где каждый пакет - потомок родителя, первым его обнаружившего. Состояние обхода хранится
+        в словарях по посещённым пакетам, поэтому ограниченный запрос стоит O(бюджета), а не O(V).
+        Обход отсекают только шаблоны exclude; include (--only) оставляет в dependencies и tree
+        подходящие пакеты и стартовый, который фильтру не подлежит
+        """
+
+        empty = {'dependencies': {}, 'cycles': [], 'components': [], 'truncated': False}
+        if build_tree:
+            empty['tree'] = {}
+
+        compact = self.compact()
+        start = compact.id_of(start_package)
+
+        if start is None or not compact.has_entry[start]:
+            return empty
+
+        names = compact.names
+        package_filter = compile_filter(filter_substring)
+        pruning = package_filter.pruning() if package_filter else None
+        if pruning is None:
+            excluded = None
+        elif max_depth is None and max_nodes is None:
+            # Полный обход: маска на весь граф строится один раз и кэшируется фильтром
+            excluded = pruning.mask(compact).__getitem__
+        else:
+            # Ограниченный обход проверяет только встреченные пакеты
+            excluded = lambda node: pruning.excluded(names[node])
+
+        offsets, targets = compact.offsets, compact.targets
+        levels = {start: 0}
+        order = [start]
+        tree = {} if build_tree else None
+        truncated = False
+
+        for node in order:
+            level = levels[node] + 1
+            # Узлы идут по уровням: дальше только пакеты на границе глубины, их не раскрываем
+            if max_depth is not None and level > max_depth:
+                break
+
+            children = []
+            for k in range(offsets[node], offsets[node + 1]):
+                dep = targets[k]
+                if dep not in levels and (excluded is None or not excluded(dep)):
+                    if max_nodes is not None and len(order) >= max_nodes:
+                        truncated = True
+                        break
+                    levels[dep] = level
+                    order.append(dep)
+                    children.append(dep)
+
+            if tree is not None:
+                tree[names[node]] = [names[child] for child in children]
+            if truncated:
+                break
+
+        dependencies = {names[node]: levels[node] for node in order}
+        if package_filter is not None and package_filter.include:
+            dependencies = {package: level for package, level in dependencies.items()
+                            if level == 0 or not package_filter.excluded(package)}
+            if tree is not None:
+                tree = package_filter.shown_tree(start_package, tree)
+
+        # Циклы: нетривиальные компоненты сильной связности и петли среди посещённых пакетов,
+        # упорядоченные по первому появлению в обходе
+        outside = _SparseArray(1, dict.fromkeys(order, 0))
+
+        position = {node: i for i, node in enumerate(order)}
+        components = []
+        for component in self._scc_ids(compact, [start], outside, sparse=True):
+            if len(component) == 1 and component[0] not in compact.successors(component[0]):
                 continue
+            components.append(sorted(component, key=position.__getitem__))
+        components.sort(key=lambda component: position[component[0]])
+
+        cycles = [self._representative_cycle(compact, component[0], set(component), outside)
+                  for component in components]
+
+        result = {
+            'dependencies': dependencies,
+            'cycles': [[names[node] for node in cycle] for cycle in cycles],
+            'components': [[names[node] for node in component] for component in components],
+            'truncated': truncated
+        }
+        if tree is not None:
+            result['tree'] = tree
+
+        return result
 
-            if current_package not in visited:
-                visited.add(current_package)
-                dependencies[current_package] = level
-
-                # Добавляем зависимости текущего пакета в очередь
-                if current_package in self.graph:
-                    for dep in self.graph[current_package]:
-                        # Проверяем цикличность
-                        if dep in path:
-                            # Найден цикл
-                            cycle_start = path.index(dep)
-                            cycle = path[cycle_start:] + [dep]
-                            if cycle not in cycles:
-                                cycles.append(cycle)
-                            continue
-
-                        # Проверяем, не посещали ли мы уже этот путь
-                        new_path = path + [dep]
-                        path_key = tuple(new_path)
-                        if path_key not in visited_paths:
-                            visited_paths.add(path_key)
-                            queue.append((dep, level + 1, new_path))
-
-        return {'dependencies': dependencies, 'cycles': cycles}
-
-    def get_transitive_dependencies(self, start_package: str, filter_substring: str = None) -> Dict[str, Any]:
-        bfs_result = self.bfs_traversal(start_package, filter_substring)
+    def get_transitive_dependencies(self, start_package: str, filter_substring: FilterSpec = None,
+                                    max_depth: Optional[int] = None, max_nodes: Optional[int] = None) -> Dict[str, Any]:
+        bfs_result = self.bfs_traversal(start_package, filter_substring, max_depth, max_nodes, build_tree=True)
 
         # Добавляем граф в результат для построения дерева
         bfs_result['graph'] = self.graph
 
-        return bfs_result
\ No newline at end of file
+        return bfs_result
+
+
+class ReachabilityIndex:
+    """
+    Транзитивное замыкание графа: компоненты сильной связности сжимаются в узлы конденсации,
+    замыкание каждой компоненты - битовое множество (int) компонент, вычисленное в обратном
+    топологическом порядке, и запрос "зависит ли A от B" - одна проверка бита. Размер битовых
+    множеств растёт квадратично (длинные цепочки, плотное ядро), поэтому они строятся, только
+    пока укладываются в max_bytes; иначе запрос - обход конденсации по требованию, который
+    не заходит в компоненты младше искомой
+    """
+
+    MAX_BYTES = 32 * 1024 * 1024
+
+    def __init__(self, compact: CompactGraph, max_bytes: int = MAX_BYTES):
+        self.compact = compact
+
+        excluded = bytearray(compact.node_count)
+        # Тарьян выдаёт стоки первыми: номер компоненты - её позиция в этом порядке,
+        # поэтому номера потомков любой компоненты меньше её собственного
+        self.components = DependencyGraph._scc_ids(compact, range(compact.node_count), excluded)
+        self.component_of = array('i', [0]) * compact.node_count
+        for component_id, component in enumerate(self.components):
+            for node in component:
+                self.component_of[node] = component_id
+
+        # Конденсация в CSR-массивах; cyclic - компонента достижима из самой себя
+        self.offsets = array('q', [0])
+        self.targets = array('i')
+        self.cyclic = bytearray(len(self.components))
+        for component_id, component in enumerate(self.components):
+            successors = set()
+            for node in component:
+                for dep in compact.successors(node):
+                    successors.add(self.component_of[dep])
+            if component_id in successors or len(component) > 1:
+                self.cyclic[component_id] = 1
+            successors.discard(component_id)
+            self.targets.extend(sorted(successors))
+            self.offsets.append(len(self.targets))
+
+        # Все компоненты-потомки уже обработаны, поэтому биты любого замыкания
+        # не старше собственного номера компоненты
+        self.closures: Optional[List[int]] = []
+        size = 0
+        for component_id in range(len(self.components)):
+            bits = 1 << component_id if self.cyclic[component_id] else 0
+            for k in range(self.offsets[component_id], self.offsets[component_id + 1]):
+                successor = self.targets[k]
+                bits |= self.closures[successor] | (1 << successor)
+
+            size += (bits.bit_length() + 7) // 8
+            if size > max_bytes:
+                self.closures = None
+                break
+            self.closures.append(bits)
+
+    def _reachable_components(self, source: int, target: int = -1) -> Iterator[int]:
+        # Компоненты, достижимые из source (сама source - только при цикле); компоненты
+        # младше target не могут вести к target и не обходятся
+
+        offsets, targets = self.offsets, self.targets
+        if self.cyclic[source]:
+            yield source
+
+        seen = {source}
+        queue = [source]
+        for component_id in queue:
+            for k in range(offsets[component_id], offsets[component_id + 1]):
+                successor = targets[k]
+                if successor >= target and successor not in seen:
+                    seen.add(successor)
+                    queue.append(successor)
+                    yield successor
+
+    def reaches(self, package: str, dependency: str) -> bool:
+        """True, если dependency есть в дереве зависимостей package (сам package - только при цикле)"""
+
+        source, target = self.compact.id_of(package), self.compact.id_of(dependency)
+        if source is None or target is None:
+            return False
+
+        source, target = self.component_of[source], self.component_of[target]
+        if self.closures is not None:
+            return bool(self.closures[source] >> target & 1)
+        if source == target:
+            return bool(self.cyclic[source])
+        if target > source:
+            return False
+
+        return any(component_id == target for component_id in self._reachable_components(source, target))
+
+    def closure_ids(self, node_id: int) -> List[int]:
+
+        result = []
+        if self.closures is None:
+            for component_id in sorted(self._reachable_components(self.component_of[node_id])):
+                result.extend(self.components[component_id])
+            return result
+
+        bits = self.closures[self.component_of[node_id]]
+        component_id = 0
+        while bits:
+            # Пропускаем нулевые биты целыми блоками
+            skip = (bits & -bits).bit_length() - 1
+            bits >>= skip
+            component_id += skip
+            result.extend(self.components[component_id])
+            bits >>= 1
+            component_id += 1
+
+        return result
+
+    def closure(self, package: str) -> List[str]:
+        """Все транзитивные зависимости package"""
+
+        node_id = self.compact.id_of(package)
+        if node_id is None:
+            return []
+
+        return [self.compact.names[node] for node in self.closure_ids(node_id)]
+
+    def closure_size(self, package: str) -> int:
+
+        node_id = self.compact.id_of(package)
+        if node_id is None:
+            return 0
+
+        return len(self.closure_ids(node_id))
@@ -0,0 +1,298 @@
+import json
+import os
+import socketserver
+import stat
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Optional, Tuple
+from urllib.parse import urlparse, parse_qs
+
+from DependencyGrapf import DependencyGraph
+from NPMDependencyFetcher import LRUCache
+
+
+class ServiceUnavailable(Exception):
+    pass
+
+
+class PackageNotFound(Exception):
+    pass
+
+
+class GraphService:
+    """
+    Тёплый граф в памяти: результаты обходов кэшируются до следующей загрузки,
+    фоновый поток периодически перестраивает граф и атомарно подменяет его
+    """
+
+    def __init__(self, loader: Callable[[], Optional[DependencyGraph]], refresh_interval: float = 0,
+                 result_cache_size: int = 1024):
+        self.loader = loader
+        self.refresh_interval = refresh_interval
+        self.result_cache_size = result_cache_size
+        self.generation = 0
+        self.loaded_at = None
+        self.refresh_errors = 0
+
+        # Граф и кэш результатов подменяются вместе, читатели берут пару под блокировкой
+        self._state: Tuple[Optional[DependencyGraph], LRUCache] = (None, LRUCache(result_cache_size))
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def load(self) -> bool:
+
+        # Одновременно строится не больше одного графа
+        with self._load_lock:
+            graph = self.loader()
+            if graph is None:
+                return False
+
+            # Ленивые структуры строим до публикации, чтобы запросы не ждали
+            graph.compact()
+
+            with self._lock:
+                self._state = (graph, LRUCache(self.result_cache_size))
+                self.generation += 1
+                self.loaded_at = time.time()
+
+        return True
+
+    def _refresh_loop(self):
+
+        while not self._stop.wait(self.refresh_interval):
+            try:
+                if not self.load():
+                    self.refresh_errors += 1
+            except Exception as e:
+                # Старый граф продолжает обслуживать запросы
+                self.refresh_errors += 1
+                print(f"Background refresh failed: {e}")
+
+    def start_refresh(self):
+
+        if self.refresh_interval > 0 and self._thread is None:
+            self._thread = threading.Thread(target=self._refresh_loop, name="graph-refresh", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _traversal(self, package: str, filter_substring: str = None) -> Tuple[DependencyGraph, Dict[str, Any]]:
+
+        with self._lock:
+            graph, results = self._state
+
+        if graph is None:
+            raise ServiceUnavailable("graph is not loaded yet")
+
+        key = (package, filter_substring or None)
+        result = results.get(key)
+        if result is None:
+            result = graph.bfs_traversal(package, filter_substring)
+            results.put(key, result)
+
+        if not result['dependencies']:
+            raise PackageNotFound(package)
+
+        return graph, result
+
+    def health(self) -> Dict[str, Any]:
+
+        with self._lock:
+            graph, results = self._state
+
+        return {
+            'status': 'ok' if graph is not None else 'loading',
+            'generation': self.generation,
+            'loaded_at': self.loaded_at,
+            'packages': len(graph.graph) if graph is not None else 0,
+            'cached_results': len(results),
+            'refresh_errors': self.refresh_errors
+        }
+
+    def dependencies(self, package: str, filter_substring: str = None) -> Dict[str, Any]:
+
+        _, result = self._traversal(package, filter_substring)
+
+        return {'package': package, 'dependencies': result['dependencies']}
+
+    def cycles(self, package: str, filter_substring: str = None) -> Dict[str, Any]:
+
+        _, result = self._traversal(package, filter_substring)
+
+        return {'package': package, 'cycles': result['cycles'], 'components': result['components']}
+
+    def depends_on(self, package: str, dependency: str) -> Dict[str, Any]:
+
+        with self._lock:
+            graph, _ = self._state
+
+        if graph is None:
+            raise ServiceUnavailable("graph is not loaded yet")
+        if package not in graph.graph:
+            raise PackageNotFound(package)
+
+        # Индекс достижимости строится при первом запросе к графу этого поколения
+        return {'package': package, 'dependency': dependency, 'depends': graph.depends_on(package, dependency)}
+
+    def tree(self, package: str, filter_substring: str = None, max_depth: int = None) -> Dict[str, Any]:
+
+        graph, result = self._traversal(package, filter_substring)
+        levels = result['dependencies']
+        compact = graph.compact()
+
+        # Дерево кратчайших путей: каждый пакет - потомок первого родителя уровнем выше
+        tree = {}
+        placed = {package}
+        for name, level in levels.items():
+            if max_depth is not None and level >= max_depth:
+                continue
+            children = []
+            for dep in compact.successors(compact.id_of(name)):
+                child = compact.names[dep]
+                if child not in placed and levels.get(child) == level + 1:
+                    placed.add(child)
+                    children.append(child)
+            tree[name] = children
+
+        return {'package': package, 'max_depth': max_depth, 'tree': tree}
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    """
+    JSON API: /health, /dependencies, /cycles, /tree с параметрами package, filter, max_depth;
+    /depends?package=A&dependency=B
+    """
+
+    protocol_version = 'HTTP/1.1'
+    service: GraphService = None
+
+    def _send_json(self, status: int, payload: Dict[str, Any]):
+
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+
+        url = urlparse(self.path)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        route = url.path.rstrip('/') or '/'
+
+        if route == '/health':
+            self._send_json(200, self.service.health())
+            return
+
+        queries = {
+            '/dependencies': self.service.dependencies,
+            '/cycles': self.service.cycles,
+            '/tree': self.service.tree,
+            '/depends': self.service.depends_on,
+        }
+        if route not in queries:
+            self._send_json(404, {'error': f"unknown endpoint {route}"})
+            return
+
+        package = params.get('package')
+        if not package:
+            self._send_json(400, {'error': "package parameter is required"})
+            return
+
+        if route == '/depends':
+            dependency = params.get('dependency')
+            if not dependency:
+                self._send_json(400, {'error': "dependency parameter is required"})
+                return
+            args = {'dependency': dependency}
+        else:
+            args = {'filter_substring': params.get('filter')}
+
+        if route == '/tree' and 'max_depth' in params:
+            try:
+                args['max_depth'] = int(params['max_depth'])
+            except ValueError:
+                self._send_json(400, {'error': f"invalid max_depth: {params['max_depth']}"})
+                return
+
+        try:
+            self._send_json(200, queries[route](package, **args))
+        except ServiceUnavailable as e:
+            self._send_json(503, {'error': str(e)})
+        except PackageNotFound:
+            self._send_json(404, {'error': f"package {package} not found in graph"})
+        except ValueError as e:
+            self._send_json(400, {'error': str(e)})
+
+    def address_string(self) -> str:
+
+        # У Unix-сокета нет адреса клиента
+        return self.client_address[0] if self.client_address else 'unix'
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+
+    daemon_threads = True
+
+    def server_bind(self):
+
+        socketserver.UnixStreamServer.server_bind(self)
+        # BaseHTTPRequestHandler ожидает эти атрибуты у сервера
+        self.server_name = 'localhost'
+        self.server_port = 0
+
+
+def _remove_socket(path: str):
+    # Удаляем только сокет (оставшийся от прошлого запуска): опечатка в пути не должна стереть файл
+
+    try:
+        mode = os.stat(path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise ValueError(f"{path} exists and is not a socket")
+    os.unlink(path)
+
+
+def create_server(service: GraphService, address: str) -> socketserver.BaseServer:
+    """Адрес вида host:port или unix:/path/to/socket"""
+
+    handler = type('BoundQueryHandler', (QueryHandler,), {'service': service})
+
+    if address.startswith('unix:'):
+        path = address[len('unix:'):]
+        _remove_socket(path)
+        return ThreadingUnixHTTPServer(path, handler)
+
+    host, _, port = address.rpartition(':')
+    server = ThreadingHTTPServer((host or '127.0.0.1', int(port)), handler)
+    server.daemon_threads = True
+
+    return server
+
+
+def serve(service: GraphService, address: str):
+
+    server = create_server(service, address)
+    service.start_refresh()
+    print(f"Serving dependency queries on {address}")
+
+    try:
+        server.serve_forever()
+    finally:
+        service.stop()
+        server.server_close()
+        if address.startswith('unix:'):
+            _remove_socket(address[len('unix:'):])
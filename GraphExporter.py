@@ -0,0 +1,152 @@
+import json
+from array import array
+from typing import Iterator, List, Optional, TextIO, Tuple
+
+from DependencyGrapf import DependencyGraph
+from PackageFilter import FilterSpec, compile_filter
+
+
+FORMATS = ('ascii', 'dot', 'jsonl', 'mermaid')
+
+# (источник, цель, диапазон версий, ребро внутри цикла, вид зависимости)
+Edge = Tuple[int, int, str, bool, str]
+
+
+class GraphExporter:
+    """
+    Экспорт достижимой части графа за один проход по CSR-массивам. Помимо графа хранятся
+    уровни, номера компонент и порядок обхода - массивы array('i'), до 12 байт на узел;
+    при построении ещё временно живут массивы алгоритма Тарьяна и списки компонент.
+    Обход отсекают только шаблоны exclude; с --only пишутся корни, подходящие пакеты
+    и рёбра между ними
+    """
+
+    def __init__(self, graph: DependencyGraph, roots: List[str], filter_substring: FilterSpec = None,
+                 max_depth: Optional[int] = None):
+        self.compact = graph.compact()
+        self.graph = graph
+        self.max_depth = max_depth
+        self.nodes_written = 0
+        self.edges_written = 0
+
+        compact = self.compact
+        package_filter = compile_filter(filter_substring)
+        excluded = DependencyGraph._excluded(compact, package_filter.pruning() if package_filter else None)
+        # Маска скрытых --only пакетов; None - показываются все посещённые
+        self.hidden = package_filter.mask(compact) if package_filter and package_filter.include else None
+        # Корни запрошены явно и обходятся даже под фильтром
+        starts = [node for node in (compact.id_of(root) for root in roots) if node is not None]
+
+        # BFS от всех корней: уровень узла - расстояние до ближайшего корня
+        self.levels = array('i', [-1]) * compact.node_count
+        self.order = array('i')
+        for start in starts:
+            if self.levels[start] < 0:
+                self.levels[start] = 0
+                self.order.append(start)
+
+        offsets, targets = compact.offsets, compact.targets
+        for node in self.order:
+            level = self.levels[node] + 1
+            if max_depth is not None and level > max_depth:
+                continue
+            for k in range(offsets[node], offsets[node + 1]):
+                dep = targets[k]
+                if self.levels[dep] < 0 and not excluded[dep]:
+                    self.levels[dep] = level
+                    self.order.append(dep)
+
+        if self.hidden is not None:
+            self.order = array('i', (node for node in self.order
+                                     if self.levels[node] == 0 or not self.hidden[node]))
+
+        # Ребро лежит на цикле, если оба конца в одной компоненте сильной связности
+        self.component = array('i', [-1]) * compact.node_count
+        for component_id, component in enumerate(DependencyGraph._scc_ids(compact, starts, excluded)):
+            for node in component:
+                self.component[node] = component_id
+
+    def edges(self, node: int) -> Iterator[Edge]:
+
+        compact = self.compact
+        if self.max_depth is not None and self.levels[node] >= self.max_depth:
+            return
+
+        kinds = self.graph.kinds_of(compact.names[node])
+        for k in range(compact.offsets[node], compact.offsets[node + 1]):
+            dep = compact.targets[k]
+            if self.levels[dep] < 0 or (self.hidden is not None and self.hidden[dep] and self.levels[dep]):
+                continue
+            yield (node, dep, compact.range_table[compact.range_ids[k]], self.component[node] == self.component[dep],
+                   kinds.get(compact.names[dep], 'prod'))
+
+    def write_dot(self, out: TextIO):
+
+        names = self.compact.names
+        out.write("digraph dependencies {\n")
+        out.write("  rankdir=LR;\n")
+        out.write("  node [shape=box];\n")
+
+        for node in self.order:
+            level = self.levels[node]
+            style = ", style=bold" if level == 0 else ""
+            out.write(f"  {_dot_id(names[node])} [depth={level}, tooltip=\"depth {level}\"{style}];\n")
+            self.nodes_written += 1
+            for source, target, version_range, cyclic, kind in self.edges(node):
+                attributes = f"label={_dot_id(version_range)}"
+                if kind != 'prod':
+                    attributes += f", style=dashed, kind={kind}"
+                if cyclic:
+                    attributes += ", color=red, cycle=true"
+                out.write(f"  {_dot_id(names[source])} -> {_dot_id(names[target])} [{attributes}];\n")
+                self.edges_written += 1
+
+        out.write("}\n")
+
+    def write_jsonl(self, out: TextIO):
+
+        names = self.compact.names
+        for node in self.order:
+            out.write(json.dumps({'type': 'node', 'id': names[node], 'depth': self.levels[node]}) + "\n")
+            self.nodes_written += 1
+            for source, target, version_range, cyclic, kind in self.edges(node):
+                out.write(json.dumps({'type': 'edge', 'from': names[source], 'to': names[target],
+                                      'range': version_range, 'kind': kind, 'cycle': cyclic}) + "\n")
+                self.edges_written += 1
+
+    def write_mermaid(self, out: TextIO):
+
+        # Идентификаторы Mermaid - числовые id узлов, имена пакетов только в подписях
+        names = self.compact.names
+        out.write("graph LR\n")
+
+        for node in self.order:
+            label = names[node].replace('"', '#quot;')
+            out.write(f"  n{node}[\"{label}<br/>depth {self.levels[node]}\"]\n")
+            self.nodes_written += 1
+            for source, target, _, cyclic, _ in self.edges(node):
+                arrow = "-.->|cycle|" if cyclic else "-->"
+                out.write(f"  n{source} {arrow} n{target}\n")
+                self.edges_written += 1
+
+    def write(self, format_name: str, out: TextIO):
+
+        writers = {'dot': self.write_dot, 'jsonl': self.write_jsonl, 'mermaid': self.write_mermaid}
+        if format_name not in writers:
+            raise ValueError(f"unsupported export format {format_name}")
+
+        writers[format_name](out)
+
+
+def _dot_id(text: str) -> str:
+
+    return '"' + text.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+def export_graph(graph: DependencyGraph, format_name: str, out: TextIO, roots: List[str],
+                 filter_substring: FilterSpec = None, max_depth: Optional[int] = None) -> GraphExporter:
+
+    exporter = GraphExporter(graph, roots, filter_substring, max_depth)
+    exporter.write(format_name, out)
+
+    return exporter
@@ -0,0 +1,135 @@
+import json
+import os
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+from DependencyGrapf import CompactGraph, CompactGraphBuilder
+from PackageFilter import PackageFilter
+from PackumentParser import JSONScanner
+
+
+JSON_LINES_EXTENSIONS = ('.jsonl', '.ndjson')
+
+Entry = Tuple[str, Dict[str, str]]
+
+
+def iter_json_entries(path: str, wanted: Callable[[str], bool] = None) -> Iterator[Entry]:
+    """Потоково перебрать записи {package: {dep: range}}; ненужные пропускаются без разбора"""
+
+    with open(path, 'rb') as f:
+        scanner = JSONScanner(f)
+
+        scanner.expect(b'{')
+        if scanner.peek() == ord('}'):
+            return
+
+        while True:
+            package = scanner.read_string()
+            scanner.expect(b':')
+
+            if wanted is None or wanted(package):
+                dependencies = scanner.read_value()
+                if not isinstance(dependencies, dict):
+                    raise ValueError(f"dependencies of {package} must be an object")
+                yield package, dependencies
+            else:
+                scanner.skip_value()
+
+            if not scanner.next_member(b'}'):
+                break
+
+
+def iter_json_lines_entries(path: str, wanted: Callable[[str], bool] = None) -> Iterator[Entry]:
+    """
+    Записи JSON Lines: {"name": ..., "dependencies": {...}} или {package: {dep: range}}
+    """
+
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+
+            record = json.loads(line)
+            if 'name' in record and isinstance(record['name'], str):
+                entries = [(record['name'], record.get('dependencies') or {})]
+            else:
+                entries = record.items()
+
+            for package, dependencies in entries:
+                if not isinstance(dependencies, dict):
+                    raise ValueError(f"line {line_number}: dependencies of {package} must be an object")
+                if wanted is None or wanted(package):
+                    yield package, dependencies
+
+
+def iter_entries(path: str, wanted: Callable[[str], bool] = None) -> Iterator[Entry]:
+
+    if os.path.splitext(path)[1].lower() in JSON_LINES_EXTENSIONS:
+        return iter_json_lines_entries(path, wanted)
+
+    return iter_json_entries(path, wanted)
+
+
+def load_graph(path: str, root: str = None, max_depth: Optional[int] = None,
+               roots: Iterable[str] = None, package_filter: PackageFilter = None) -> CompactGraph:
+    """
+    Загрузить граф из файла потоково, не держа документ целиком в памяти.
+    Если задан root (или несколько roots), сохраняются только пакеты, достижимые из них не глубже max_depth:
+    файл читается несколькими проходами, а память зависит только от достижимого подграфа;
+    пакеты, исключённые шаблонами exclude из package_filter, не раскрываются (корни - всегда)
+    """
+
+    builder = CompactGraphBuilder()
+    roots = list(roots or [])
+    if root is not None:
+        roots.insert(0, root)
+
+    if not roots:
+        for package, dependencies in iter_entries(path):
+            builder.add(package, dependencies)
+        return builder.build()
+
+    pruning = package_filter.pruning() if package_filter else None
+
+    def excluded(package: str) -> bool:
+        return pruning is not None and pruning.excluded(package)
+
+    limit = max_depth if max_depth is not None else float('inf')
+    depths = {package: 0 for package in roots}
+    pending = set(depths)
+
+    def relax(package: str, depth: int):
+        # Нашёлся более короткий путь: раскрываем заново уже загруженные пакеты
+        stack = [(package, depth)]
+        while stack:
+            package, depth = stack.pop()
+            if (package in depths and depths[package] <= depth) or excluded(package):
+                continue
+            depths[package] = depth
+            builder.intern(package)
+
+            if depth >= limit:
+                continue
+            if builder.has_entry(package):
+                stack.extend((dep, depth + 1) for dep in builder.dependencies_of(package))
+            else:
+                pending.add(package)
+
+    while pending:
+        searched = set(pending)
+
+        for package, dependencies in iter_entries(path, pending.__contains__):
+            if package not in pending:
+                continue
+            pending.discard(package)
+
+            builder.add(package, dependencies)
+            depth = depths[package]
+            if depth < limit:
+                for dep in dependencies:
+                    relax(dep, depth + 1)
+
+        # Пакеты, которых не нашлось за полный проход, в файле отсутствуют
+        pending -= searched
+
+    return builder.build()
@@ -0,0 +1,232 @@
+import mmap
+import struct
+import sys
+from array import array
+from collections.abc import Sequence
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from DependencyGrapf import CompactGraph
+from NPMDependencyFetcher import DEPENDENCY_KINDS
+
+
+MAGIC = b'GVSNAP\x00\x00'
+# 2 - добавлена секция видов рёбер; снимки версии 1 читаются, все рёбра в них prod
+FORMAT_VERSION = 2
+
+# magic, версия формата, порядок байт (0 - little, 1 - big), число узлов, рёбер и диапазонов
+_HEADER = struct.Struct('<8sIIqqq')
+_ALIGNMENT = 8
+_SECTION_COUNTS = {1: 9, 2: 10}
+
+# Код вида ребра - индекс в DEPENDENCY_KINDS, 0 - prod
+_KIND_CODES = {kind: code for code, kind in enumerate(DEPENDENCY_KINDS)}
+
+
+def _pad(length: int) -> int:
+
+    return (-length) % _ALIGNMENT
+
+
+class NameTable(Sequence):
+    """Строки из снимка, декодируемые по требованию"""
+
+    def __init__(self, offsets: memoryview, blob: memoryview):
+        self._offsets = offsets
+        self._blob = blob
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def raw(self, index: int) -> bytes:
+
+        return self._blob[self._offsets[index]:self._offsets[index + 1]].tobytes()
+
+    def __getitem__(self, index: int) -> str:
+
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+
+        return self.raw(index).decode('utf-8')
+
+
+class NameIndex:
+    """Поиск id пакета бинарным поиском по отсортированным именам, без словаря в памяти"""
+
+    def __init__(self, names: NameTable, sorted_ids: memoryview):
+        self._names = names
+        self._sorted_ids = sorted_ids
+
+    def get(self, name: str, default: Optional[int] = None) -> Optional[int]:
+
+        key = name.encode('utf-8')
+        low, high = 0, len(self._sorted_ids)
+
+        while low < high:
+            middle = (low + high) // 2
+            node_id = self._sorted_ids[middle]
+            current = self._names.raw(node_id)
+            if current == key:
+                return node_id
+            if current < key:
+                low = middle + 1
+            else:
+                high = middle
+
+        return default
+
+
+class MappedCompactGraph(CompactGraph):
+    """CompactGraph, массивы которого лежат прямо в отображённом в память файле"""
+
+    def __init__(self, mapped: mmap.mmap, *args, edge_kind_codes: memoryview = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._mmap = mapped
+        # Байт вида на каждое ребро, параллельно targets; None - снимок версии 1
+        self.edge_kind_codes = edge_kind_codes
+
+    def edge_kinds_of(self, node_id: int) -> Dict[str, str]:
+
+        # Декодируются только рёбра запрошенного узла: открытие снимка не обходит все рёбра
+        codes = self.edge_kind_codes
+        if codes is None:
+            return {}
+
+        targets, names = self.targets, self.names
+        return {names[targets[k]]: DEPENDENCY_KINDS[codes[k]]
+                for k in range(self.offsets[node_id], self.offsets[node_id + 1]) if codes[k]}
+
+    def close(self):
+
+        # Представления памяти должны быть освобождены до закрытия отображения
+        self.names = self.range_table = self.ids = None
+        self.offsets = self.targets = self.range_ids = self.has_entry = self.edge_kind_codes = None
+        self._mmap.close()
+
+
+def _string_table(strings: Iterable[str]) -> Tuple[array, bytes]:
+
+    offsets = array('q', [0])
+    blob = bytearray()
+    for string in strings:
+        blob += string.encode('utf-8')
+        offsets.append(len(blob))
+
+    return offsets, bytes(blob)
+
+
+def _edge_kind_codes(compact: CompactGraph, edge_kinds: Dict[str, Dict[str, str]] = None) -> bytes:
+
+    # Виды рёбер снимка копируются секцией целиком, edge_kinds дополняют их
+    if isinstance(compact, MappedCompactGraph) and compact.edge_kind_codes is not None:
+        codes = bytearray(compact.edge_kind_codes)
+    else:
+        codes = bytearray(compact.edge_count)
+    if not edge_kinds:
+        return bytes(codes)
+
+    offsets, targets, names = compact.offsets, compact.targets, compact.names
+    for package, kinds in edge_kinds.items():
+        node = compact.id_of(package)
+        if node is None:
+            continue
+        for k in range(offsets[node], offsets[node + 1]):
+            kind = kinds.get(names[targets[k]])
+            if kind is not None:
+                codes[k] = _KIND_CODES[kind]
+
+    return bytes(codes)
+
+
+def save_snapshot(compact: CompactGraph, path: str, edge_kinds: Dict[str, Dict[str, str]] = None):
+    """Записать граф (и виды рёбер: свои у снимка и edge_kinds) в версионированный бинарный файл"""
+
+    names = list(compact.names)
+    name_offsets, names_blob = _string_table(names)
+    range_offsets, ranges_blob = _string_table(list(compact.range_table))
+
+    encoded = [name.encode('utf-8') for name in names]
+    sorted_ids = array('i', sorted(range(len(names)), key=encoded.__getitem__))
+
+    sections = [
+        array('q', compact.offsets).tobytes(),
+        array('i', compact.targets).tobytes(),
+        array('i', compact.range_ids).tobytes(),
+        bytes(compact.has_entry),
+        name_offsets.tobytes(),
+        sorted_ids.tobytes(),
+        names_blob,
+        range_offsets.tobytes(),
+        ranges_blob,
+        _edge_kind_codes(compact, edge_kinds),
+    ]
+
+    byte_order = 0 if sys.byteorder == 'little' else 1
+    header = _HEADER.pack(MAGIC, FORMAT_VERSION, byte_order, len(names), compact.edge_count,
+                          len(compact.range_table))
+
+    with open(path, 'wb') as f:
+        f.write(header)
+        f.write(b'\x00' * _pad(len(header)))
+        for section in sections:
+            f.write(struct.pack('<q', len(section)))
+            f.write(section)
+            f.write(b'\x00' * _pad(len(section)))
+
+
+def load_snapshot(path: str) -> MappedCompactGraph:
+    """Открыть снимок через mmap: массивы не копируются и не разбираются"""
+
+    with open(path, 'rb') as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    # Заголовок и границы секций проверяем до создания представлений памяти,
+    # чтобы при ошибке отображение можно было сразу закрыть
+    try:
+        if len(mapped) < _HEADER.size:
+            raise ValueError(f"{path} is not a graph snapshot")
+
+        magic, version, byte_order, node_count, edge_count, range_count = _HEADER.unpack_from(mapped)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a graph snapshot")
+        if version not in _SECTION_COUNTS:
+            raise ValueError(f"unsupported snapshot format version {version}")
+        if byte_order != (0 if sys.byteorder == 'little' else 1):
+            raise ValueError("snapshot was written on a machine with different byte order")
+
+        position = _HEADER.size + _pad(_HEADER.size)
+        bounds: List[Tuple[int, int]] = []
+        for _ in range(_SECTION_COUNTS[version]):
+            if position + 8 > len(mapped):
+                raise ValueError(f"{path} is truncated or corrupted")
+            (length,) = struct.unpack_from('<q', mapped, position)
+            position += 8
+            if length < 0 or position + length > len(mapped):
+                raise ValueError(f"{path} is truncated or corrupted")
+            bounds.append((position, position + length))
+            position += length + _pad(length)
+
+        sizes = [end - start for start, end in bounds]
+        expected = [8 * (node_count + 1), 4 * edge_count, 4 * edge_count, node_count,
+                    8 * (node_count + 1), 4 * node_count, sizes[6], 8 * (range_count + 1), sizes[8]]
+        if version >= 2:
+            expected.append(edge_count)
+        if sizes != expected:
+            raise ValueError(f"{path} is truncated or corrupted")
+    except Exception:
+        mapped.close()
+        raise
+
+    view = memoryview(mapped)
+    sections = [view[start:end] for start, end in bounds]
+    (offsets, targets, range_ids, has_entry, name_offsets, sorted_ids,
+     names_blob, range_offsets, ranges_blob) = sections[:9]
+    edge_kind_codes = sections[9] if len(sections) > 9 else None
+
+    names = NameTable(name_offsets.cast('q'), names_blob)
+    range_table = NameTable(range_offsets.cast('q'), ranges_blob)
+
+    return MappedCompactGraph(mapped, names, has_entry, offsets.cast('q'), targets.cast('i'),
+                              range_ids.cast('i'), range_table, ids=NameIndex(names, sorted_ids.cast('i')),
+                              edge_kind_codes=edge_kind_codes)
@@ -0,0 +1,332 @@
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import quote, unquote, urlsplit
+
+
+_VERSION_IN_RANGE = re.compile(r'(\d+)\.(\d+)\.(\d+)')
+
+
+def packuments_from_graph(graph: Dict[str, Dict[str, str]]) -> Dict[str, Dict[str, Any]]:
+    """
+    Packument для каждого пакета графа {package: {dep: range}}: версия 1.0.0 (latest)
+    и по версии на каждую нижнюю границу входящих диапазонов, чтобы диапазоны разрешались
+    """
+
+    versions = {package: {'1.0.0'} for package in graph}
+    for dependencies in graph.values():
+        for dep, version_range in dependencies.items():
+            match = _VERSION_IN_RANGE.search(version_range or '')
+            versions.setdefault(dep, {'1.0.0'})
+            if match:
+                versions[dep].add('.'.join(match.groups()))
+
+    documents = {}
+    for package, package_versions in versions.items():
+        dependencies = graph.get(package, {})
+        documents[package] = {
+            'name': package,
+            'dist-tags': {'latest': '1.0.0'},
+            'versions': {version: {'name': package, 'version': version, 'dependencies': dependencies}
+                         for version in sorted(package_versions)}
+        }
+
+    return documents
+
+
+class RecordedPackuments:
+    """Каталог записанных ответов реестра: <quote(name)>.json, читается по требованию"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    @staticmethod
+    def file_name(package_name: str) -> str:
+
+        return quote(package_name, safe='@') + '.json'
+
+    def get(self, package_name: str) -> Optional[Dict[str, Any]]:
+
+        path = os.path.join(self.directory, self.file_name(package_name))
+        if not os.path.isfile(path):
+            return None
+
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+
+class FaultProfile:
+    """Параметры деградации: задержка, полоса, доля ответов 429 и 5xx, раздувание документов"""
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, bandwidth: Optional[int] = None,
+                 throttle_rate: float = 0.0, error_rate: float = 0.0, retry_after: int = 1,
+                 inflate_versions: int = 0, seed: int = None):
+        self.latency = latency
+        self.jitter = jitter
+        self.bandwidth = bandwidth  # байт в секунду на ответ
+        self.throttle_rate = throttle_rate
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.inflate_versions = inflate_versions
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def delay(self) -> float:
+
+        with self._lock:
+            return self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+
+    def injected_status(self) -> Optional[int]:
+
+        with self._lock:
+            roll = self._random.random()
+            if roll < self.throttle_rate:
+                return 429
+            if roll < self.throttle_rate + self.error_rate:
+                return self._random.choice((500, 502, 503))
+        return None
+
+
+def inflate(document: Dict[str, Any], extra_versions: int) -> Dict[str, Any]:
+    # Реальные packument популярных пакетов содержат сотни старых версий с описаниями
+
+    if not extra_versions or 'versions' not in document:
+        return document
+
+    inflated = dict(document)
+    inflated['versions'] = {}
+    padding = 'x' * 512
+    for i in range(extra_versions):
+        version = f"0.0.{i}"
+        inflated['versions'][version] = {'name': document.get('name'), 'version': version,
+                                         'description': padding, 'dependencies': {}}
+    inflated['versions'].update(document['versions'])
+    inflated['time'] = {version: '2020-01-01T00:00:00.000Z' for version in inflated['versions']}
+
+    return inflated
+
+
+class MockRegistry:
+    """Локальный HTTP-сервер, отвечающий как реестр npm, с внедрением задержек и ошибок"""
+
+    def __init__(self, packuments: Any, faults: FaultProfile = None, host: str = '127.0.0.1', port: int = 0):
+        # packuments - словарь {name: document} или RecordedPackuments
+        self.packuments = packuments
+        self.faults = faults or FaultProfile()
+        self.requests = 0
+        self.responses: Dict[int, int] = {}
+        self.bytes_sent = 0
+        self._lock = threading.Lock()
+        self._documents: Dict[str, Tuple[bytes, str]] = {}
+
+        handler = type('BoundRegistryHandler', (RegistryHandler,), {'registry': self})
+        self.server = ThreadingHTTPServer((host, port), handler)
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @classmethod
+    def from_graph_file(cls, path: str, faults: FaultProfile = None, **kwargs) -> 'MockRegistry':
+
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(packuments_from_graph(json.load(f)), faults, **kwargs)
+
+    @property
+    def url(self) -> str:
+
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def document(self, package_name: str) -> Optional[Tuple[bytes, str]]:
+        # Сериализованный (и раздутый) документ кэшируется вместе с ETag
+
+        with self._lock:
+            cached = self._documents.get(package_name)
+        if cached:
+            return cached
+
+        document = self.packuments.get(package_name)
+        if document is None:
+            return None
+
+        body = json.dumps(inflate(document, self.faults.inflate_versions)).encode('utf-8')
+        cached = (body, '"' + hashlib.sha1(body).hexdigest() + '"')
+        with self._lock:
+            self._documents[package_name] = cached
+
+        return cached
+
+    def record(self, status: int, size: int):
+
+        with self._lock:
+            self.requests += 1
+            self.responses[status] = self.responses.get(status, 0) + 1
+            self.bytes_sent += size
+
+    def start(self) -> 'MockRegistry':
+
+        self._thread = threading.Thread(target=self.server.serve_forever, kwargs={'poll_interval': 0.05},
+                                        name="mock-registry", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+
+        self.server.shutdown()
+        self.server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self) -> 'MockRegistry':
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+
+class RegistryHandler(BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+    # Заголовки и тело уходят отдельными записями: без TCP_NODELAY второй пакет
+    # ждёт отложенного ACK клиента (~40 мс на запрос keep-alive)
+    disable_nagle_algorithm = True
+    registry: MockRegistry = None
+
+    @staticmethod
+    def parse_path(path: str) -> Tuple[str, Optional[str]]:
+        # /name, /name/version, /@scope/name, /@scope%2fname/version
+
+        parts = [unquote(part) for part in urlsplit(path).path.strip('/').split('/') if part]
+        if parts and parts[0].startswith('@') and '/' not in parts[0] and len(parts) > 1:
+            parts = [parts[0] + '/' + parts[1]] + parts[2:]
+
+        if not parts:
+            return '', None
+
+        return parts[0], parts[1] if len(parts) > 1 else None
+
+    def _send(self, status: int, body: bytes = b'', headers: Dict[str, str] = None):
+
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        # Учитываем ответ до отправки тела: клиент может остановить реестр, как только дочитает его
+        self.registry.record(status, len(body))
+
+        bandwidth = self.registry.faults.bandwidth
+        if bandwidth and body:
+            # Отдаём порциями по 1/20 секунды полосы
+            chunk = max(1, bandwidth // 20)
+            for start in range(0, len(body), chunk):
+                self.wfile.write(body[start:start + chunk])
+                self.wfile.flush()
+                time.sleep(len(body[start:start + chunk]) / bandwidth)
+        else:
+            self.wfile.write(body)
+
+    def _send_json(self, status: int, payload: Dict[str, Any], headers: Dict[str, str] = None):
+
+        self._send(status, json.dumps(payload).encode('utf-8'), dict(headers or {}, **{
+            'Content-Type': 'application/json'}))
+
+    def do_GET(self):
+
+        faults = self.registry.faults
+        delay = faults.delay()
+        if delay:
+            time.sleep(delay)
+
+        status = faults.injected_status()
+        if status == 429:
+            self._send_json(429, {'error': 'Too Many Requests'}, {'Retry-After': str(faults.retry_after)})
+            return
+        if status:
+            self._send_json(status, {'error': 'injected failure'})
+            return
+
+        package_name, version = self.parse_path(self.path)
+        found = self.registry.document(package_name) if package_name else None
+        if found is None:
+            self._send_json(404, {'error': 'Not found'})
+            return
+
+        body, etag = found
+        if version is not None:
+            # Документ конкретной версии (или тега)
+            document = json.loads(body)
+            version = document.get('dist-tags', {}).get(version, version)
+            version_document = document.get('versions', {}).get(version)
+            if version_document is None:
+                self._send_json(404, {'error': f'version not found: {version}'})
+                return
+            body = json.dumps(version_document).encode('utf-8')
+            etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+
+        headers = {'ETag': etag, 'Content-Type': 'application/json'}
+        if self.headers.get('If-None-Match') == etag:
+            self._send(304, headers={'ETag': etag})
+            return
+
+        if 'gzip' in (self.headers.get('Accept-Encoding') or ''):
+            body = gzip.compress(body, compresslevel=1)
+            headers['Content-Encoding'] = 'gzip'
+
+        self._send(200, body, headers)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def parse_arguments():
+
+    parser = argparse.ArgumentParser(description='local npm registry stand-in for load testing')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--graph', help='JSON dependency graph {package: {dependency: range}}')
+    source.add_argument('--recorded', help='directory of recorded packuments named <package>.json')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=4873)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every response')
+    parser.add_argument('--jitter', type=float, default=0.0, help='extra random latency up to this many seconds')
+    parser.add_argument('--bandwidth', type=int, help='bytes per second per response')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='share of requests answered with 429')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='share of requests answered with 5xx')
+    parser.add_argument('--retry-after', type=int, default=1, help='Retry-After seconds sent with 429')
+    parser.add_argument('--inflate', type=int, default=0, help='add this many padded old versions to documents')
+    parser.add_argument('--seed', type=int, help='seed for injected faults')
+
+    return parser.parse_args()
+
+
+def main():
+
+    args = parse_arguments()
+    faults = FaultProfile(args.latency, args.jitter, args.bandwidth, args.throttle_rate, args.error_rate,
+                          args.retry_after, args.inflate, args.seed)
+
+    if args.graph:
+        registry = MockRegistry.from_graph_file(args.graph, faults, host=args.host, port=args.port)
+    else:
+        registry = MockRegistry(RecordedPackuments(args.recorded), faults, host=args.host, port=args.port)
+
+    print(f"Mock registry on {registry.url}")
+    try:
+        registry.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        registry.server.server_close()
+        print(f"Requests: {registry.requests}, responses: {registry.responses}, bytes sent: {registry.bytes_sent}")
+
+
+if __name__ == "__main__":
+    main()
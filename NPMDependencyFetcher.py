@@ -1,33 +1,295 @@
 import json
-import urllib
-from typing import Optional, Dict
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Optional, Dict, Any, Callable, Hashable, Iterable, NamedTuple, Tuple
+
+from PackumentCache import PackumentCache, CacheEntry
+from ConnectionPool import ConnectionPool
+from RequestScheduler import RegistryUnavailable, RequestScheduler
+from PackumentParser import CHUNK_SIZE, extract_version
+from SemverResolver import is_exact, pick_version
+
+
+# Сокращённые метаданные для установки: без readme, time, maintainers и т.п.
+ABBREVIATED_METADATA = 'application/vnd.npm.install-v1+json'
+
+
+# Вид зависимости и поле манифеста; порядок полей - порядок слияния, поздние перекрывают ранние
+DEPENDENCY_FIELDS = {
+    'prod': 'dependencies',
+    'dev': 'devDependencies',
+    'peer': 'peerDependencies',
+    'optional': 'optionalDependencies'
+}
+DEPENDENCY_KINDS = tuple(DEPENDENCY_FIELDS)
+
+# {вид: {зависимость: диапазон}}
+DependencySets = Dict[str, Dict[str, str]]
+
+_MISSING = object()
+
+
+def merge_dependency_sets(sets: DependencySets,
+                          kinds: Iterable[str] = None) -> Tuple[Dict[str, str], Dict[str, str]]:
+    """
+    Слить выбранные виды зависимостей (None - все): {dep: range} и виды рёбер {dep: kind}
+    для зависимостей не из dependencies
+    """
+
+    dependencies = {}
+    edge_kinds = {}
+    for kind in DEPENDENCY_KINDS:
+        if kinds is not None and kind not in kinds:
+            continue
+        for dep, version_range in sets.get(kind, {}).items():
+            dependencies[dep] = version_range
+            if kind == 'prod':
+                edge_kinds.pop(dep, None)
+            else:
+                edge_kinds[dep] = kind
+
+    return dependencies, edge_kinds
+
+
+class Validators(NamedTuple):
+    etag: Optional[str]
+    last_modified: Optional[str]
+
+    def __bool__(self) -> bool:
+        return bool(self.etag or self.last_modified)
+
+
+class FetchResult(NamedTuple):
+    data: Optional[Dict]
+    etag: Optional[str]
+    last_modified: Optional[str]
+    not_modified: bool
+
+
+class PackageRecord(NamedTuple):
+    name: str
+    version: Optional[str]
+    dependencies: Optional[Dict[str, str]]
+    etag: Optional[str]
+    last_modified: Optional[str]
+    not_modified: bool
+    edge_kinds: Optional[Dict[str, str]] = None
+
+
+class LRUCache:
+    """Потокобезопасный LRU-словарь ограниченного размера"""
+
+    def __init__(self, max_size: int = 4096):
+        self.max_size = max_size
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+
+        with self._lock:
+            if key not in self._data:
+                return default
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def put(self, key: Hashable, value: Any):
+
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def __len__(self) -> int:
+
+        return len(self._data)
+
+
+class _CountingReader:
+    # Поток ответа, считающий прочитанные байты: потоковый разбор не читает тело целиком.
+    # С copy прочитанное дописывается в файл - так тело попадает в кэш, не собираясь в памяти
+
+    def __init__(self, stream, count: Callable[[int], None], copy=None):
+        self.stream = stream
+        self.count = count
+        self.copy = copy
+
+    def read(self, amt: int = -1) -> bytes:
+
+        data = self.stream.read(amt)
+        self.count(len(data))
+        if self.copy is not None:
+            self.copy.write(data)
+        return data
+
+    def drain(self):
+        # Разбор может закончиться раньше документа: остаток тоже нужен кэшу
+
+        while self.read(CHUNK_SIZE):
+            pass
 
 
 class NPMDependencyFetcher:
 
-    def __init__(self, registry_url: str = "https://registry.npmjs.org"):
+    def __init__(self, registry_url: str = "https://registry.npmjs.org", cache: PackumentCache = None,
+                 offline: bool = False, memo_size: int = 4096, connection_pool: ConnectionPool = None,
+                 abbreviated: bool = False, streaming: bool = False, scheduler: RequestScheduler = None):
         self.registry_url = registry_url.rstrip('/')
-        self.package_version = None
+        self.cache = cache
+        self.connection_pool = connection_pool
+        self.offline = offline
+        self.abbreviated = abbreviated
+        self.streaming = streaming
+        # Записи кэша ревалидируются независимо от TTL (перестроение графа сервером)
+        self.revalidate = False
+        # Частота, параллельность и повторы запросов к реестру
+        self.scheduler = scheduler or RequestScheduler()
+        self.network_requests = 0
+        self.bytes_received = 0
+        self.parse_seconds = 0.0
+
+        # Разобранные зависимости по (package, version) и запросы, выполняющиеся прямо сейчас
+        self._memo = LRUCache(memo_size)
+        # Списки версий и dist-tags пакетов для локального разрешения диапазонов
+        self._version_index = LRUCache(memo_size)
+        self._inflight: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self.memo_hits = 0
+        self.coalesced_requests = 0
+
+    def start_revalidation(self):
+        """
+        Забыть разобранные зависимости и списки версий; дальше каждая запись кэша
+        проверяется в реестре условным запросом (If-None-Match/If-Modified-Since), а не по TTL
+        """
+
+        with self._lock:
+            self._memo = LRUCache(self._memo.max_size)
+            self._version_index = LRUCache(self._version_index.max_size)
+            self.revalidate = True
 
     def get_package_info(self, package_name: str, version: str = None) -> Optional[Dict]:
+
+        result = self._fetch_document(package_name, version)
+        return result.data if result else None
+
+    def fetch_record(self, package_name: str, version: str = None, etag: str = None,
+                     last_modified: str = None, kinds: Iterable[str] = None) -> Optional[PackageRecord]:
+        """
+        Получить зависимости выбранных видов вместе с валидаторами документа. Если переданные
+        etag/last_modified ещё актуальны, возвращается запись с not_modified=True без разбора
+        """
+
+        result = self._fetch_document(package_name, version, Validators(etag, last_modified))
+        if result is None:
+            return None
+
+        if result.not_modified:
+            return PackageRecord(package_name, None, None, result.etag, result.last_modified, True)
+
+        self._remember_versions(package_name, result.data)
+        dependencies, edge_kinds = merge_dependency_sets(self.extract_dependency_sets(result.data, version), kinds)
+        return PackageRecord(package_name, self.select_version(result.data, version), dependencies,
+                             result.etag, result.last_modified, False, edge_kinds)
+
+    def _fetch_document(self, package_name: str, version: str = None,
+                        validators: Validators = None) -> Optional[FetchResult]:
         try:
 
-            self.package_version = version
+            # Точную версию можно запросить отдельным документом; диапазоны и теги,
+            # а также сокращённые метаданные требуют документа пакета целиком
+            url_version = version if is_exact(version) and not (self.abbreviated or self.streaming) else None
 
             url = f"{self.registry_url}/{package_name}"
-            if version:
-                url = f"{self.registry_url}/{package_name}/{version}"
+            if url_version:
+                url = f"{self.registry_url}/{package_name}/{url_version}"
+
+            # Свежая запись кэша используется без обращения к сети,
+            # в офлайн-режиме используется любая сохранённая запись
+            cache_key = None
+            entry = None
+            if self.cache is not None:
+                cache_key = PackumentCache.make_key(self.registry_url, package_name, url_version,
+                                                    'abbreviated' if self.abbreviated else None)
+                # При потоковом разборе тело читается из кэша кусками, а не одним bytes
+                entry = self.cache.get(cache_key, with_body=not self.streaming)
+                if entry and (self.offline or (self.cache.is_fresh(entry) and not self.revalidate)):
+                    return self._cached_result(entry, version, validators, cache_key)
+
+            if self.offline:
+                print(f"Package {package_name} is not cached, skipped in offline mode")
+                return None
 
             print(f"\nFetch: {url}")
 
-            with urllib.request.urlopen(url) as response:
-                if response.status == 200:
-                    data = json.loads(response.read().decode('utf-8'))
-                    return data
-                else:
-                    print(f"HTTP error: {response.status}")
-                    return None
+            # Валидаторы кэша важнее переданных: тело для 304 берётся из кэша
+            conditional = Validators(entry.etag, entry.last_modified) if entry else validators
+
+            request = urllib.request.Request(url)
+            if self.abbreviated:
+                request.add_header('Accept', f"{ABBREVIATED_METADATA}; q=1.0, application/json; q=0.8")
+            if conditional:
+                if conditional.etag:
+                    request.add_header('If-None-Match', conditional.etag)
+                if conditional.last_modified:
+                    request.add_header('If-Modified-Since', conditional.last_modified)
+
+            def send() -> Optional[FetchResult]:
+                with self._lock:
+                    self.network_requests += 1
+                try:
+                    with self._urlopen(request) as response:
+                        if response.status == 200:
+                            etag = response.headers.get('ETag')
+                            last_modified = response.headers.get('Last-Modified')
+
+                            # Документ разбирается прямо из сокета, не читаясь целиком;
+                            # для кэша тело по ходу разбора копируется во временный файл
+                            if self.streaming:
+                                spool = tempfile.TemporaryFile() if self.cache is not None else None
+                                try:
+                                    reader = _CountingReader(response, self._count_bytes, spool)
+                                    data = self._parse_stream(reader, version)
+                                    if spool is not None:
+                                        reader.drain()
+                                        self.cache.put_stream(cache_key, spool, etag, last_modified)
+                                finally:
+                                    if spool is not None:
+                                        spool.close()
+                                return FetchResult(data, etag, last_modified, False)
 
+                            body = response.read()
+                            self._count_bytes(len(body))
+                            data = self._parse_body(body)
+                            if self.cache is not None:
+                                self.cache.put(cache_key, body, etag, last_modified)
+                            return FetchResult(data, etag, last_modified, False)
+                        else:
+                            print(f"HTTP error: {response.status}")
+                            return None
+                except urllib.error.HTTPError as e:
+                    # 304 Not Modified: сохранённое тело всё ещё актуально
+                    if e.code == 304 and entry:
+                        self.cache.mark_revalidated(cache_key)
+                        return self._cached_result(entry, version, validators, cache_key)
+                    if e.code == 304 and validators:
+                        return FetchResult(None, validators.etag, validators.last_modified, True)
+                    raise
+
+            # 429, 5xx и сбои сети повторяются; если реестр так и не ответил - RegistryUnavailable
+            return self.scheduler.call(send, package_name)
+
+        except RegistryUnavailable as e:
+            # Устаревшая запись кэша лучше пропавшего узла
+            if entry is not None:
+                print(f"Using stale cache for {package_name}: {e}")
+                return self._cached_result(entry, version, validators, cache_key)
+            raise
         except urllib.error.HTTPError as e:
             print(f"HTTP error getting package {package_name}: {e.code} {e.reason}")
             return None
@@ -41,16 +303,77 @@ class NPMDependencyFetcher:
             print(f"error {package_name}: {e}")
             return None
 
-    def extract_dependencies(self, package_info: Dict) -> Dict[str, str]:
-        """Извлечь зависимости из информации о пакете"""
-        dependencies = {}
+    def _cached_result(self, entry: CacheEntry, version: str = None, validators: Validators = None,
+                       cache_key: str = None) -> FetchResult:
+        # Запись кэша совпадает с валидаторами вызывающего: разбирать тело не нужно
+
+        if validators and ((validators.etag and validators.etag == entry.etag) or
+                           (validators.last_modified and validators.last_modified == entry.last_modified)):
+            return FetchResult(None, entry.etag, entry.last_modified, True)
+
+        if entry.body is not None:
+            return FetchResult(self._parse_body(entry.body), entry.etag, entry.last_modified, False)
+
+        # Запись прочитана без тела: потоково разбираем копию из кэша
+        body = self.cache.open_body(cache_key)
+        if body is None:
+            raise LookupError(f"cache entry {cache_key} was evicted")
+        with body:
+            return FetchResult(self._parse_stream(body, version), entry.etag, entry.last_modified, False)
+
+    def _parse_body(self, body: bytes) -> Dict:
+
+        started = time.perf_counter()
+        try:
+            return json.loads(body.decode('utf-8'))
+        finally:
+            self._count_parse(time.perf_counter() - started)
+
+    def _parse_stream(self, stream, version: str = None) -> Dict:
+        # Потоковый разбор оставляет в памяти только выбранную версию
+
+        started = time.perf_counter()
+        try:
+            return extract_version(stream, version)
+        finally:
+            self._count_parse(time.perf_counter() - started)
+
+    def _count_parse(self, seconds: float):
+
+        with self._lock:
+            self.parse_seconds += seconds
+
+    def _count_bytes(self, size: int):
+
+        with self._lock:
+            self.bytes_received += size
+
+    def _urlopen(self, request: urllib.request.Request):
+        # С пулом соединения переиспользуются между запросами (keep-alive + gzip)
+
+        if self.connection_pool is not None:
+            return self.connection_pool.urlopen(request)
+
+        return urllib.request.urlopen(request)
+
+    def extract_dependencies(self, package_info: Dict, version: str = None,
+                             kinds: Iterable[str] = None) -> Dict[str, str]:
+        """Извлечь зависимости выбранных видов (по умолчанию всех) из информации о пакете"""
+
+        return merge_dependency_sets(self.extract_dependency_sets(package_info, version), kinds)[0]
+
+    def extract_dependency_sets(self, package_info: Dict, version: str = None) -> DependencySets:
+        """Зависимости версии пакета по видам: {kind: {dep: range}}, пустые виды опускаются"""
+        sets = {}
 
         try:
             version_data = None
 
-            # Если передан конкретный version, используем его
-            if self.package_version and 'versions' in package_info:
-                version_data = package_info['versions'].get(self.package_version, {})
+            # Разрешаем версию, тег или диапазон в конкретную версию из versions
+            if package_info.get('versions'):
+                resolved = self.select_version(package_info, version)
+                if resolved:
+                    version_data = package_info['versions'].get(resolved, {})
 
             # Если не нашли по конкретной версии или версия не указана, используем latest
             if not version_data and 'dist-tags' in package_info and 'latest' in package_info['dist-tags']:
@@ -66,25 +389,108 @@ class NPMDependencyFetcher:
                 first_version = next(iter(package_info['versions'].values()))
                 version_data = first_version
 
-            if version_data:
-                # Собираем все типы зависимостей
-                deps = version_data.get('dependencies', {})
-                dev_deps = version_data.get('devDependencies', {})
-                peer_deps = version_data.get('peerDependencies', {})
-                optional_deps = version_data.get('optionalDependencies', {})
+            # Манифест без поля version (например, package.json) - сам объект
+            if not version_data and any(field in package_info for field in DEPENDENCY_FIELDS.values()):
+                version_data = package_info
 
-                all_deps = {**deps, **dev_deps, **peer_deps, **optional_deps}
-                dependencies.update(all_deps)
+            if version_data:
+                for kind, field in DEPENDENCY_FIELDS.items():
+                    if version_data.get(field):
+                        sets[kind] = dict(version_data[field])
 
         except Exception as e:
             print(f"Ошибка при извлечении зависимостей: {e}")
 
-        return dependencies
+        return sets
+
+    def _single_flight(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        # Результат берётся из LRU; если такой же запрос уже выполняется
+        # в другом потоке, ждём его вместо повторного обращения к реестру
+
+        with self._lock:
+            value = self._memo.get(key, _MISSING)
+            if value is not _MISSING:
+                self.memo_hits += 1
+                return value
+
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[key] = future
+            else:
+                self.coalesced_requests += 1
+
+        if not owner:
+            return future.result()
+
+        try:
+            value = loader()
+            # Неудачные запросы не запоминаем, чтобы их можно было повторить
+            if value is not None:
+                self._memo.put(key, value)
+            future.set_result(value)
+            return value
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+
+    def select_version(self, package_info: Dict, version: str = None) -> Optional[str]:
+
+        if 'versions' not in package_info:
+            return package_info.get('version')
+
+        return pick_version(package_info['versions'].keys(), package_info.get('dist-tags', {}), version)
+
+    def resolve_version(self, package_name: str, version: str = None) -> Optional[str]:
+        # Конкретная версия без обращения к реестру, если список версий уже известен
+
+        if is_exact(version):
+            return version
+
+        index = self._version_index.get(package_name)
+        if index is None:
+            return None
+
+        versions, dist_tags = index
+        return pick_version(versions, dist_tags, version)
+
+    def _remember_versions(self, package_name: str, package_info: Dict):
+
+        if 'versions' not in package_info:
+            return
+
+        versions = package_info.get('version_list') or list(package_info['versions'])
+        self._version_index.put(package_name, (tuple(versions), dict(package_info.get('dist-tags', {}))))
+
+    def get_dependencies(self, package_name: str, version: str = None, kinds: Iterable[str] = None) -> Dict[str, str]:
+
+        return merge_dependency_sets(self.get_dependency_sets(package_name, version), kinds)[0]
+
+    def get_dependency_sets(self, package_name: str, version: str = None) -> DependencySets:
+        """Зависимости по видам; запоминаются все виды, выбор вида не требует повторного запроса"""
+
+        # Разные диапазоны, разрешающиеся в одну версию, делят один результат
+        spec = self.resolve_version(package_name, version) or version
+
+        def load():
+            package_info = self.get_package_info(package_name, spec)
+            if not package_info:
+                return None
+
+            self._remember_versions(package_name, package_info)
+            sets = self.extract_dependency_sets(package_info, spec)
+
+            resolved = self.select_version(package_info, spec)
+            if resolved and resolved != spec:
+                self._memo.put((package_name, resolved), sets)
 
-    def get_dependencies(self, package_name: str, version: str = None) -> Dict[str, str]:
+            return sets
 
-        package_info = self.get_package_info(package_name, version)
-        if not package_info:
-            return {}
+        sets = self._single_flight((package_name, spec), load)
 
-        return self.extract_dependencies(package_info)
\ No newline at end of file
+        # Возвращаем копию, чтобы вызывающий код не испортил запомненный результат
+        return {kind: dict(dependencies) for kind, dependencies in sets.items()} if sets else {}
\ No newline at end of file
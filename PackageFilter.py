@@ -0,0 +1,124 @@
+import fnmatch
+import re
+import weakref
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Pattern, Tuple, Union
+
+GLOB_CHARS = '*?['
+REGEX_PREFIX = 're:'
+
+
+class PackageFilter:
+    """
+    Фильтр имён пакетов. Шаблон - подстрока, glob (есть *, ? или [) или регулярное выражение
+    с префиксом re:; регистр не учитывается. Шаблоны каждого списка компилируются в одно выражение,
+    вердикт кэшируется по имени пакета. Пакет исключается, если совпал с exclude
+    или задан include и пакет не совпал ни с одним его шаблоном. Обход отсекают только
+    шаблоны exclude (pruning): пакет из include может лежать под неподходящими родителями,
+    поэтому include применяется к результату (shown_tree)
+    """
+
+    def __init__(self, exclude: Iterable[str] = (), include: Iterable[str] = ()):
+        self.exclude = tuple(pattern for pattern in exclude if pattern)
+        self.include = tuple(pattern for pattern in include if pattern)
+        self._exclude = self._compile(self.exclude)
+        self._include = self._compile(self.include)
+        self._verdicts: Dict[str, bool] = {}
+        self._mask = None
+
+    @staticmethod
+    def _translate(pattern: str) -> str:
+
+        if pattern.startswith(REGEX_PREFIX):
+            return pattern[len(REGEX_PREFIX):]
+        # glob сравнивается с именем целиком, подстрока - в любом месте
+        if any(char in pattern for char in GLOB_CHARS):
+            return r'\A' + fnmatch.translate(pattern)
+        return re.escape(pattern)
+
+    @classmethod
+    def _compile(cls, patterns: Iterable[str]) -> Optional[Pattern]:
+
+        patterns = list(patterns)
+        if not patterns:
+            return None
+
+        try:
+            return re.compile('|'.join(f"(?:{cls._translate(pattern)})" for pattern in patterns), re.IGNORECASE)
+        except re.error as e:
+            raise ValueError(f"invalid package pattern {', '.join(patterns)}: {e}") from e
+
+    def __bool__(self) -> bool:
+        return bool(self.exclude or self.include)
+
+    def __str__(self) -> str:
+        return ', '.join(list(self.exclude) + [f"only {pattern}" for pattern in self.include])
+
+    def excluded(self, package: str) -> bool:
+
+        verdict = self._verdicts.get(package)
+        if verdict is None:
+            verdict = bool((self._exclude is not None and self._exclude.search(package))
+                           or (self._include is not None and not self._include.search(package)))
+            self._verdicts[package] = verdict
+
+        return verdict
+
+    def pruning(self) -> Optional['PackageFilter']:
+        """Часть фильтра, которую можно применять во время обхода: только шаблоны exclude"""
+
+        return self if not self.include else make_filter(self.exclude)
+
+    def shown_tree(self, root: str, tree: Dict[str, List[str]]) -> Dict[str, List[str]]:
+        """
+        Дерево обхода только из показываемых пакетов (корень показывается всегда): пакет подвешивается
+        к ближайшему показанному предку. Ключи tree идут в порядке обхода, родитель раньше детей
+        """
+
+        anchors = {root: root}
+        shown: Dict[str, List[str]] = {}
+        for package, children in tree.items():
+            anchor = anchors.get(package, package)
+            if anchor == package:
+                shown.setdefault(package, [])
+            for child in children:
+                if self.excluded(child):
+                    anchors[child] = anchor
+                else:
+                    anchors[child] = child
+                    shown.setdefault(anchor, []).append(child)
+
+        return shown
+
+    def mask(self, compact) -> bytearray:
+        """Маска исключённых узлов CompactGraph; строится один раз на граф, изменять её нельзя"""
+
+        # Граф держим по слабой ссылке: кэшированный make_filter не должен продлевать жизнь старому графу
+        cached = self._mask
+        if cached is None or cached[0]() is not compact:
+            cached = (weakref.ref(compact), bytearray(self.excluded(name) for name in compact.names))
+            self._mask = cached
+
+        return cached[1]
+
+
+FilterSpec = Union[str, PackageFilter, None]
+
+
+@lru_cache(maxsize=256)
+def make_filter(exclude: Tuple[str, ...] = (), include: Tuple[str, ...] = ()) -> Optional[PackageFilter]:
+    """Фильтр по спискам шаблонов; одинаковые списки (например, из запросов к серверу) компилируются один раз"""
+
+    package_filter = PackageFilter(exclude, include)
+    return package_filter if package_filter else None
+
+
+def compile_filter(spec: FilterSpec) -> Optional[PackageFilter]:
+    """Строка - один шаблон исключения (прежний --filter); пустой фильтр - None"""
+
+    if isinstance(spec, PackageFilter):
+        return spec if spec else None
+    if not spec:
+        return None
+
+    return make_filter((spec,))
@@ -0,0 +1,213 @@
+import os
+import io
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import BinaryIO, Dict, Optional, NamedTuple
+
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "graphVisualizer")
+
+# Время доступа копится в памяти и пишется одной транзакцией раз в столько попаданий
+ACCESS_FLUSH_SIZE = 256
+
+# Тело копируется между файлом и базой кусками такого размера
+BODY_CHUNK_SIZE = 64 * 1024
+
+
+class CacheEntry(NamedTuple):
+    # None, если запись прочитана без тела (get(..., with_body=False))
+    body: Optional[bytes]
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fetched_at: float
+
+
+class PackumentCache:
+    """
+    Дисковый кэш ответов реестра (SQLite) с TTL, ревалидацией и LRU-вытеснением.
+    Чтение не пишет в базу: время доступа сбрасывается пачкой перед вытеснением,
+    раз в ACCESS_FLUSH_SIZE попаданий и при закрытии. Суммарный размер ведётся в памяти,
+    поэтому запись не сканирует таблицу, пока лимит не превышен. Для потокового разбора
+    тело пишется и читается кусками (put_stream/open_body), не собираясь в памяти целиком
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, ttl: float = 3600,
+                 max_size: int = 512 * 1024 * 1024):
+        os.makedirs(cache_dir, exist_ok=True)
+
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+
+        self._lock = threading.Lock()
+        self._pending_access: Dict[str, float] = {}
+        self._conn = sqlite3.connect(os.path.join(cache_dir, "packuments.sqlite"), check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS packuments ("
+            " key TEXT PRIMARY KEY,"
+            " body BLOB NOT NULL,"
+            " etag TEXT,"
+            " last_modified TEXT,"
+            " fetched_at REAL NOT NULL,"
+            " last_access REAL NOT NULL,"
+            " size INTEGER NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS packuments_lru ON packuments (last_access)")
+        self._conn.commit()
+        self._total = self._stored_size()
+
+    @staticmethod
+    def make_key(registry_url: str, package_name: str, version: str = None, variant: str = None) -> str:
+
+        key = f"{registry_url}|{package_name}|{version or ''}"
+        if variant:
+            key += f"|{variant}"
+
+        return key
+
+    def get(self, key: str, with_body: bool = True) -> Optional[CacheEntry]:
+
+        columns = "body, etag, last_modified, fetched_at" if with_body else "NULL, etag, last_modified, fetched_at"
+        with self._lock:
+            row = self._conn.execute(f"SELECT {columns} FROM packuments WHERE key = ?", (key,)).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._pending_access[key] = time.time()
+            if len(self._pending_access) >= ACCESS_FLUSH_SIZE:
+                self._flush_access()
+                self._conn.commit()
+
+        return CacheEntry(bytes(row[0]) if with_body else None, row[1], row[2], row[3])
+
+    def open_body(self, key: str) -> Optional[BinaryIO]:
+        """Тело записи во временном файле (копируется кусками); None, если записи уже нет"""
+
+        with self._lock:
+            row = self._conn.execute("SELECT rowid FROM packuments WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if not hasattr(self._conn, 'blobopen'):
+                # sqlite3 до Python 3.11 не умеет читать BLOB по частям
+                body = self._conn.execute("SELECT body FROM packuments WHERE rowid = ?", row).fetchone()[0]
+                return io.BytesIO(bytes(body))
+
+            target = tempfile.TemporaryFile()
+            with self._conn.blobopen('packuments', 'body', row[0], readonly=True) as blob:
+                while True:
+                    chunk = blob.read(BODY_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    target.write(chunk)
+
+        target.seek(0)
+        return target
+
+    def is_fresh(self, entry: CacheEntry) -> bool:
+
+        return time.time() - entry.fetched_at < self.ttl
+
+    def put(self, key: str, body: bytes, etag: str = None, last_modified: str = None):
+
+        now = time.time()
+        with self._lock:
+            previous = self._conn.execute("SELECT size FROM packuments WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO packuments (key, body, etag, last_modified, fetched_at, last_access, size)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, sqlite3.Binary(body), etag, last_modified, now, now, len(body))
+            )
+            self._stored(key, len(body), previous)
+
+    def put_stream(self, key: str, source: BinaryIO, etag: str = None, last_modified: str = None):
+        """Записать тело из файла (позиция - конец тела): строка создаётся нулями и заполняется кусками"""
+
+        size = source.tell()
+        source.seek(0)
+        if not hasattr(self._conn, 'blobopen'):
+            self.put(key, source.read(), etag, last_modified)
+            return
+
+        now = time.time()
+        with self._lock:
+            previous = self._conn.execute("SELECT size FROM packuments WHERE key = ?", (key,)).fetchone()
+            rowid = self._conn.execute(
+                "INSERT OR REPLACE INTO packuments (key, body, etag, last_modified, fetched_at, last_access, size)"
+                " VALUES (?, zeroblob(?), ?, ?, ?, ?, ?)",
+                (key, size, etag, last_modified, now, now, size)
+            ).lastrowid
+            with self._conn.blobopen('packuments', 'body', rowid) as blob:
+                while True:
+                    chunk = source.read(BODY_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    blob.write(chunk)
+            self._stored(key, size, previous)
+
+    def _stored(self, key: str, size: int, previous: Optional[tuple]):
+        # Вызывается под блокировкой после записи тела: учёт размера, вытеснение и commit
+
+        self._pending_access.pop(key, None)
+        self._total += size - (previous[0] if previous else 0)
+        if self._total > self.max_size:
+            self._evict()
+        self._conn.commit()
+
+    def mark_revalidated(self, key: str):
+        # Ответ 304: тело не изменилось, продлеваем срок жизни записи
+
+        now = time.time()
+        with self._lock:
+            self.revalidated += 1
+            self._pending_access.pop(key, None)
+            self._conn.execute(
+                "UPDATE packuments SET fetched_at = ?, last_access = ? WHERE key = ?", (now, now, key)
+            )
+            self._conn.commit()
+
+    def _flush_access(self):
+        # Вызывается под блокировкой; commit - на вызывающем
+
+        if self._pending_access:
+            self._conn.executemany("UPDATE packuments SET last_access = ? WHERE key = ?",
+                                   [(accessed, key) for key, accessed in self._pending_access.items()])
+            self._pending_access.clear()
+
+    def _stored_size(self) -> int:
+
+        return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM packuments").fetchone()[0]
+
+    def _evict(self):
+        # Вызывается под блокировкой, когда счётчик превысил лимит: удаляем давно
+        # не использованные записи, пока суммарный размер выше лимита
+
+        self._flush_access()
+
+        victims = []
+        for key, size in self._conn.execute("SELECT key, size FROM packuments ORDER BY last_access"):
+            if self._total <= self.max_size:
+                break
+            victims.append((key,))
+            self._total -= size
+
+        self._conn.executemany("DELETE FROM packuments WHERE key = ?", victims)
+
+    def size(self) -> int:
+
+        with self._lock:
+            return self._stored_size()
+
+    def close(self):
+
+        with self._lock:
+            self._flush_access()
+            self._conn.commit()
+            self._conn.close()
@@ -0,0 +1,222 @@
+import json
+import re
+from typing import Any, Dict, Optional, BinaryIO
+
+from SemverResolver import compile_range, version_key
+
+
+CHUNK_SIZE = 64 * 1024
+
+DEPENDENCY_FIELDS = ('dependencies', 'devDependencies', 'peerDependencies', 'optionalDependencies')
+
+_WHITESPACE = b' \t\r\n'
+_STRUCTURAL = re.compile(rb'["{}\[\]]')
+# Тело строки после открывающей кавычки вместе с закрывающей кавычкой
+_STRING_BODY = re.compile(rb'[^"\\]*(?:\\.[^"\\]*)*"', re.S)
+_SCALAR = re.compile(rb'[^,}\]\s]*')
+
+
+class JSONScanner:
+    """Побайтовый сканер JSON поверх потока, хранящий в памяти только текущий фрагмент"""
+
+    def __init__(self, stream: BinaryIO, chunk_size: int = CHUNK_SIZE):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.buf = b''
+        self.pos = 0
+        self.mark = None
+
+    def _more(self) -> bool:
+        # Дочитываем поток, отбрасывая уже разобранную часть буфера
+
+        chunk = self.stream.read(self.chunk_size)
+        if not chunk:
+            return False
+
+        keep_from = self.pos if self.mark is None else self.mark
+        self.buf = self.buf[keep_from:] + chunk
+        self.pos -= keep_from
+        if self.mark is not None:
+            self.mark -= keep_from
+
+        return True
+
+    def peek(self) -> int:
+
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._more():
+                raise ValueError("unexpected end of JSON document")
+
+    def expect(self, char: bytes):
+
+        if self.peek() != char[0]:
+            raise ValueError(f"expected {char!r} at offset {self.pos}")
+        self.pos += 1
+
+    def _skip_string_body(self):
+
+        while True:
+            match = _STRING_BODY.match(self.buf, self.pos)
+            if match:
+                self.pos = match.end()
+                return
+            if not self._more():
+                raise ValueError("unterminated string in JSON document")
+
+    def _skip_container(self):
+
+        depth = 1
+        while depth:
+            match = _STRUCTURAL.search(self.buf, self.pos)
+            if not match:
+                self.pos = len(self.buf)
+                if not self._more():
+                    raise ValueError("unterminated container in JSON document")
+                continue
+
+            char = self.buf[match.start()]
+            self.pos = match.end()
+            if char == ord('"'):
+                self._skip_string_body()
+            elif char in b'{[':
+                depth += 1
+            else:
+                depth -= 1
+
+    def skip_value(self):
+
+        char = self.peek()
+        self.pos += 1
+
+        if char == ord('"'):
+            self._skip_string_body()
+        elif char in b'{[':
+            self._skip_container()
+        else:
+            while True:
+                match = _SCALAR.match(self.buf, self.pos)
+                self.pos = match.end()
+                if self.pos < len(self.buf) or not self._more():
+                    return
+
+    def read_value(self) -> Any:
+        # Материализуется только одно значение, а не весь документ
+
+        self.peek()
+        self.mark = self.pos
+        try:
+            self.skip_value()
+            raw = self.buf[self.mark:self.pos]
+        finally:
+            self.mark = None
+
+        return json.loads(raw)
+
+    def read_string(self) -> str:
+
+        if self.peek() != ord('"'):
+            raise ValueError(f"expected string at offset {self.pos}")
+
+        return self.read_value()
+
+    def next_member(self, closing: bytes) -> bool:
+        # После элемента объекта/массива: True, если дальше есть ещё элемент
+
+        char = self.peek()
+        self.pos += 1
+        if char == ord(','):
+            return True
+        if char == closing[0]:
+            return False
+        raise ValueError(f"expected ',' or {closing!r} at offset {self.pos - 1}")
+
+
+def _dependency_maps(version_data: Dict) -> Dict:
+
+    return {field: version_data[field] for field in DEPENDENCY_FIELDS if field in version_data}
+
+
+def extract_version(stream: BinaryIO, version: str = None, chunk_size: int = CHUNK_SIZE) -> Dict[str, Any]:
+    """
+    Потоково разобрать packument и вернуть сокращённый документ:
+    dist-tags, список версий и данные только нужной версии.
+    Если version - диапазон, сохраняется лучшая подходящая версия и latest
+    """
+
+    scanner = JSONScanner(stream, chunk_size)
+    compiled = compile_range(version) if version else None
+    best: Optional[str] = None
+    result: Dict[str, Any] = {'dist-tags': {}, 'versions': {}, 'version_list': []}
+    # Зависимости версий, встреченных до dist-tags, на случай отката к latest
+    pending: Dict[str, Dict] = {}
+    first_version: Optional[str] = None
+
+    scanner.expect(b'{')
+    if scanner.peek() == ord('}'):
+        scanner.pos += 1
+        return result
+
+    while True:
+        key = scanner.read_string()
+        scanner.expect(b':')
+
+        if key == 'dist-tags':
+            result['dist-tags'] = scanner.read_value()
+
+        elif key == 'versions' and scanner.peek() == ord('{'):
+            scanner.expect(b'{')
+            has_more = scanner.peek() != ord('}')
+            if not has_more:
+                scanner.pos += 1
+
+            while has_more:
+                candidate = scanner.read_string()
+                scanner.expect(b':')
+                result['version_list'].append(candidate)
+
+                dist_tags = result['dist-tags']
+                latest = dist_tags.get('latest')
+                better = (compiled is not None and compiled.test(candidate)
+                          and (best is None or version_key(candidate) > version_key(best)))
+
+                if better or candidate in (version, latest, dist_tags.get(version)):
+                    result['versions'][candidate] = scanner.read_value()
+                    if better:
+                        # Предыдущий кандидат больше не нужен
+                        if best is not None and best not in (latest, dist_tags.get(version)):
+                            result['versions'].pop(best, None)
+                        best = candidate
+                elif latest is None or first_version is None:
+                    pending[candidate] = _dependency_maps(scanner.read_value())
+                else:
+                    scanner.skip_value()
+
+                if first_version is None:
+                    first_version = candidate
+
+                has_more = scanner.next_member(b'}')
+
+        elif key in ('name', 'version') or key in DEPENDENCY_FIELDS:
+            # Документ конкретной версии: нужные поля лежат в корне
+            result[key] = scanner.read_value()
+
+        else:
+            scanner.skip_value()
+
+        if not scanner.next_member(b'}'):
+            break
+
+    # dist-tags оказались после versions: берём нужные версии из отложенных
+    for tag in ('latest', version):
+        tagged = result['dist-tags'].get(tag)
+        if tagged in pending and tagged not in result['versions']:
+            result['versions'][tagged] = pending[tagged]
+
+    if not result['versions'] and first_version in pending:
+        result['versions'][first_version] = pending[first_version]
+
+    return result
@@ -0,0 +1,248 @@
+import multiprocessing
+from array import array
+from multiprocessing import shared_memory
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from DependencyGrapf import CompactGraph, DependencyGraph
+from PackageFilter import FilterSpec, compile_filter
+
+# (корень, число зависимостей, глубина, циклы, замыкание или None) - всё в id узлов
+ClosureRecord = Tuple[int, int, int, List[List[int]], Optional[List[int]]]
+
+# Состояние процесса-обработчика: массивы (в общей памяти) и кэш циклов
+_worker: Dict[str, Any] = {}
+
+
+class _SharedCSR:
+    # Смежность поверх общих массивов для DependencyGraph._representative_cycle
+
+    def __init__(self, offsets: Sequence[int], targets: Sequence[int]):
+        self.offsets = offsets
+        self.targets = targets
+
+    def successors(self, node_id: int) -> Sequence[int]:
+
+        return self.targets[self.offsets[node_id]:self.offsets[node_id + 1]]
+
+
+class _Component:
+    # Принадлежность компоненте без построения множества её узлов
+
+    def __init__(self, component_of: Sequence[int], component_id: int):
+        self.component_of = component_of
+        self.component_id = component_id
+
+    def __contains__(self, node_id: int) -> bool:
+        return self.component_of[node_id] == self.component_id
+
+
+def _typecode(values) -> str:
+
+    return values.typecode if isinstance(values, array) else memoryview(values).format
+
+
+class SharedGraph:
+    """
+    Массивы графа в multiprocessing.shared_memory: каждый массив копируется в свой блок один раз,
+    обработчики подключаются к блокам по имени без копирования и сериализации графа
+    """
+
+    def __init__(self, arrays: Dict[str, Sequence[int]]):
+        self.blocks: List[shared_memory.SharedMemory] = []
+        self.spec: Dict[str, Tuple[str, str, int]] = {}
+
+        try:
+            for key, values in arrays.items():
+                data = memoryview(values).cast('B')
+                block = shared_memory.SharedMemory(create=True, size=max(1, data.nbytes))
+                self.blocks.append(block)
+                block.buf[:data.nbytes] = data
+                self.spec[key] = (block.name, _typecode(values), data.nbytes)
+        except BaseException:
+            self.close()
+            raise
+
+    @staticmethod
+    def attach(spec: Dict[str, Tuple[str, str, int]]) -> Tuple[List[shared_memory.SharedMemory], Dict[str, memoryview]]:
+
+        blocks = []
+        views = {}
+        for key, (name, typecode, size) in spec.items():
+            block = shared_memory.SharedMemory(name=name)
+            blocks.append(block)
+            views[key] = block.buf[:size].cast(typecode)
+
+        return blocks, views
+
+    def close(self):
+
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = []
+
+    def __enter__(self) -> 'SharedGraph':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def _init_worker(arrays: Dict[str, Sequence[int]], with_closure: bool, blocks: List = None):
+
+    _worker.clear()
+    _worker.update(arrays)
+    _worker['graph'] = _SharedCSR(arrays['offsets'], arrays['targets'])
+    _worker['with_closure'] = with_closure
+    _worker['cycles'] = {}
+    # Блоки храним, пока живы представления на их буферах
+    _worker['blocks'] = blocks
+
+
+def _attach_worker(spec: Dict[str, Tuple[str, str, int]], with_closure: bool):
+
+    blocks, views = SharedGraph.attach(spec)
+    _init_worker(views, with_closure, blocks)
+
+
+def _cycle_through(node: int) -> List[int]:
+    # Кратчайший цикл через узел зависит только от узла, а не от корня обхода
+
+    cycles = _worker['cycles']
+    cycle = cycles.get(node)
+    if cycle is None:
+        component = _Component(_worker['component_of'], _worker['component_of'][node])
+        cycle = cycles[node] = DependencyGraph._representative_cycle(_worker['graph'], node, component,
+                                                                     _worker['excluded'])
+
+    return cycle
+
+
+def _analyze_root(root: int) -> ClosureRecord:
+
+    offsets, targets, excluded = _worker['offsets'], _worker['targets'], _worker['excluded']
+    component_of, cyclic = _worker['component_of'], _worker['cyclic']
+
+    levels = {root: 0}
+    order = [root]
+    for node in order:
+        level = levels[node] + 1
+        for k in range(offsets[node], offsets[node + 1]):
+            dep = targets[k]
+            if dep not in levels and not excluded[dep]:
+                levels[dep] = level
+                order.append(dep)
+
+    # Циклы в порядке первого появления компоненты в обходе, как в bfs_traversal
+    seen = set()
+    cycles = []
+    for node in order:
+        component_id = component_of[node]
+        if cyclic[component_id] and component_id not in seen:
+            seen.add(component_id)
+            cycles.append(_cycle_through(node))
+
+    # С --only в записи попадают только подходящие пакеты; порядок обхода сохраняется
+    hidden = _worker.get('hidden')
+    if hidden is not None:
+        order = [node for node in order if node == root or not hidden[node]]
+
+    closure = order[1:] if _worker['with_closure'] else None
+    return root, len(order) - 1, levels[order[-1]], cycles, closure
+
+
+def _analyze_shard(roots: List[int]) -> List[ClosureRecord]:
+
+    return [_analyze_root(root) for root in roots]
+
+
+class ClosureAnalyzer:
+    """
+    Замыкания и циклы для множества корней. Компоненты сильной связности считаются один раз
+    в основном процессе, корни делятся на части между процессами, каждый процесс обходит
+    граф из общей памяти; результаты сливаются в исходном порядке корней
+    """
+
+    def __init__(self, compact: CompactGraph, filter_substring: FilterSpec = None):
+        self.compact = compact
+        node_count = compact.node_count
+
+        # Обход отсекают только шаблоны exclude, --only (hidden) применяется к записям
+        package_filter = compile_filter(filter_substring)
+        pruning = package_filter.pruning() if package_filter else None
+        self.excluded = pruning.mask(compact) if pruning else bytearray(node_count)
+        self.hidden = package_filter.mask(compact) if package_filter and package_filter.include else None
+
+        components = DependencyGraph._scc_ids(compact, range(node_count), self.excluded)
+        self.component_of = array('i', [0]) * node_count
+        self.cyclic = bytearray(max(1, len(components)))
+        for component_id, component in enumerate(components):
+            for node in component:
+                self.component_of[node] = component_id
+            if len(component) > 1 or component[0] in compact.successors(component[0]):
+                self.cyclic[component_id] = 1
+
+    def roots(self, packages: Iterable[str] = None) -> List[int]:
+        """id корней: заданные пакеты (фильтру не подлежат) или все неотфильтрованные пакеты с записью в графе"""
+
+        compact = self.compact
+        if packages is not None:
+            candidates = (compact.id_of(package) for package in packages)
+            return [node for node in candidates if node is not None and compact.has_entry[node]]
+
+        hidden = self.hidden if self.hidden is not None else self.excluded
+        return [node for node in range(compact.node_count) if compact.has_entry[node] and not hidden[node]]
+
+    def _arrays(self) -> Dict[str, Sequence[int]]:
+
+        arrays = {'offsets': self.compact.offsets, 'targets': self.compact.targets, 'excluded': self.excluded,
+                  'component_of': self.component_of, 'cyclic': self.cyclic}
+        if self.hidden is not None:
+            arrays['hidden'] = self.hidden
+
+        return arrays
+
+    def analyze(self, roots: List[int], workers: int = 1, with_closure: bool = False,
+                chunk_size: int = None) -> Iterator[ClosureRecord]:
+
+        if chunk_size is None:
+            # Мелкие части выравнивают нагрузку: размеры замыканий сильно различаются
+            chunk_size = max(1, min(256, len(roots) // (workers * 16)))
+        shards = [roots[i:i + chunk_size] for i in range(0, len(roots), chunk_size)]
+
+        if workers <= 1:
+            _init_worker(self._arrays(), with_closure)
+            try:
+                for shard in shards:
+                    yield from _analyze_shard(shard)
+            finally:
+                _worker.clear()
+            return
+
+        with SharedGraph(self._arrays()) as shared:
+            with multiprocessing.Pool(workers, initializer=_attach_worker,
+                                      initargs=(shared.spec, with_closure)) as pool:
+                for records in pool.imap(_analyze_shard, shards):
+                    yield from records
+
+    def records(self, packages: Iterable[str] = None, workers: int = 1,
+                with_closure: bool = False) -> Iterator[Dict[str, Any]]:
+        """Записи отчёта по именам пакетов: число зависимостей, глубина, циклы и (по запросу) замыкание"""
+
+        names = self.compact.names
+        for root, count, depth, cycles, closure in self.analyze(self.roots(packages), workers, with_closure):
+            record = {
+                'package': names[root],
+                'dependencies': count,
+                'depth': depth,
+                'cycles': [[names[node] for node in cycle] for cycle in cycles]
+            }
+            if closure is not None:
+                record['closure'] = [names[node] for node in closure]
+            yield record
+
+
+def analyze_closures(graph: DependencyGraph, packages: Iterable[str] = None, filter_substring: FilterSpec = None,
+                     workers: int = 1, with_closure: bool = False) -> Iterator[Dict[str, Any]]:
+
+    return ClosureAnalyzer(graph.compact(), filter_substring).records(packages, workers, with_closure)
@@ -0,0 +1,246 @@
+import email.utils
+import http.client
+import random
+import threading
+import time
+import urllib.error
+from typing import Callable, Optional, TypeVar
+
+T = TypeVar('T')
+
+# Ответы, которые стоит повторить; 429 и 503 - признак перегрузки, по ним снижается параллельность
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+OVERLOAD_STATUSES = frozenset({429, 503})
+
+# Сетевые ошибки, после которых запрос можно повторить (HTTPError проверяется отдельно)
+_TRANSIENT_ERRORS = (urllib.error.URLError, http.client.HTTPException, ConnectionError, TimeoutError)
+
+
+class RegistryUnavailable(Exception):
+    """Реестр не ответил после всех повторов; пакет нельзя считать пакетом без зависимостей"""
+
+
+def parse_retry_after(value: Optional[str], now: float = None) -> Optional[float]:
+    """Retry-After в секундах: число секунд или HTTP-дата; None, если заголовка нет или он некорректен"""
+
+    if not value:
+        return None
+
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+
+    try:
+        moment = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if moment is None:
+        return None
+
+    return max(0.0, moment.timestamp() - (time.time() if now is None else now))
+
+
+class TokenBucket:
+    """
+    Ограничение частоты: rate запросов в секунду, до burst подряд. Нехватка токена
+    резервируется (счёт уходит в минус), поэтому ожидающие потоки обслуживаются по очереди
+    """
+
+    def __init__(self, rate: float, burst: int = None, clock: Callable[[], float] = time.monotonic):
+        if rate <= 0:
+            raise ValueError("rate must be > 0")
+
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1, int(rate))
+        self.tokens = float(self.burst)
+        self._clock = clock
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Забрать токен; возвращает, сколько секунд нужно подождать до его появления"""
+
+        with self._lock:
+            now = self._clock()
+            self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self.tokens -= 1
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+
+class AdaptiveLimit:
+    """
+    AIMD-ограничение числа запросов в полёте: каждый успешный ответ добавляет 1/limit
+    (около +1 за окно из limit ответов), перегрузка (429, 503, задержка выше latency_target)
+    уменьшает предел в decrease раз, но не чаще раза за время одного ответа
+    """
+
+    def __init__(self, maximum: int = None, minimum: int = 1, latency_target: float = None,
+                 decrease: float = 0.5, clock: Callable[[], float] = time.monotonic):
+        # Без maximum предел неизвестен до первой перегрузки: тогда он берётся по числу запросов в полёте
+        self.maximum = maximum
+        self.minimum = minimum
+        self.latency_target = latency_target
+        self.decrease = decrease
+        self.limit: Optional[float] = float(maximum) if maximum else None
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.decreases = 0
+        self._clock = clock
+        self._last_decrease = float('-inf')
+        self._condition = threading.Condition()
+
+    def acquire(self):
+
+        with self._condition:
+            while self.limit is not None and self.in_flight >= int(self.limit):
+                self._condition.wait()
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def release(self, latency: float, answered: bool = True, overloaded: bool = False):
+        # answered=False - ответа нет (сбой сети, 5xx): предел не меняется
+
+        with self._condition:
+            self.in_flight -= 1
+            if answered and self.latency_target is not None and latency > self.latency_target:
+                overloaded = True
+
+            if overloaded:
+                self._decrease(latency)
+            elif answered and self.limit is not None:
+                # Растём не выше пика: пул потоков всё равно не даст больше запросов
+                ceiling = self.maximum or self.peak_in_flight + 1
+                self.limit = min(ceiling, self.limit + 1 / self.limit)
+
+            self._condition.notify_all()
+
+    def _decrease(self, latency: float):
+        # Ответы одной волны перегрузки приходят почти одновременно: снижаем один раз
+
+        now = self._clock()
+        if now - self._last_decrease < latency:
+            return
+
+        current = self.limit if self.limit is not None else self.in_flight + 1
+        self.limit = max(float(self.minimum), current * self.decrease)
+        self._last_decrease = now
+        self.decreases += 1
+
+
+class RequestScheduler:
+    """
+    Планировщик запросов к реестру: ограничение частоты (TokenBucket), адаптивная параллельность
+    (AdaptiveLimit) и повторы с экспоненциальной задержкой и jitter. Retry-After соблюдается
+    (не дольше max_delay) и приостанавливает все запросы, а не только повторяемый
+    """
+
+    def __init__(self, rate: float = None, burst: int = None, max_concurrency: int = None,
+                 max_retries: int = 5, base_delay: float = 0.25, max_delay: float = 30.0,
+                 latency_target: float = None, seed: int = None,
+                 sleep: Callable[[float], None] = time.sleep, clock: Callable[[], float] = time.monotonic):
+        if max_retries < 0:
+            raise ValueError("max_retries must be >= 0")
+
+        self.bucket = TokenBucket(rate, burst, clock) if rate else None
+        self.limiter = AdaptiveLimit(max_concurrency, latency_target=latency_target, clock=clock)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.attempts = 0
+        self.retries = 0
+        self.throttled = 0
+        self.server_errors = 0
+        self._random = random.Random(seed)
+        self._sleep = sleep
+        self._clock = clock
+        self._resume_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def concurrency_limit(self) -> Optional[int]:
+
+        limit = self.limiter.limit
+        return int(limit) if limit is not None else None
+
+    def backoff(self, attempt: int, retry_after: float = None) -> float:
+        """Задержка перед повтором attempt (с 1): половина экспоненты плюс случайная половина"""
+
+        ceiling = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        with self._lock:
+            delay = ceiling / 2 + self._random.uniform(0, ceiling / 2)
+
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_delay))
+
+        return delay
+
+    def _wait_turn(self):
+        # Общая пауза после Retry-After, затем токен частоты
+
+        while True:
+            with self._lock:
+                pause = self._resume_at - self._clock()
+            if pause <= 0:
+                break
+            self._sleep(pause)
+
+        if self.bucket is not None:
+            wait = self.bucket.reserve()
+            if wait > 0:
+                self._sleep(wait)
+
+    def _pause_all(self, delay: float):
+
+        with self._lock:
+            self._resume_at = max(self._resume_at, self._clock() + delay)
+
+    def call(self, send: Callable[[], T], description: str = 'request') -> T:
+        """
+        Выполнить send с повторами. Ошибки, которые повторять бессмысленно (404 и т.п.),
+        пробрасываются сразу; после max_retries неудачных повторов - RegistryUnavailable
+        """
+
+        attempt = 0
+        while True:
+            self._wait_turn()
+            self.limiter.acquire()
+            started = self._clock()
+            # Ответ, который не нужно повторять (в том числе 404), - обычный ответ реестра
+            answered = True
+            overloaded = False
+            try:
+                with self._lock:
+                    self.attempts += 1
+                return send()
+            except urllib.error.HTTPError as e:
+                if e.code not in RETRY_STATUSES:
+                    raise
+                error = e
+                answered = False
+                overloaded = e.code in OVERLOAD_STATUSES
+                retry_after = parse_retry_after(e.headers.get('Retry-After') if e.headers else None)
+                with self._lock:
+                    if e.code == 429:
+                        self.throttled += 1
+                    else:
+                        self.server_errors += 1
+            except _TRANSIENT_ERRORS as e:
+                error = e
+                answered = False
+                retry_after = None
+            finally:
+                self.limiter.release(self._clock() - started, answered, overloaded)
+
+            attempt += 1
+            reason = f"{error.code} {error.reason}" if isinstance(error, urllib.error.HTTPError) else str(error)
+            if attempt > self.max_retries:
+                raise RegistryUnavailable(f"{description}: gave up after {attempt} attempts ({reason})") from error
+
+            delay = self.backoff(attempt, retry_after)
+            if retry_after is not None:
+                self._pause_all(delay)
+            with self._lock:
+                self.retries += 1
+            print(f"Retry {attempt}/{self.max_retries} for {description} in {delay:.2f}s: {reason}")
+            self._sleep(delay)
@@ -0,0 +1,79 @@
+import cProfile
+import pstats
+import sys
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+PHASES = ('load', 'crawl', 'build', 'snapshot', 'analyze', 'tree', 'render', 'export', 'reverse', 'closure')
+
+
+def peak_rss_mb() -> Optional[float]:
+
+    if resource is None:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux отдаёт килобайты, macOS - байты
+    divisor = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return round(peak / divisor, 2)
+
+
+class RunStats:
+    """Время по фазам конвейера и счётчики; одна фаза может выполняться под cProfile"""
+
+    def __init__(self, profile_phase: str = None):
+        self.phases: Dict[str, float] = {}
+        self.counters: Dict[str, Any] = {}
+        self.profile_phase = profile_phase
+        self.profiler = cProfile.Profile() if profile_phase else None
+        self._started = time.perf_counter()
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        # Повторные вызовы фазы (например, по корню в пакетном режиме) суммируются
+
+        profiled = self.profiler is not None and name == self.profile_phase
+        if profiled:
+            self.profiler.enable()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - started
+            if profiled:
+                self.profiler.disable()
+
+    def count(self, name: str, value: Any = 1):
+
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def set(self, name: str, value: Any):
+
+        self.counters[name] = value
+
+    def report(self) -> Dict[str, Any]:
+
+        return {
+            'total_seconds': round(time.perf_counter() - self._started, 6),
+            'phases': {name: round(seconds, 6) for name, seconds in self.phases.items()},
+            'counters': dict(self.counters),
+            'peak_rss_mb': peak_rss_mb()
+        }
+
+    def dump_profile(self, path: str, limit: int = 25, out=None):
+        """Сохранить профиль фазы в формате pstats и вывести самые дорогие функции"""
+
+        if self.profiler is None:
+            return
+
+        self.profiler.dump_stats(path)
+        stream = out or sys.stderr
+        print(f"\nProfile of phase '{self.profile_phase}' saved: {path}", file=stream)
+        pstats.Stats(path, stream=stream).sort_stats('cumulative').print_stats(limit)
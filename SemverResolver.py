@@ -0,0 +1,283 @@
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+_VERSION = re.compile(
+    r'^\s*[=v]*\s*(0|[1-9]\d*)\.(0|[1-9]\d*)\.(0|[1-9]\d*)'
+    r'(?:-([0-9A-Za-z-]+(?:\.[0-9A-Za-z-]+)*))?(?:\+[0-9A-Za-z-.]+)?\s*$'
+)
+_PARTIAL = re.compile(
+    r'^[=v]*(\*|[xX]|\d+)(?:\.(\*|[xX]|\d+)(?:\.(\*|[xX]|\d+)'
+    r'(?:-([0-9A-Za-z-]+(?:\.[0-9A-Za-z-]+)*))?(?:\+[0-9A-Za-z-.]+)?)?)?$'
+)
+_COMPARATOR = re.compile(r'^(<=|>=|<|>|=|\^|~>|~)?(.*)$')
+_HYPHEN = re.compile(r'^\s*(\S+)\s+-\s+(\S+)\s*$')
+_OPERATOR_SPACE = re.compile(r'(<=|>=|<|>|=|\^|~>|~)\s+')
+
+# (major, minor, patch, prerelease) где prerelease - кортеж идентификаторов
+VersionTuple = Tuple[int, int, int, Tuple]
+Comparator = Tuple[str, VersionTuple]
+
+
+def _prerelease_key(prerelease: Tuple) -> Tuple:
+    # Релиз старше любого пре-релиза; числовые идентификаторы младше строковых
+
+    if not prerelease:
+        return (1,)
+
+    return (0,) + tuple((0, part, '') if isinstance(part, int) else (1, 0, part) for part in prerelease)
+
+
+def _split_prerelease(text: Optional[str]) -> Tuple:
+
+    if not text:
+        return ()
+
+    return tuple(int(part) if part.isdigit() else part for part in text.split('.'))
+
+
+@lru_cache(maxsize=65536)
+def parse_version(text: str) -> Optional[VersionTuple]:
+
+    if not text:
+        return None
+
+    match = _VERSION.match(text)
+    if not match:
+        return None
+
+    major, minor, patch, prerelease = match.groups()
+    return int(major), int(minor), int(patch), _split_prerelease(prerelease)
+
+
+@lru_cache(maxsize=65536)
+def version_key(text: str) -> Tuple:
+    """Ключ сортировки версии по правилам semver"""
+
+    major, minor, patch, prerelease = parse_version(text)
+    return major, minor, patch, _prerelease_key(prerelease)
+
+
+def _key(version: VersionTuple) -> Tuple:
+
+    return version[0], version[1], version[2], _prerelease_key(version[3])
+
+
+def is_exact(spec: Optional[str]) -> bool:
+
+    return spec is not None and parse_version(spec) is not None
+
+
+def _is_wildcard(part: Optional[str]) -> bool:
+
+    return part is None or part in ('*', 'x', 'X')
+
+
+class SemverRange:
+    """Скомпилированный диапазон: объединение (||) наборов примитивных сравнений"""
+
+    def __init__(self, comparator_sets: List[List[Comparator]]):
+        self.comparator_sets = comparator_sets
+
+    @staticmethod
+    def _compare(op: str, version: VersionTuple, bound: VersionTuple) -> bool:
+
+        left, right = _key(version), _key(bound)
+        if op == '<':
+            return left < right
+        if op == '<=':
+            return left <= right
+        if op == '>':
+            return left > right
+        if op == '>=':
+            return left >= right
+        return left == right
+
+    @classmethod
+    def _test_set(cls, comparators: List[Comparator], version: VersionTuple) -> bool:
+
+        for op, bound in comparators:
+            if not cls._compare(op, version, bound):
+                return False
+
+        if not version[3]:
+            return True
+
+        # Пре-релиз подходит, только если в наборе есть пре-релиз той же версии X.Y.Z
+        for _, bound in comparators:
+            if bound[3] and bound[:3] == version[:3]:
+                return True
+
+        return False
+
+    def test(self, text: str) -> bool:
+
+        version = parse_version(text)
+        if version is None:
+            return False
+
+        return any(self._test_set(comparators, version) for comparators in self.comparator_sets)
+
+
+def _parse_partial(text: str) -> Optional[Tuple[Optional[int], Optional[int], Optional[int], Tuple]]:
+
+    match = _PARTIAL.match(text)
+    if not match:
+        return None
+
+    major, minor, patch, prerelease = match.groups()
+    parts = [None if _is_wildcard(part) else int(part) for part in (major, minor, patch)]
+
+    # После первого wildcard остальные части тоже считаются wildcard
+    for i in range(1, 3):
+        if parts[i - 1] is None:
+            parts[i] = None
+
+    return parts[0], parts[1], parts[2], _split_prerelease(prerelease)
+
+
+def _desugar(op: str, text: str) -> Optional[List[Comparator]]:
+    # Перевод ^, ~, x-диапазонов и частичных версий в примитивы <, <=, >, >=, =
+
+    if text in ('', '*', 'x', 'X'):
+        return [] if op in ('', '=', '>=', '<=', '^', '~', '~>') else [('<', (0, 0, 0, (0,)))]
+
+    partial = _parse_partial(text)
+    if partial is None:
+        return None
+
+    major, minor, patch, prerelease = partial
+    low = (major or 0, minor or 0, patch or 0, prerelease)
+
+    if op in ('', '='):
+        if major is None:
+            return []
+        if minor is None:
+            return [('>=', low), ('<', (major + 1, 0, 0, (0,)))]
+        if patch is None:
+            return [('>=', low), ('<', (major, minor + 1, 0, (0,)))]
+        return [('=', low)]
+
+    if op in ('~', '~>'):
+        if major is None:
+            return []
+        if minor is None:
+            return [('>=', low), ('<', (major + 1, 0, 0, (0,)))]
+        return [('>=', low), ('<', (major, minor + 1, 0, (0,)))]
+
+    if op == '^':
+        if major is None:
+            return []
+        if major > 0 or minor is None:
+            return [('>=', low), ('<', (major + 1, 0, 0, (0,)))]
+        if minor > 0 or patch is None:
+            return [('>=', low), ('<', (0, minor + 1, 0, (0,)))]
+        return [('>=', low), ('<', (0, 0, patch + 1, (0,)))]
+
+    if op == '>':
+        if major is None:
+            return [('<', (0, 0, 0, (0,)))]
+        if minor is None:
+            return [('>=', (major + 1, 0, 0, ()))]
+        if patch is None:
+            return [('>=', (major, minor + 1, 0, ()))]
+        return [('>', low)]
+
+    if op == '>=':
+        return [('>=', low)] if major is not None else []
+
+    if op == '<':
+        if major is None:
+            return [('<', (0, 0, 0, (0,)))]
+        if minor is None or patch is None:
+            return [('<', (major, minor or 0, 0, (0,)))]
+        return [('<', low)]
+
+    if op == '<=':
+        if major is None:
+            return []
+        if minor is None:
+            return [('<', (major + 1, 0, 0, (0,)))]
+        if patch is None:
+            return [('<', (major, minor + 1, 0, (0,)))]
+        return [('<=', low)]
+
+    return None
+
+
+def _compile_set(text: str) -> Optional[List[Comparator]]:
+
+    hyphen = _HYPHEN.match(text)
+    if hyphen:
+        low, high = _parse_partial(hyphen.group(1)), _parse_partial(hyphen.group(2))
+        if low is None or high is None:
+            return None
+
+        comparators = _desugar('>=', hyphen.group(1)) or []
+        upper = _desugar('<=', hyphen.group(2))
+        return comparators + (upper or [])
+
+    comparators = []
+    for token in _OPERATOR_SPACE.sub(r'\1', text).split():
+        op, version = _COMPARATOR.match(token).groups()
+        desugared = _desugar(op or '', version)
+        if desugared is None:
+            return None
+        comparators.extend(desugared)
+
+    return comparators
+
+
+@lru_cache(maxsize=4096)
+def compile_range(spec: str) -> Optional[SemverRange]:
+    """Скомпилировать диапазон npm; None для тегов, git-ссылок, алиасов и т.п."""
+
+    if spec is None:
+        return None
+
+    comparator_sets = []
+    for part in spec.split('||'):
+        comparators = _compile_set(part.strip())
+        if comparators is None:
+            return None
+        comparator_sets.append(comparators)
+
+    return SemverRange(comparator_sets)
+
+
+def max_satisfying(versions: Iterable[str], spec: str) -> Optional[str]:
+
+    compiled = compile_range(spec)
+    if compiled is None:
+        return None
+
+    best = None
+    for version in versions:
+        if compiled.test(version) and (best is None or version_key(version) > version_key(best)):
+            best = version
+
+    return best
+
+
+def pick_version(versions: Iterable[str], dist_tags: Dict[str, str], spec: str = None) -> Optional[str]:
+    """
+    Выбрать конкретную версию как npm: тег, затем latest (если подходит под диапазон),
+    затем максимальная подходящая версия
+    """
+
+    latest = dist_tags.get('latest')
+    if not spec:
+        return latest
+
+    if spec in dist_tags:
+        return dist_tags[spec]
+
+    compiled = compile_range(spec)
+    if compiled is None:
+        return None
+
+    if latest and compiled.test(latest):
+        return latest
+
+    return max_satisfying(versions, spec)
@@ -0,0 +1,108 @@
+import sys
+from typing import Dict, List, Optional, TextIO
+
+from PackageFilter import FilterSpec, compile_filter
+
+
+class TreeRenderer:
+    """
+    Потоковый вывод дерева зависимостей: принадлежность к циклам проверяется по заранее
+    построенным множествам, префиксы строк наращиваются от родителя, строки пишутся пачками.
+    В дереве обхода каждый пакет встречается один раз, поэтому узел с пометкой CYCLE
+    тоже раскрывается: иначе пропали бы пакеты, впервые найденные под ним
+    """
+
+    def __init__(self, out: TextIO = None, max_lines: Optional[int] = None, max_children: Optional[int] = None,
+                 buffer_lines: int = 1024):
+        self.out = out if out is not None else sys.stdout
+        self.max_lines = max_lines
+        self.max_children = max_children
+        self.buffer_lines = buffer_lines
+        self.lines_written = 0
+        self.truncated = False
+        self._buffer: List[str] = []
+
+    def _emit(self, line: str):
+
+        self._buffer.append(line)
+        self.lines_written += 1
+        if len(self._buffer) >= self.buffer_lines:
+            self.flush()
+
+    def flush(self):
+
+        if self._buffer:
+            self._buffer.append('')
+            self.out.write('\n'.join(self._buffer))
+            self._buffer = []
+
+    def render(self, root: str, tree: Dict[str, List[str]], cycles: List[List[str]], filter_substring: FilterSpec = None,
+               max_depth: int = 10) -> int:
+
+        # Узел помечается CYCLE, если он входит в цикл, часть которого уже есть на пути от корня:
+        # для каждого цикла храним число его пакетов на текущем пути
+        membership: Dict[str, List[int]] = {}
+        for cycle_id, cycle in enumerate(cycles):
+            for node in set(cycle):
+                membership.setdefault(node, []).append(cycle_id)
+        on_path = [0] * len(cycles)
+        package_filter = compile_filter(filter_substring)
+
+        # (узел, глубина, префикс строки, префикс для детей); узел None - выход из поддерева
+        # или строка "... ещё N" при ограничении числа детей
+        stack = [(root, 0, '', '')]
+        start_lines = self.lines_written
+        # Защита от деревьев с повторами: каждый узел раскрывается не больше одного раза
+        expanded = set()
+
+        while stack:
+            node, depth, prefix, child_prefix = stack.pop()
+
+            if node is None and depth < 0:
+                for cycle_id in membership.get(prefix, ()):
+                    on_path[cycle_id] -= 1
+                continue
+
+            # Корень выводится всегда: фильтр относится к его зависимостям
+            if node is not None and depth and package_filter and package_filter.excluded(node):
+                continue
+
+            # Предел проверяется перед каждой строкой, включая "... N more"
+            if self.max_lines is not None and self.lines_written - start_lines >= self.max_lines:
+                self.truncated = True
+                self._emit(f"... output truncated after {self.max_lines} lines")
+                break
+
+            if node is None:
+                self._emit(prefix)
+                continue
+
+            cycle_ids = membership.get(node, ())
+            is_cycle_node = any(on_path[cycle_id] for cycle_id in cycle_ids)
+            self._emit(prefix + node + (" CYCLE" if is_cycle_node else ""))
+
+            # Если достигли максимальной глубины или узел уже раскрыт, не идем глубже
+            if depth >= max_depth or node in expanded or node not in tree:
+                continue
+            expanded.add(node)
+
+            children = tree[node]
+            hidden = 0
+            if self.max_children is not None and len(children) > self.max_children:
+                hidden = len(children) - self.max_children
+                children = children[:self.max_children]
+
+            for cycle_id in cycle_ids:
+                on_path[cycle_id] += 1
+            stack.append((None, -1, node, ''))
+
+            if hidden:
+                stack.append((None, depth + 1, f"{child_prefix}└── ... {hidden} more", ''))
+            for i, child in enumerate(reversed(children)):
+                if i == 0 and not hidden:
+                    stack.append((child, depth + 1, child_prefix + "└── ", child_prefix + "    "))
+                else:
+                    stack.append((child, depth + 1, child_prefix + "├── ", child_prefix + "│   "))
+
+        self.flush()
+        return self.lines_written - start_lines
@@ -0,0 +1,298 @@
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Tuple
+
+from ConnectionPool import ConnectionPool
+from DependencyGrapf import DependencyGraph
+from MockRegistry import FaultProfile, MockRegistry, packuments_from_graph
+from NPMDependencyFetcher import NPMDependencyFetcher
+from TreeRenderer import TreeRenderer
+from main import build_dependency_graph, build_tree_structure
+
+
+Registry = Dict[str, Dict[str, str]]
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+ROOT = "pkg-0"
+
+
+def _name(index: int) -> str:
+
+    return f"pkg-{index}"
+
+
+def _version_range(rng: random.Random) -> str:
+
+    return f"^{rng.randint(0, 9)}.{rng.randint(0, 20)}.0"
+
+
+def generate_power_law(edges: int, seed: int) -> Registry:
+    # Типичный реестр: у большинства пакетов мало зависимостей, у немногих - десятки,
+    # а популярные листовые пакеты (в конце нумерации) нужны почти всем
+
+    rng = random.Random(seed)
+    count = max(2, edges // 5)
+    registry = {_name(i): {} for i in range(count)}
+
+    # Остовное дерево от корня, чтобы весь граф был достижим
+    for i in range(1, count):
+        registry[_name(rng.randrange(i))][_name(i)] = _version_range(rng)
+
+    added = count - 1
+    while added < edges:
+        source = rng.randrange(count - 1)
+        fan_out = min(50, int(rng.paretovariate(1.2)))
+        for _ in range(fan_out):
+            span = count - 1 - source
+            target = count - 1 - int(span * rng.random() ** 3)
+            dependencies = registry[_name(source)]
+            if _name(target) not in dependencies:
+                dependencies[_name(target)] = _version_range(rng)
+                added += 1
+
+    return registry
+
+
+def generate_deep_chain(edges: int, seed: int) -> Registry:
+    # Длинная цепочка с редкими перескоками вперёд
+
+    rng = random.Random(seed)
+    count = max(2, edges * 9 // 10)
+    registry = {_name(i): {_name(i + 1): _version_range(rng)} for i in range(count - 1)}
+    registry[_name(count - 1)] = {}
+
+    for _ in range(edges - (count - 1)):
+        source = rng.randrange(count - 2)
+        registry[_name(source)][_name(rng.randrange(source + 1, count))] = _version_range(rng)
+
+    return registry
+
+
+def generate_wide_shallow(edges: int, seed: int) -> Registry:
+    # Корень с тысячами прямых зависимостей, каждая тянет несколько общих листьев
+
+    rng = random.Random(seed)
+    width = max(1, edges // 4)
+    leaves = max(1, width // 10)
+    registry = {ROOT: {}}
+
+    for i in range(1, width + 1):
+        registry[ROOT][_name(i)] = _version_range(rng)
+        registry[_name(i)] = {_name(width + 1 + rng.randrange(leaves)): _version_range(rng) for _ in range(3)}
+    for i in range(width + 1, width + 1 + leaves):
+        registry[_name(i)] = {}
+
+    return registry
+
+
+def generate_cycle_clusters(edges: int, seed: int, cluster_size: int = 20) -> Registry:
+    # Плотные кластеры взаимных зависимостей, связанные между собой в DAG
+
+    rng = random.Random(seed)
+    clusters = max(1, edges // (cluster_size * 4))
+    registry = {}
+
+    for cluster in range(clusters):
+        first = cluster * cluster_size
+        members = [_name(first + k) for k in range(cluster_size)]
+        for k, member in enumerate(members):
+            dependencies = {members[(k + 1) % cluster_size]: _version_range(rng)}
+            for _ in range(2):
+                dependencies[rng.choice(members)] = _version_range(rng)
+            registry[member] = dependencies
+
+        # Связь с одним из следующих кластеров
+        if cluster + 1 < clusters:
+            target = rng.randrange(cluster + 1, min(clusters, cluster + 4))
+            registry[members[0]][_name(target * cluster_size)] = _version_range(rng)
+        if cluster + 2 < clusters:
+            registry[members[-1]][_name((cluster + 1) * cluster_size)] = _version_range(rng)
+
+    return registry
+
+
+GENERATORS: Dict[str, Callable[[int, int], Registry]] = {
+    'power_law': generate_power_law,
+    'deep_chain': generate_deep_chain,
+    'wide_shallow': generate_wide_shallow,
+    'cycle_clusters': generate_cycle_clusters,
+}
+
+
+class InMemoryFetcher:
+    # Реестр без сети: измеряется только обход, а не задержки HTTP
+
+    def __init__(self, registry: Registry):
+        self.registry = registry
+
+    def get_dependencies(self, package_name: str, version: str = None) -> Dict[str, str]:
+
+        return dict(self.registry.get(package_name, {}))
+
+    def get_dependency_sets(self, package_name: str, version: str = None) -> Dict[str, Dict[str, str]]:
+
+        return {'prod': self.get_dependencies(package_name, version)}
+
+
+class NullWriter:
+
+    def write(self, text: str):
+        pass
+
+
+def measure(function: Callable[[], Any], memory: bool = True) -> Tuple[Any, float, int]:
+    """Время выполнения и пиковый прирост памяти (tracemalloc замедляет код, поэтому отдельным запуском)"""
+
+    start = time.perf_counter()
+    result = function()
+    seconds = time.perf_counter() - start
+
+    peak = 0
+    if memory:
+        tracemalloc.start()
+        try:
+            function()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    return result, seconds, peak
+
+
+def crawl_mock_registry(registry: Registry, depth_limit: int, faults: FaultProfile,
+                        concurrency: int = 8) -> Dict[str, Dict[str, str]]:
+    # Полный путь выборки: HTTP, gzip, пул соединений, разбор JSON - без внешней сети
+
+    with MockRegistry(packuments_from_graph(registry), faults) as mock:
+        pool = ConnectionPool(max_per_host=concurrency)
+        fetcher = NPMDependencyFetcher(mock.url, connection_pool=pool)
+        try:
+            with contextlib.redirect_stdout(NullWriter()):
+                return build_dependency_graph(fetcher, ROOT, max_depth=depth_limit, concurrency=concurrency)
+        finally:
+            pool.close()
+
+
+def run_case(shape: str, edges: int, seed: int, tree_depth: int, memory: bool = True,
+             registry_faults: FaultProfile = None) -> Dict[str, Dict[str, float]]:
+
+    registry = GENERATORS[shape](edges, seed)
+    depth_limit = len(registry) + 1
+    stages = {}
+
+    def record(stage: str, function: Callable[[], Any]) -> Any:
+        result, seconds, peak = measure(function, memory)
+        stages[stage] = {'seconds': round(seconds, 6), 'peak_mb': round(peak / (1024 * 1024), 3)}
+        return result
+
+    if registry_faults is not None:
+        record('fetch', lambda: crawl_mock_registry(registry, depth_limit, registry_faults))
+
+    crawled = record('crawl', lambda: build_dependency_graph(InMemoryFetcher(registry), ROOT,
+                                                             max_depth=depth_limit, concurrency=8))
+
+    def build() -> DependencyGraph:
+        graph = DependencyGraph()
+        for package, dependencies in crawled.items():
+            graph.add_dependency(package, dependencies)
+        graph.freeze()
+        return graph
+
+    graph = record('build', build)
+    result = record('bfs', lambda: graph.get_transitive_dependencies(ROOT))
+    # tree - построение дерева по готовому графу (запасной путь вывода), bounded - дерево
+    # тем же обходом, ограниченным глубиной вывода
+    tree = record('tree', lambda: build_tree_structure(ROOT, result, None, tree_depth))
+    record('bounded', lambda: graph.get_transitive_dependencies(ROOT, max_depth=tree_depth))
+    record('render', lambda: TreeRenderer(NullWriter()).render(ROOT, tree, result['cycles'], None, tree_depth))
+
+    return stages
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], threshold: float) -> List[str]:
+
+    regressions = []
+    for key, stage in results.items():
+        previous = baseline.get(key)
+        if not previous or previous['seconds'] <= 0:
+            continue
+        # Очень быстрые этапы шумят сильнее порога, их не сравниваем
+        if stage['seconds'] > previous['seconds'] * threshold and stage['seconds'] > 0.01:
+            regressions.append(key)
+
+    return regressions
+
+
+def parse_arguments():
+
+    parser = argparse.ArgumentParser(description='dependency graph benchmarks on synthetic npm-like graphs')
+    parser.add_argument('--shapes', nargs='+', choices=sorted(GENERATORS), default=list(GENERATORS),
+                        help='graph shapes to generate (default: all)')
+    parser.add_argument('--sizes', nargs='+', type=int, default=DEFAULT_SIZES,
+                        help=f'approximate edge counts, up to 1000000 (default: {DEFAULT_SIZES})')
+    parser.add_argument('--seed', type=int, default=42, help='generator seed (default: 42)')
+    parser.add_argument('--tree-depth', type=int, default=10,
+                        help='max depth for tree building and rendering stages (default: 10)')
+    parser.add_argument('--no-memory', action='store_true', help='skip the peak memory run of each stage')
+    parser.add_argument('--mock-registry', action='store_true',
+                        help='also crawl each graph over HTTP from a local mock registry (fetch stage)')
+    parser.add_argument('--latency', type=float, default=0.0, help='mock registry latency per request, seconds')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE,
+                        help='baseline file to compare against (default: benchmark_baseline.json)')
+    parser.add_argument('--save-baseline', action='store_true', help='overwrite the baseline with this run')
+    parser.add_argument('--threshold', type=float, default=1.5,
+                        help='slowdown factor reported as a regression (default: 1.5)')
+
+    return parser.parse_args()
+
+
+def main():
+
+    args = parse_arguments()
+
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f).get('results', {})
+
+    results = {}
+    print(f"{'case':<28} {'stage':<8} {'seconds':>10} {'peak MB':>9} {'baseline':>10}")
+    for shape in args.shapes:
+        for size in args.sizes:
+            faults = FaultProfile(latency=args.latency, seed=args.seed) if args.mock_registry else None
+            stages = run_case(shape, size, args.seed, args.tree_depth, memory=not args.no_memory,
+                              registry_faults=faults)
+            for stage, values in stages.items():
+                key = f"{shape}/{size}/{stage}"
+                results[key] = values
+                previous = baseline.get(key)
+                ratio = f"{values['seconds'] / previous['seconds']:.2f}x" if previous and previous['seconds'] else "-"
+                print(f"{shape + '/' + str(size):<28} {stage:<8} {values['seconds']:>10.4f} "
+                      f"{values['peak_mb']:>9.2f} {ratio:>10}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({'seed': args.seed, 'tree_depth': args.tree_depth, 'python': platform.python_version(),
+                       'results': results}, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"\nBaseline saved: {args.baseline}")
+        return
+
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"\nRegressions (slower than {args.threshold}x baseline):")
+        for key in regressions:
+            print(f"  {key}: {results[key]['seconds']:.4f}s vs {baseline[key]['seconds']:.4f}s")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,12 +2,24 @@ import argparse
 import json
 import sys
 import os
-from collections import deque
 from urllib.parse import urlparse
-from typing import Dict, Any, List
+from contextlib import nullcontext
+from typing import Callable, Dict, Any, Iterable, List, Optional, Tuple, TextIO
 
-from NPMDependencyFetcher import NPMDependencyFetcher
+from NPMDependencyFetcher import DEPENDENCY_FIELDS, DEPENDENCY_KINDS, NPMDependencyFetcher
 from DependencyGrapf import DependencyGraph
+from DependencyCrawler import ConcurrentCrawler, IncrementalCrawler
+from PackumentCache import PackumentCache, DEFAULT_CACHE_DIR
+from ConnectionPool import ConnectionPool
+from GraphSnapshot import save_snapshot, load_snapshot
+from GraphLoader import load_graph
+from DependencyServer import GraphService, serve
+from TreeRenderer import TreeRenderer
+from GraphExporter import FORMATS, export_graph
+from ParallelAnalysis import analyze_closures
+from RequestScheduler import RequestScheduler
+from PackageFilter import FilterSpec, PackageFilter, compile_filter, make_filter
+from RunStats import PHASES, RunStats
 
 
 class DependencyGraphConfig:
@@ -19,15 +31,60 @@ class DependencyGraphConfig:
         self.test_mode = False
         self.package_version = None
         self.filter_substring = None
+        self.exclude_patterns = []
+        self.include_patterns = []
+        self.dependency_kinds = None
         self.errors = []
         self.max_depth = 2
+        self.concurrency = 8
+        self.pool_size = 8
+        self.rate_limit = None
+        self.max_retries = 5
+        self.latency_target = None
+        self.abbreviated = False
+        self.streaming = False
+        self.cache_dir = DEFAULT_CACHE_DIR
+        self.use_cache = True
+        self.cache_ttl = 3600
+        self.offline = False
+        self.state_path = None
+        self.snapshot_path = None
+        self.save_snapshot_path = None
+        self.reachable_only = False
+        self.packages_file = None
+        self.all_packages = False
+        self.workers = None
+        self.closure_lists = False
+        self.serve_address = None
+        self.reverse_package = None
+        self.output_path = None
+        self.output_format = 'ascii'
+        self.stats_path = None
+        self.profile_phase = None
+        self.profile_output = 'profile.pstats'
+        self.max_lines = None
+        self.max_children = None
+        self.max_nodes = None
+        self.refresh_interval = 300
 
     def validate(self) -> bool:
 
         self.errors = []
 
         # Проверка имени пакета
-        if not self.package_name:
+        if self.packages_file:
+            if self.package_name:
+                self.errors.append("you can input either package name or packages file not both")
+            if not os.path.isfile(self.packages_file):
+                self.errors.append(f"Packages file not exists: {self.packages_file}")
+        elif self.all_packages:
+            if self.package_name:
+                self.errors.append("you can input either package name or --all-packages not both")
+            if not self.snapshot_path and not (self.test_mode and self.repository_path):
+                self.errors.append("--all-packages needs an offline graph: --path with --test-mode, or --snapshot")
+            if self.reachable_only:
+                self.errors.append("--all-packages can not be combined with --reachable-only")
+        elif not self.package_name:
             self.errors.append("package name is required")
         elif not isinstance(self.package_name, str) or len(self.package_name.strip()) == 0:
             self.errors.append("package name must be not empty")
@@ -36,9 +93,15 @@ class DependencyGraphConfig:
         if self.repository_url and self.repository_path:
             self.errors.append("you can input either package name or repository url not both")
 
-        if not self.repository_url and not self.repository_path:
+        if not self.repository_url and not self.repository_path and not self.snapshot_path:
             self.errors.append("you must input either package name or repository url")
 
+        if self.snapshot_path and (self.repository_url or self.repository_path):
+            self.errors.append("snapshot can not be combined with repository url or path")
+
+        if self.snapshot_path and not os.path.isfile(self.snapshot_path):
+            self.errors.append(f"Snapshot not exists: {self.snapshot_path}")
+
         # Валидация URL
         if self.repository_url:
             try:
@@ -55,12 +118,92 @@ class DependencyGraphConfig:
             elif not os.path.isfile(self.repository_path):
                 self.errors.append(f"Path is not a file: {self.repository_path}")
 
+        if not isinstance(self.concurrency, int) or self.concurrency < 1:
+            self.errors.append(f"Concurrency must be a positive integer: {self.concurrency}")
+
+        if not isinstance(self.pool_size, int) or self.pool_size < 0:
+            self.errors.append(f"Pool size must be a non-negative integer: {self.pool_size}")
+
+        if self.rate_limit is not None and self.rate_limit <= 0:
+            self.errors.append(f"Rate limit must be positive: {self.rate_limit}")
+
+        if self.max_retries < 0:
+            self.errors.append(f"Max retries must be non-negative: {self.max_retries}")
+
+        if self.latency_target is not None and self.latency_target <= 0:
+            self.errors.append(f"Latency target must be positive: {self.latency_target}")
+
+        if self.offline and not self.use_cache:
+            self.errors.append("offline mode requires the cache, remove --no-cache")
+
+        if self.cache_ttl < 0:
+            self.errors.append(f"Cache TTL must be non-negative: {self.cache_ttl}")
+
+        if self.serve_address and not self.serve_address.startswith('unix:'):
+            port = self.serve_address.rpartition(':')[2]
+            if not port.isdigit() or int(port) > 65535:
+                self.errors.append(f"Serve address must be host:port or unix:/path: {self.serve_address}")
+
+        for name, limit in (('Max lines', self.max_lines), ('Max children', self.max_children),
+                            ('Max nodes', self.max_nodes), ('Workers', self.workers)):
+            if limit is not None and limit < 1:
+                self.errors.append(f"{name} must be a positive integer: {limit}")
+
+        try:
+            self.package_filter()
+        except ValueError as e:
+            self.errors.append(f"Filter error: {e}")
+
+        unknown_kinds = [kind for kind in self.dependency_kinds or [] if kind not in DEPENDENCY_KINDS]
+        if self.dependency_kinds is not None and not self.dependency_kinds:
+            self.errors.append("--include needs at least one dependency kind")
+        elif unknown_kinds:
+            self.errors.append(f"Unknown dependency kinds: {', '.join(unknown_kinds)} "
+                               f"(expected {', '.join(DEPENDENCY_KINDS)})")
+
+        if self.profile_phase and self.profile_phase not in PHASES:
+            self.errors.append(f"Unknown profile phase: {self.profile_phase}")
+
+        if self.output_format not in FORMATS:
+            self.errors.append(f"Unknown output format: {self.output_format}")
+        elif self.output_format != 'ascii' and self.closure_report():
+            self.errors.append("closure report (--all-packages, --workers) is written as JSON Lines "
+                               "and can not be combined with --format")
+
+        if self.refresh_interval < 0:
+            self.errors.append(f"Refresh interval must be non-negative: {self.refresh_interval}")
+
         # Валидация версии пакета
         if self.package_version and not self._validate_version(self.package_version):
             self.errors.append(f"Version format invalid: {self.package_version}")
 
         return len(self.errors) == 0
 
+    def package_filter(self) -> Optional[PackageFilter]:
+        # --filter - прежняя подстрока исключения, добавляется к шаблонам --exclude
+
+        exclude = ([self.filter_substring] if self.filter_substring else []) + list(self.exclude_patterns)
+        return make_filter(tuple(exclude), tuple(self.include_patterns))
+
+    def closure_report(self) -> bool:
+        # Отчёт по замыканиям всех корней вместо дерева: --all-packages или явное число процессов
+
+        return self.all_packages or self.workers is not None
+
+    def crawl_kinds(self) -> Tuple[Optional[List[str]], Optional[List[str]]]:
+        # Без --include обходятся все виды зависимостей на всех уровнях;
+        # с --include, как при npm install, devDependencies берутся только у корней
+
+        if self.dependency_kinds is None:
+            return None, None
+
+        kinds = [kind for kind in self.dependency_kinds if kind != 'dev']
+        # Корень package.json - сам проект: его dev уже отобраны при чтении, перечисленные пакеты - обычные зависимости
+        if self.packages_file and is_manifest(self.packages_file):
+            return kinds, kinds
+
+        return kinds, list(self.dependency_kinds)
+
     def _validate_version(self, version: str) -> bool:
 
         if not version or not isinstance(version, str):
@@ -77,7 +220,38 @@ class DependencyGraphConfig:
             'test_mode': self.test_mode,
             'package_version': self.package_version,
             'filter_substring': self.filter_substring,
-            'max_depth': self.max_depth
+            'exclude_patterns': self.exclude_patterns,
+            'include_patterns': self.include_patterns,
+            'dependency_kinds': self.dependency_kinds,
+            'max_depth': self.max_depth,
+            'concurrency': self.concurrency,
+            'pool_size': self.pool_size,
+            'rate_limit': self.rate_limit,
+            'max_retries': self.max_retries,
+            'latency_target': self.latency_target,
+            'abbreviated': self.abbreviated,
+            'streaming': self.streaming,
+            'cache_dir': self.cache_dir if self.use_cache else None,
+            'cache_ttl': self.cache_ttl,
+            'offline': self.offline,
+            'state_path': self.state_path,
+            'snapshot_path': self.snapshot_path,
+            'save_snapshot_path': self.save_snapshot_path,
+            'reachable_only': self.reachable_only,
+            'all_packages': self.all_packages,
+            'workers': self.workers,
+            'closure_lists': self.closure_lists,
+            'packages_file': self.packages_file,
+            'reverse_package': self.reverse_package,
+            'output_path': self.output_path,
+            'output_format': self.output_format,
+            'stats_path': self.stats_path,
+            'profile_phase': self.profile_phase,
+            'max_lines': self.max_lines,
+            'max_children': self.max_children,
+            'max_nodes': self.max_nodes,
+            'serve_address': self.serve_address,
+            'refresh_interval': self.refresh_interval
         }
 
     def display(self):
@@ -98,15 +272,26 @@ Examples of using:
   python main.py --package requests --url https://pypi.org/simple/
   python main.py --package numpy --path deps.json --test-mode --version 1.21.0
   python main.py --package django --url https://pypi.org/simple/ --filter "security"
+  python main.py --package express --exclude "@types/*" --exclude "re:^eslint" --only "*-parser"
+  python main.py --all-packages --snapshot graph.snap --workers 8 --output closures.jsonl
         '''
     )
 
-    # Обязательные параметры
-    parser.add_argument(
+    # Обязательные параметры: один корень или список корней
+    root_group = parser.add_mutually_exclusive_group(required=True)
+    root_group.add_argument(
         '--package',
-        required=True,
         help='PAckage name'
     )
+    root_group.add_argument(
+        '--packages-file',
+        help='batch mode: file with one package[@version] per line, or a package.json'
+    )
+    root_group.add_argument(
+        '--all-packages',
+        action='store_true',
+        help='closure report for every package of an offline graph (--path --test-mode or --snapshot)'
+    )
 
     # Взаимоисключающие параметры для репозитория
     repo_group = parser.add_mutually_exclusive_group(required=True)
@@ -118,6 +303,11 @@ Examples of using:
         '--path',
         help='path to test package repository',
     )
+    repo_group.add_argument(
+        '--snapshot',
+        dest='snapshot_path',
+        help='binary graph snapshot written earlier with --save-snapshot',
+    )
 
     # Опциональные параметры
     parser.add_argument(
@@ -134,6 +324,31 @@ Examples of using:
         dest='filter_substring',
         help='substring for package filter'
     )
+    parser.add_argument(
+        '--exclude',
+        dest='exclude_patterns',
+        action='append',
+        default=[],
+        metavar='PATTERN',
+        help='skip packages matching a substring, glob or re:regex; repeatable, excluded subtrees are not fetched'
+    )
+    parser.add_argument(
+        '--only',
+        dest='include_patterns',
+        action='append',
+        default=[],
+        metavar='PATTERN',
+        help='keep only packages matching one of these substring, glob or re:regex patterns; repeatable'
+    )
+
+    parser.add_argument(
+        '--include',
+        dest='dependency_kinds',
+        type=lambda value: [kind.strip() for kind in value.split(',') if kind.strip()],
+        metavar='KINDS',
+        help='dependency kinds to crawl: comma-separated prod, peer, optional, dev (dev only for root packages); '
+             'default: all kinds at every level'
+    )
 
     parser.add_argument(
         '--max-depth',
@@ -142,6 +357,154 @@ Examples of using:
         help='maximum depth for dependency traversal (default: 2)'
     )
 
+    parser.add_argument(
+        '--concurrency',
+        type=int,
+        default=8,
+        help='number of parallel registry requests (default: 8)'
+    )
+    parser.add_argument(
+        '--pool-size',
+        type=int,
+        default=8,
+        help='keep-alive connections kept per registry host, 0 disables pooling (default: 8)'
+    )
+    parser.add_argument(
+        '--rate-limit',
+        type=float,
+        help='at most this many registry requests per second'
+    )
+    parser.add_argument(
+        '--max-retries',
+        type=int,
+        default=5,
+        help='retries of a request answered with 429, 5xx or a network error, with jittered backoff (default: 5)'
+    )
+    parser.add_argument(
+        '--latency-target',
+        type=float,
+        help='lower the number of parallel requests when a registry response takes longer than this many seconds'
+    )
+    parser.add_argument(
+        '--abbreviated',
+        action='store_true',
+        help='request abbreviated install metadata instead of full package documents'
+    )
+    parser.add_argument(
+        '--streaming',
+        action='store_true',
+        help='parse package documents incrementally, keeping only the selected version'
+    )
+
+    parser.add_argument(
+        '--cache-dir',
+        default=DEFAULT_CACHE_DIR,
+        help=f'directory of the on-disk registry cache (default: {DEFAULT_CACHE_DIR})'
+    )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='do not read or write the on-disk registry cache'
+    )
+    parser.add_argument(
+        '--cache-ttl',
+        type=float,
+        default=3600,
+        help='seconds a cached package is used without revalidation (default: 3600)'
+    )
+    parser.add_argument(
+        '--offline',
+        action='store_true',
+        help='use only cached registry responses, never hit the network'
+    )
+    parser.add_argument(
+        '--state',
+        dest='state_path',
+        help='crawl state file: revalidate the previous graph and refetch only changed packages'
+    )
+    parser.add_argument(
+        '--save-snapshot',
+        dest='save_snapshot_path',
+        help='write the built graph to a binary snapshot file'
+    )
+    parser.add_argument(
+        '--reachable-only',
+        action='store_true',
+        help='test mode: keep only packages reachable from --package within --max-depth'
+    )
+
+    parser.add_argument(
+        '--reverse',
+        dest='reverse_package',
+        help='list every package in the graph that transitively depends on this package'
+    )
+    parser.add_argument(
+        '--output',
+        dest='output_path',
+        help='write the report to a file instead of stdout'
+    )
+    parser.add_argument(
+        '--format',
+        dest='output_format',
+        choices=FORMATS,
+        default='ascii',
+        help='report format: ascii tree, or a graph export to Graphviz DOT, JSON Lines or Mermaid (default: ascii)'
+    )
+    parser.add_argument(
+        '--max-lines',
+        type=int,
+        help='stop rendering a tree after this many lines'
+    )
+    parser.add_argument(
+        '--max-children',
+        type=int,
+        help='show at most this many children per package, summarizing the rest'
+    )
+    parser.add_argument(
+        '--max-nodes',
+        type=int,
+        help='stop the traversal after visiting this many packages'
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        help='closure report: number of processes sharing the graph (default with --all-packages: CPU count)'
+    )
+    parser.add_argument(
+        '--closure-lists',
+        action='store_true',
+        help='closure report: include the full list of transitive dependencies of every package'
+    )
+    parser.add_argument(
+        '--stats',
+        dest='stats_path',
+        nargs='?',
+        const='-',
+        help='write a JSON report of phase timings and counters to a file, or stdout without a value'
+    )
+    parser.add_argument(
+        '--profile',
+        dest='profile_phase',
+        choices=PHASES,
+        help='run one pipeline phase under cProfile and dump the results'
+    )
+    parser.add_argument(
+        '--profile-output',
+        default='profile.pstats',
+        help='pstats file written by --profile (default: profile.pstats)'
+    )
+    parser.add_argument(
+        '--serve',
+        dest='serve_address',
+        help='run as a query server on host:port or unix:/path/to/socket instead of printing the tree'
+    )
+    parser.add_argument(
+        '--refresh-interval',
+        type=float,
+        default=300,
+        help='server mode: seconds between background graph rebuilds, 0 disables (default: 300)'
+    )
+
     return parser.parse_args()
 
 
@@ -155,75 +518,441 @@ def setup_config(args) -> DependencyGraphConfig:
     config.test_mode = args.test_mode
     config.package_version = args.version
     config.filter_substring = args.filter_substring
+    config.exclude_patterns = args.exclude_patterns
+    config.include_patterns = args.include_patterns
+    config.dependency_kinds = args.dependency_kinds
     config.max_depth = args.max_depth
+    config.concurrency = args.concurrency
+    config.pool_size = args.pool_size
+    config.rate_limit = args.rate_limit
+    config.max_retries = args.max_retries
+    config.latency_target = args.latency_target
+    config.abbreviated = args.abbreviated
+    config.streaming = args.streaming
+    config.cache_dir = args.cache_dir
+    config.use_cache = not args.no_cache
+    config.cache_ttl = args.cache_ttl
+    config.offline = args.offline
+    config.state_path = args.state_path
+    config.snapshot_path = args.snapshot_path
+    config.save_snapshot_path = args.save_snapshot_path
+    config.reachable_only = args.reachable_only
+    config.packages_file = args.packages_file
+    config.all_packages = args.all_packages
+    config.workers = args.workers
+    config.closure_lists = args.closure_lists
+    config.reverse_package = args.reverse_package
+    config.output_path = args.output_path
+    config.output_format = args.output_format
+    config.stats_path = args.stats_path
+    config.profile_phase = args.profile_phase
+    config.profile_output = args.profile_output
+    config.max_lines = args.max_lines
+    config.max_children = args.max_children
+    config.max_nodes = args.max_nodes
+    config.serve_address = args.serve_address
+    config.refresh_interval = args.refresh_interval
 
     return config
 
 
-def fetch_and_display_dependencies(config: DependencyGraphConfig):
+def is_manifest(file_path: str) -> bool:
+    """Файл корней - package.json (объект JSON), а не список пакетов"""
+
+    with open(file_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                return line.lstrip().startswith('{')
+
+    return False
+
+
+def load_root_packages(file_path: str, kinds: Iterable[str] = None) -> List[Tuple[str, Optional[str]]]:
+    """
+    Корни для пакетного режима: package.json (его зависимости видов kinds, по умолчанию всех)
+    или текстовый файл с одним package[@version] в строке
+    """
 
-    # Режим тестирования с файлом
+    with open(file_path, 'r', encoding='utf-8') as f:
+        content = f.read()
+
+    if content.lstrip().startswith('{'):
+        manifest = json.loads(content)
+        roots = {}
+        for kind, field in DEPENDENCY_FIELDS.items():
+            if kinds is not None and kind not in kinds:
+                continue
+            for package, version in manifest.get(field, {}).items():
+                roots.setdefault(package, version)
+        return list(roots.items())
+
+    roots = []
+    seen = set()
+    for line in content.splitlines():
+        line = line.split('#', 1)[0].strip()
+        if not line:
+            continue
+
+        # '@' в начале - часть scoped-имени, а не разделитель версии
+        separator = line.rfind('@')
+        if separator > 0:
+            package, version = line[:separator], line[separator + 1:] or None
+        else:
+            package, version = line, None
+
+        if package not in seen:
+            seen.add(package)
+            roots.append((package, version))
+
+    return roots
+
+
+def resolve_roots(config: DependencyGraphConfig) -> List[Tuple[str, Optional[str]]]:
+
+    if not config.packages_file:
+        return [(config.package_name, config.package_version)]
+
+    try:
+        roots = load_root_packages(config.packages_file, config.dependency_kinds)
+    except (OSError, ValueError) as e:
+        print(f"Unable to read packages file {config.packages_file}: {e}")
+        return []
+
+    if not roots:
+        print(f"No packages in {config.packages_file}")
+
+    return roots
+
+
+class RegistrySession:
+    """
+    Клиент реестра: fetcher с дисковым кэшем, пулом соединений и планировщиком запросов.
+    В режиме сервера один сеанс обслуживает все перестроения графа
+    """
+
+    def __init__(self, config: DependencyGraphConfig):
+        self.cache = PackumentCache(config.cache_dir, ttl=config.cache_ttl) if config.use_cache else None
+        self.pool = ConnectionPool(max_per_host=config.pool_size) if config.pool_size else None
+        # Параллельность запросов начинается с --concurrency и снижается при ответах 429/503
+        self.scheduler = RequestScheduler(rate=config.rate_limit, max_concurrency=config.concurrency,
+                                          max_retries=config.max_retries, latency_target=config.latency_target)
+        self.fetcher = NPMDependencyFetcher(config.repository_url or "https://registry.npmjs.org", cache=self.cache,
+                                            offline=config.offline, connection_pool=self.pool,
+                                            abbreviated=config.abbreviated, streaming=config.streaming,
+                                            scheduler=self.scheduler)
+
+    def close(self):
+
+        if self.cache is not None:
+            self.cache.close()
+        if self.pool is not None:
+            self.pool.close()
+
+
+def load_dependency_graph(config: DependencyGraphConfig, roots: List[Tuple[str, Optional[str]]],
+                          stats: RunStats = None, session: RegistrySession = None) -> Optional[DependencyGraph]:
+
+    stats = stats or RunStats()
+
+    # Снимок открывается через mmap без разбора и построения графа
+    if config.snapshot_path:
+        with stats.phase('load'):
+            return DependencyGraph.from_compact(load_snapshot(config.snapshot_path))
+
+    # Режим тестирования с файлом: JSON или JSON Lines читается потоково прямо в компактный граф
     if config.test_mode and config.repository_path:
-        dependencies_data = load_test_dependencies(config.repository_path)
-        if not dependencies_data:
+        try:
+            reachable_from = [package for package, _ in roots] if config.reachable_only else None
+            with stats.phase('load'):
+                compact = load_graph(config.repository_path, max_depth=config.max_depth, roots=reachable_from,
+                                     package_filter=config.package_filter())
+        except (OSError, ValueError) as e:
+            print(f"Error loading test dependencies: {e}")
+            compact = None
+
+        if not compact:
             print(f"Unable to load dependencies {config.repository_path}")
-            return {}
-    else:
-        # Режим работы с NPM реестром
-        fetcher = NPMDependencyFetcher()
-        dependencies_data = build_dependency_graph(fetcher, config.package_name, config.package_version,
-                                                   max_depth=config.max_depth)
+            return None
+
+        return DependencyGraph.from_compact(compact)
+
+    # Режим работы с NPM реестром; переданный сеанс (сервер) остаётся открытым
+    owned = session is None
+    session = session or RegistrySession(config)
+    fetcher, cache, pool, scheduler = session.fetcher, session.cache, session.pool, session.scheduler
+    kinds, root_kinds = config.crawl_kinds()
+    edge_kinds = {}
+    try:
+        # Все корни обходятся одним BFS с общим fetcher: общий пакет запрашивается один раз
+        with stats.phase('crawl'):
+            dependencies_data = build_dependency_graph(fetcher, roots[0][0], roots[0][1],
+                                                       max_depth=config.max_depth,
+                                                       concurrency=config.concurrency,
+                                                       state_path=config.state_path,
+                                                       extra_roots=roots[1:],
+                                                       package_filter=config.package_filter(),
+                                                       kinds=kinds, root_kinds=root_kinds,
+                                                       edge_kinds=edge_kinds)
+    finally:
+        stats.count('requests', fetcher.network_requests)
+        stats.count('bytes_decoded', fetcher.bytes_received)
+        stats.count('parse_seconds', round(fetcher.parse_seconds, 6))
+        stats.count('memo_hits', fetcher.memo_hits)
+        stats.count('coalesced_requests', fetcher.coalesced_requests)
+        stats.count('retries', scheduler.retries)
+        stats.count('throttled', scheduler.throttled)
+        stats.count('server_errors', scheduler.server_errors)
+        stats.set('concurrency_limit', scheduler.concurrency_limit)
+        if scheduler.retries:
+            print(f"\nRegistry retries: {scheduler.retries} ({scheduler.throttled} throttled, "
+                  f"{scheduler.server_errors} server errors), concurrency limit {scheduler.concurrency_limit}")
+        if cache is not None:
+            stats.count('cache_hits', cache.hits)
+            stats.count('cache_misses', cache.misses)
+            stats.count('cache_revalidated', cache.revalidated)
+        if pool is not None:
+            stats.count('bytes_downloaded', pool.bytes_received)
+            stats.count('connections_opened', pool.connections_opened)
+            stats.count('connections_reused', pool.connections_reused)
+            print(f"\nConnections opened: {pool.connections_opened}, reused: {pool.connections_reused}")
+        if owned:
+            session.close()
 
     if not dependencies_data:
-        print(f"Package {config.package_name} not have dependencies or not found")
-        return {}
+        print(f"Package {', '.join(package for package, _ in roots)} not have dependencies or not found")
+        return None
+
+    if config.packages_file:
+        print(f"\nBatch crawl: {len(roots)} roots, {len(dependencies_data)} distinct packages, "
+              f"{fetcher.network_requests} registry requests")
 
     # Строим граф и получаем транзитивные зависимости
-    graph = DependencyGraph()
-    for package, deps in dependencies_data.items():
-        graph.add_dependency(package, deps)
+    with stats.phase('build'):
+        graph = DependencyGraph()
+        for package, deps in dependencies_data.items():
+            graph.add_dependency(package, deps, edge_kinds.get(package))
 
-    result = graph.get_transitive_dependencies(config.package_name, config.filter_substring)
+        # Исходные словари больше не нужны: переходим к компактному представлению
+        del dependencies_data
+        graph.freeze()
 
-    # Отображаем результаты в виде дерева с ограничением глубины
-    display_dependency_results(config.package_name, result, config.filter_substring, config.max_depth)
+    return graph
 
-    return result
 
+def fetch_and_display_dependencies(config: DependencyGraphConfig):
 
-def build_dependency_graph(fetcher: NPMDependencyFetcher, start_package: str, version: str = None,
-                           max_depth: int = 3) -> Dict[str, Dict[str, str]]:
-    graph = {}
-    visited = set()
-    queue = deque([(start_package, version, 0)])  # (package, version, depth)
+    stats = RunStats(config.profile_phase)
+    try:
+        return run_pipeline(config, stats)
+    finally:
+        if config.stats_path:
+            write_stats(stats, config.stats_path)
+        if config.profile_phase:
+            stats.dump_profile(config.profile_output)
 
-    while queue:
-        current_package, current_version, depth = queue.popleft()
 
-        if current_package in visited:
-            continue
+def write_stats(stats: RunStats, path: str):
 
-        visited.add(current_package)
+    report = json.dumps(stats.report(), indent=2)
+    if path == '-':
+        print(f"\n{report}")
+        return
 
-        # Ограничение глубины для больших графов
-        if depth >= max_depth:
-            graph[current_package] = {}
-            continue
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(report + '\n')
+    print(f"\nStats saved: {path}")
 
-        # Получаем информацию о пакете
-        package_info = fetcher.get_package_info(current_package, current_version)
-        if not package_info:
-            graph[current_package] = {}
-            continue
 
-        # Извлекаем зависимости
-        dependencies = fetcher.extract_dependencies(package_info)
-        graph[current_package] = dependencies
+def run_pipeline(config: DependencyGraphConfig, stats: RunStats):
+
+    # Для --all-packages корни - все пакеты уже готового графа
+    roots = [] if config.all_packages else resolve_roots(config)
+    if not roots and not config.all_packages:
+        return {}
+
+    graph = load_dependency_graph(config, roots, stats)
+    if graph is None:
+        return {}
+
+    compact = graph.compact()
+    stats.set('nodes', compact.node_count)
+    stats.set('edges', compact.edge_count)
+
+    if config.save_snapshot_path and not config.snapshot_path:
+        with stats.phase('snapshot'):
+            save_snapshot(graph.compact(), config.save_snapshot_path, graph.edge_kinds)
+        print(f"\nSnapshot saved: {config.save_snapshot_path}")
+
+    # Отчёт пишется буферизованно в файл или stdout
+    with (open(config.output_path, 'w', encoding='utf-8') if config.output_path else nullcontext(sys.stdout)) as out:
+        if config.reverse_package:
+            with stats.phase('reverse'):
+                dependents = analyze_reverse(config, graph, out)
+            stats.set('dependents', len(dependents))
+            return dependents
+
+        if config.output_format != 'ascii':
+            # Экспорт идёт прямо из графа, без промежуточной структуры дерева
+            with stats.phase('export'):
+                exporter = export_graph(graph, config.output_format, out, [package for package, _ in roots],
+                                        config.package_filter(), config.max_depth)
+            stats.set('exported_nodes', exporter.nodes_written)
+            stats.set('exported_edges', exporter.edges_written)
+            return {'nodes': exporter.nodes_written, 'edges': exporter.edges_written}
+
+        if config.closure_report():
+            packages = None if config.all_packages else [package for package, _ in roots]
+            with stats.phase('closure'):
+                report = write_closure_report(config, graph, packages, out)
+            stats.set('closure_packages', report['packages'])
+            stats.set('workers', report['workers'])
+            return report
+
+        return analyze_roots(config, graph, roots, out, stats)
+
+
+def graph_loader(config: DependencyGraphConfig, roots: List[Tuple[str, Optional[str]]],
+                 session: RegistrySession = None) -> Callable[[], Optional[DependencyGraph]]:
+    """Загрузчик графа для сервера: первый вызов строит граф, каждый следующий перестраивает его через тот же сеанс"""
+
+    loads = 0
+
+    def load() -> Optional[DependencyGraph]:
+        nonlocal loads
+        # Перестроение ревалидирует каждый пакет: иначе в пределах --cache-ttl граф не изменится
+        if session is not None and loads:
+            session.fetcher.start_revalidation()
+        loads += 1
+        return load_dependency_graph(config, roots, session=session)
+
+    return load
+
 
-        # Добавляем зависимости в очередь для обработки
-        for dep_name, dep_version in dependencies.items():
-            if dep_name not in visited and dep_name not in [p[0] for p in queue]:
-                queue.append((dep_name, dep_version, depth + 1))
+def run_server(config: DependencyGraphConfig):
+
+    roots = resolve_roots(config)
+    if not roots:
+        return
+
+    # Клиент реестра (соединения, дисковый кэш, предел параллельности) общий для всех перестроений
+    offline_graph = config.snapshot_path or (config.test_mode and config.repository_path)
+    session = None if offline_graph else RegistrySession(config)
+
+    # Граф строится так же, как в CLI, но остаётся в памяти между запросами
+    service = GraphService(graph_loader(config, roots, session), refresh_interval=config.refresh_interval)
+    try:
+        if not service.load():
+            print("Unable to build dependency graph for server")
+            return
+
+        serve(service, config.serve_address)
+    finally:
+        if session is not None:
+            session.close()
+
+
+def write_closure_report(config: DependencyGraphConfig, graph: DependencyGraph, packages: Optional[List[str]],
+                         out: TextIO = None) -> Dict[str, Any]:
+    """
+    Замыкание и циклы для каждого корня (все пакеты графа, если packages - None) в формате JSON Lines.
+    Корни делятся между процессами, граф передаётся им через общую память
+    """
+
+    out = out or sys.stdout
+    workers = config.workers or os.cpu_count() or 1
+    written = 0
+    cycles = 0
+    for record in analyze_closures(graph, packages, config.package_filter(), workers, config.closure_lists):
+        out.write(json.dumps(record) + '\n')
+        written += 1
+        cycles += bool(record['cycles'])
+
+    print(f"\nClosure report: {written} packages, {cycles} with cycles, {workers} workers")
+
+    return {'packages': written, 'with_cycles': cycles, 'workers': workers}
+
+
+def analyze_reverse(config: DependencyGraphConfig, graph: DependencyGraph, out: TextIO = None) -> Dict[str, int]:
+
+    package_name = config.reverse_package
+    package_filter = config.package_filter()
+    dependents = graph.reverse_dependencies(package_name, package_filter)
+    reverse = graph.reverse_index()
+
+    if not dependents:
+        print(f"\nNo packages depend on {package_name}", file=out)
+        return dependents
+
+    print(f"\nPackages depending on {package_name} ({len(dependents)}):", file=out)
+    print("=" * 50, file=out)
+    for dependent, distance in dependents.items():
+        # Корень - пакет, от которого в графе никто не зависит
+        marker = " (root)" if not reverse.get(dependent) else ""
+        print(f"  {distance:>3}  {dependent}{marker}", file=out)
+
+    if package_filter:
+        print(f"\nFilter: '{package_filter}'", file=out)
+
+    return dependents
+
+
+def analyze_roots(config: DependencyGraphConfig, graph: DependencyGraph, roots: List[Tuple[str, Optional[str]]],
+                  out: TextIO = None, stats: RunStats = None) -> Dict[str, Any]:
+
+    # Один корень - прежний формат результата, несколько - результат по каждому корню
+    if not config.packages_file:
+        return analyze_and_display(config, graph, out=out, stats=stats)
+
+    return {package: analyze_and_display(config, graph, package, out, stats) for package, _ in roots}
+
+
+def analyze_and_display(config: DependencyGraphConfig, graph: DependencyGraph, package_name: str = None,
+                        out: TextIO = None, stats: RunStats = None) -> Dict[str, Any]:
+
+    stats = stats or RunStats()
+    package_name = package_name or config.package_name
+    # Глубина и бюджет узлов ограничивают сам обход; дерево строится тем же проходом
+    with stats.phase('analyze'):
+        result = graph.get_transitive_dependencies(package_name, config.package_filter(),
+                                                   max_depth=config.max_depth, max_nodes=config.max_nodes)
+    stats.count('visited_packages', len(result['dependencies']))
+    stats.count('cycles', len(result['cycles']))
+
+    # Отображаем результаты в виде дерева с ограничением глубины
+    renderer = TreeRenderer(out, max_lines=config.max_lines, max_children=config.max_children)
+    display_dependency_results(package_name, result, config.package_filter(), config.max_depth, renderer, stats)
+    stats.count('lines_rendered', renderer.lines_written)
+
+    return result
+
+
+def build_dependency_graph(fetcher: NPMDependencyFetcher, start_package: str, version: str = None,
+                           max_depth: int = 3, concurrency: int = 8, state_path: str = None,
+                           extra_roots: List[Tuple[str, Optional[str]]] = None,
+                           package_filter: PackageFilter = None, kinds: Iterable[str] = None,
+                           root_kinds: Iterable[str] = None,
+                           edge_kinds: Dict[str, Dict[str, str]] = None) -> Dict[str, Dict[str, str]]:
+
+    # BFS по уровням: все пакеты одного уровня запрашиваются параллельно,
+    # поэтому время обхода зависит от глубины графа, а не от числа узлов
+    options = {'concurrency': concurrency, 'package_filter': package_filter, 'kinds': kinds, 'root_kinds': root_kinds}
+    if state_path:
+        crawler = IncrementalCrawler(fetcher, state_path, **options)
+    else:
+        crawler = ConcurrentCrawler(fetcher, **options)
+
+    roots = [(start_package, version)] + list(extra_roots or [])
+    graph = crawler.crawl_many(roots, max_depth=max_depth)
+
+    # Виды рёбер (dev, peer, optional) возвращаются через переданный словарь
+    if edge_kinds is not None:
+        edge_kinds.update(crawler.edge_kinds)
+
+    if state_path:
+        print(f"\nIncremental crawl: {crawler.reused} reused, {crawler.refetched} refetched "
+              f"({crawler.changed} changed), {crawler.stale} stale")
+    if crawler.skipped:
+        print(f"\nFilter: {crawler.skipped} packages skipped without fetching")
 
     return graph
 
@@ -238,114 +967,89 @@ def load_test_dependencies(file_path: str) -> Dict[str, Dict[str, str]]:
         return {}
 
 
-def display_dependency_results(package_name: str, result: Dict[str, Any], filter_substring: str = None, max_depth: int = 10):
+def display_dependency_results(package_name: str, result: Dict[str, Any], filter_substring: FilterSpec = None,
+                               max_depth: int = 10, renderer: TreeRenderer = None, stats: RunStats = None):
 
+    renderer = renderer or TreeRenderer()
+    stats = stats or RunStats()
+    out = renderer.out
     dependencies = result['dependencies']
     cycles = result['cycles']
+    components = result.get('components', cycles)
 
     if not dependencies or len(dependencies) <= 1:
-        print(f"\nPackage {package_name} not have dependencies")
+        print(f"\nPackage {package_name} not have dependencies", file=out)
         return
 
-    print(f"\nDependencies graph {package_name} (max depth: {max_depth}):")
-    print("=" * 50)
+    print(f"\nDependencies graph {package_name} (max depth: {max_depth}):", file=out)
+    print("=" * 50, file=out)
 
-    # Строим структуру дерева из графа с ограничением глубины
-    tree_structure = build_tree_structure(package_name, result, filter_substring, max_depth)
+    # Дерево уже построено ограниченным обходом; иначе строим его из графа с ограничением глубины
+    with stats.phase('tree'):
+        tree_structure = result.get('tree')
+        if tree_structure is None:
+            tree_structure = build_tree_structure(package_name, result, filter_substring, max_depth)
 
     # Выводим дерево с ограничением глубины
-    print_tree(package_name, tree_structure, cycles, filter_substring, max_depth)
+    with stats.phase('render'):
+        renderer.render(package_name, tree_structure, cycles, filter_substring, max_depth)
 
     if filter_substring:
-        print(f"\nFilter: '{filter_substring}'")
+        print(f"\nFilter: '{filter_substring}'", file=out)
+
+    if result.get('truncated'):
+        print(f"\nTraversal stopped after {len(dependencies)} packages (node budget)", file=out)
 
     if cycles:
-        print(f"\nCycles:")
-        for i, cycle in enumerate(cycles, 1):
-            print(f"  Cycle {i}: {' → '.join(cycle)}")
+        print(f"\nCycles:", file=out)
+        for i, (cycle, component) in enumerate(zip(cycles, components), 1):
+            print(f"  Cycle {i}: {' → '.join(cycle)}", file=out)
+            # Компонента больше представительного цикла: перечисляем все её пакеты
+            if len(component) > len(cycle) - 1:
+                print(f"    component ({len(component)} packages): {', '.join(component)}", file=out)
 
 
-def build_tree_structure(root: str, result: Dict[str, Any], filter_substring: str = None, max_level: int = 10) -> Dict[
-    str, List[str]]:
+def build_tree_structure(root: str, result: Dict[str, Any], filter_substring: FilterSpec = None,
+                         max_level: int = 10) -> Dict[str, List[str]]:
+    # Дерево обхода в ширину по result['graph']: каждый пакет - потомок родителя, первым его обнаружившего.
+    # get_transitive_dependencies строит такое же дерево (result['tree']) прямо во время обхода
 
     graph = result.get('graph', {})
-    tree = {}
-    visited_levels = {}
-
-    stack = [(root, 0)]
+    package_filter = compile_filter(filter_substring)
+    # Обход отсекают только шаблоны exclude, --only применяется к готовому дереву
+    pruning = package_filter.pruning() if package_filter else None
 
-    while stack:
-        current, level = stack.pop()
+    levels = {root: 0}
+    queue = [root]
+    tree = {}
 
+    for current in queue:
+        level = levels[current] + 1
         # Строгое ограничение глубины
-        if level >= max_level:
-            continue
-
-        if current not in tree:
-            tree[current] = []
-
-        if current in graph:
-            for child in graph[current]:
-                # Пропускаем отфильтрованные пакеты
-                if filter_substring and filter_substring.lower() in child.lower():
-                    continue
-
-                # Проверяем, не превышает ли добавление этого ребенка максимальный уровень
-                if child not in visited_levels or visited_levels[child] > level + 1:
-                    if child not in tree[current]:
-                        tree[current].append(child)
-                    visited_levels[child] = level + 1
-                    if level + 1 < max_level:  # строго меньше
-                        stack.append((child, level + 1))
+        if level > max_level:
+            break
+
+        children = []
+        for child in graph.get(current) or {}:
+            # Пропускаем отфильтрованные пакеты
+            if child in levels or (pruning and pruning.excluded(child)):
+                continue
+            levels[child] = level
+            queue.append(child)
+            children.append(child)
+        tree[current] = children
+
+    if package_filter is not None and package_filter.include:
+        return package_filter.shown_tree(root, tree)
 
     return tree
 
 
-def print_tree(root: str, tree: Dict[str, List[str]], cycles: List[List[str]], filter_substring: str = None,
+def print_tree(root: str, tree: Dict[str, List[str]], cycles: List[List[str]], filter_substring: FilterSpec = None,
                max_depth: int = 10):
 
-    def is_in_cycle(node, path):
-
-        for cycle in cycles:
-            if node in cycle and any(n in path for n in cycle):
-                return True
-        return False
-
-    stack = [(root, 0, [], [])]  # (node, depth, prefix_parts, path)
-
-    while stack:
-        current_node, depth, prefix_parts, path = stack.pop()
-
-        if filter_substring and filter_substring.lower() in current_node.lower():
-            continue
+    TreeRenderer().render(root, tree, cycles, filter_substring, max_depth)
 
-        # Проверяем цикл
-        is_cycle_node = is_in_cycle(current_node, path)
-
-        # Строим префикс
-        if depth == 0:
-            print(current_node + (" CYCLE" if is_cycle_node else ""))
-        else:
-            prefix = ""
-            for i, part in enumerate(prefix_parts):
-                if i == len(prefix_parts) - 1:
-                    prefix += "└── " if part else "├── "
-                else:
-                    prefix += "    " if part else "│   "
-            print(f"{prefix}{current_node}" + (" CYCLE" if is_cycle_node else ""))
-
-        # Если достигли максимальной глубины или узел в цикле, не идем глубже
-        if depth >= max_depth or is_cycle_node:
-            continue
-
-        # Добавляем детей
-        if current_node in tree:
-            children = tree[current_node]
-            new_path = path + [current_node]
-
-            for i, child in enumerate(reversed(children)):
-                is_last = (i == 0)  # Поскольку переворачиваем
-                stack.append((child, depth + 1, prefix_parts + [is_last], new_path))
 
 def main():
 
@@ -369,6 +1073,10 @@ def main():
 
         config.display()
 
+        if config.serve_address:
+            run_server(config)
+            return
+
         dependencies = fetch_and_display_dependencies(config)
 
         print("\nExecuted sucessfuly")
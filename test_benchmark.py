@@ -0,0 +1,66 @@
+import unittest
+
+from benchmark import GENERATORS, ROOT, compare, run_case
+from DependencyGrapf import DependencyGraph
+
+
+class TestGenerators(unittest.TestCase):
+
+    def test_seeded_and_sized(self):
+
+        for shape, generate in GENERATORS.items():
+            with self.subTest(shape=shape):
+                registry = generate(2000, 7)
+                self.assertEqual(registry, generate(2000, 7))
+
+                edges = sum(len(dependencies) for dependencies in registry.values())
+                self.assertGreater(edges, 1000)
+                self.assertLess(edges, 3000)
+
+                # Все рёбра ведут в пакеты реестра
+                for dependencies in registry.values():
+                    self.assertTrue(set(dependencies) <= set(registry))
+
+    def test_reachable_from_root(self):
+
+        for shape in ('power_law', 'deep_chain', 'wide_shallow'):
+            with self.subTest(shape=shape):
+                registry = GENERATORS[shape](1000, 1)
+                graph = DependencyGraph()
+                for package, dependencies in registry.items():
+                    graph.add_dependency(package, dependencies)
+
+                self.assertEqual(len(graph.bfs_traversal(ROOT)['dependencies']), len(registry))
+
+    def test_cycle_clusters_have_cycles(self):
+
+        registry = GENERATORS['cycle_clusters'](1000, 1)
+        graph = DependencyGraph()
+        for package, dependencies in registry.items():
+            graph.add_dependency(package, dependencies)
+
+        self.assertTrue(graph.bfs_traversal(ROOT)['components'])
+
+
+class TestBenchmarkRun(unittest.TestCase):
+
+    def test_run_case_reports_every_stage(self):
+
+        stages = run_case('power_law', 500, 3, tree_depth=5)
+
+        self.assertEqual(list(stages), ['crawl', 'build', 'bfs', 'tree', 'bounded', 'render'])
+        for values in stages.values():
+            self.assertGreaterEqual(values['seconds'], 0)
+            self.assertGreaterEqual(values['peak_mb'], 0)
+
+    def test_compare_flags_slow_stages(self):
+
+        baseline = {'a/1/bfs': {'seconds': 0.1}, 'a/1/tree': {'seconds': 0.1}, 'a/1/render': {'seconds': 0.001}}
+        results = {'a/1/bfs': {'seconds': 0.2}, 'a/1/tree': {'seconds': 0.12}, 'a/1/render': {'seconds': 0.005},
+                   'a/2/bfs': {'seconds': 1.0}}
+
+        self.assertEqual(compare(results, baseline, 1.5), ['a/1/bfs'])
+
+
+if __name__ == '__main__':
+    unittest.main()
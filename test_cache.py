@@ -0,0 +1,144 @@
+import shutil
+import tempfile
+import unittest
+import urllib.error
+from unittest.mock import patch, MagicMock
+
+from PackumentCache import PackumentCache
+from NPMDependencyFetcher import NPMDependencyFetcher
+
+
+def make_response(body, etag=None):
+    response = MagicMock()
+    response.status = 200
+    response.read.return_value = body
+    response.headers = {'ETag': etag} if etag else {}
+    return response
+
+
+class TestPackumentCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.cache = PackumentCache(self.cache_dir, ttl=3600)
+
+    def tearDown(self):
+        self.cache.close()
+        shutil.rmtree(self.cache_dir)
+
+    def test_put_and_get(self):
+
+        key = PackumentCache.make_key("https://registry.npmjs.org", "react", "18.2.0")
+        self.cache.put(key, b'{"name": "react"}', etag='"abc"')
+
+        entry = self.cache.get(key)
+
+        self.assertEqual(entry.body, b'{"name": "react"}')
+        self.assertEqual(entry.etag, '"abc"')
+        self.assertTrue(self.cache.is_fresh(entry))
+
+    def test_lru_eviction(self):
+
+        self.cache.max_size = 20
+        self.cache.put("a", b"x" * 10)
+        self.cache.put("b", b"x" * 10)
+        self.cache.get("a")
+        self.cache.put("c", b"x" * 10)
+
+        self.assertIsNotNone(self.cache.get("a"))
+        self.assertIsNone(self.cache.get("b"))
+        self.assertIsNotNone(self.cache.get("c"))
+        self.assertLessEqual(self.cache.size(), 20)
+
+    def test_put_does_not_scan_table(self):
+
+        self.cache.max_size = 1000
+        statements = []
+        self.cache._conn.set_trace_callback(statements.append)
+
+        for i in range(50):
+            self.cache.put(f"k{i}", b"x" * 10)
+        self.cache.put("k0", b"x" * 30)
+
+        # Пока лимит не превышен, запись не считает сумму и не сортирует таблицу
+        self.assertFalse([sql for sql in statements if 'SUM' in sql or 'ORDER BY' in sql])
+        self.assertEqual(self.cache._total, self.cache.size())
+
+        self.cache.put("big", b"x" * 500)
+        self.assertLessEqual(self.cache.size(), 1000)
+        self.assertEqual(self.cache._total, self.cache.size())
+        self.assertIsNotNone(self.cache.get("big"))
+        self.assertIsNone(self.cache.get("k1"))
+
+    def test_put_stream_and_open_body(self):
+
+        body = b'{"name": "big"}' + b' ' * 200000
+        with tempfile.TemporaryFile() as source:
+            source.write(body)
+            self.cache.put_stream("big", source, etag='"v1"')
+
+        entry = self.cache.get("big", with_body=False)
+        self.assertIsNone(entry.body)
+        self.assertEqual(entry.etag, '"v1"')
+        with self.cache.open_body("big") as stored:
+            self.assertEqual(stored.read(), body)
+        self.assertEqual(self.cache._total, len(body))
+        self.assertIsNone(self.cache.open_body("missing"))
+
+    def test_hits_do_not_write(self):
+
+        self.cache.put("a", b"x" * 10)
+        changes = self.cache._conn.total_changes
+
+        for _ in range(10):
+            self.cache.get("a")
+
+        self.assertEqual(self.cache._conn.total_changes, changes)
+
+        # Время доступа не теряется при закрытии
+        self.cache.close()
+        self.cache = PackumentCache(self.cache_dir)
+        accessed = self.cache._conn.execute("SELECT last_access, fetched_at FROM packuments").fetchone()
+        self.assertGreater(accessed[0], accessed[1])
+
+    @patch('urllib.request.urlopen')
+    def test_fresh_entry_skips_network(self, mock_urlopen):
+
+        mock_urlopen.return_value.__enter__.return_value = make_response(b'{"name": "react"}', '"v1"')
+        fetcher = NPMDependencyFetcher(cache=self.cache)
+
+        fetcher.get_package_info('react')
+        result = fetcher.get_package_info('react')
+
+        self.assertEqual(result['name'], 'react')
+        self.assertEqual(mock_urlopen.call_count, 1)
+
+    @patch('urllib.request.urlopen')
+    def test_stale_entry_revalidated_with_etag(self, mock_urlopen):
+
+        mock_urlopen.return_value.__enter__.return_value = make_response(b'{"name": "react"}', '"v1"')
+        fetcher = NPMDependencyFetcher(cache=self.cache)
+        fetcher.get_package_info('react')
+
+        self.cache.ttl = 0
+        mock_urlopen.reset_mock()
+        mock_urlopen.side_effect = urllib.error.HTTPError('url', 304, 'Not Modified', {}, None)
+
+        result = fetcher.get_package_info('react')
+
+        self.assertEqual(result['name'], 'react')
+        request = mock_urlopen.call_args[0][0]
+        self.assertEqual(request.get_header('If-none-match'), '"v1"')
+        self.assertEqual(self.cache.revalidated, 1)
+
+    @patch('urllib.request.urlopen')
+    def test_offline_mode_never_hits_network(self, mock_urlopen):
+
+        fetcher = NPMDependencyFetcher(cache=self.cache, offline=True)
+
+        self.assertIsNone(fetcher.get_package_info('react'))
+        mock_urlopen.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import gzip
+import json
+import threading
+import unittest
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from ConnectionPool import ConnectionPool
+from NPMDependencyFetcher import NPMDependencyFetcher
+
+
+class RegistryHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        name = self.path.strip('/').split('/')[0]
+        if name == 'missing':
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        body = json.dumps({'name': name, 'version': '1.0.0', 'dependencies': {'dep': '^1.0.0'}}).encode()
+        gzipped = 'gzip' in self.headers.get('Accept-Encoding', '')
+        if gzipped:
+            body = gzip.compress(body)
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        if gzipped:
+            self.send_header('Content-Encoding', 'gzip')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestConnectionPool(unittest.TestCase):
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), RegistryHandler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.pool = ConnectionPool(max_per_host=2)
+
+    def tearDown(self):
+        self.pool.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_connections_reused_between_requests(self):
+
+        fetcher = NPMDependencyFetcher(self.url, connection_pool=self.pool)
+
+        for i in range(5):
+            info = fetcher.get_package_info(f"pkg{i}")
+            self.assertEqual(info['name'], f"pkg{i}")
+
+        self.assertEqual(self.pool.connections_opened, 1)
+        self.assertEqual(self.pool.connections_reused, 4)
+
+    def test_gzip_response_decompressed(self):
+
+        fetcher = NPMDependencyFetcher(self.url, connection_pool=self.pool)
+
+        self.assertEqual(fetcher.get_dependencies('react', '1.0.0'), {'dep': '^1.0.0'})
+        self.assertGreater(self.pool.bytes_received, 0)
+
+    def test_http_error_keeps_connection(self):
+
+        with self.assertRaises(urllib.error.HTTPError) as ctx:
+            self.pool.urlopen(urllib.request.Request(f"{self.url}/missing"))
+
+        self.assertEqual(ctx.exception.code, 404)
+        with self.pool.urlopen(urllib.request.Request(f"{self.url}/react")) as response:
+            self.assertEqual(json.loads(response.read())['name'], 'react')
+        self.assertEqual(self.pool.connections_reused, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,261 @@
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from DependencyGrapf import DependencyGraph
+from PackageFilter import PackageFilter
+from main import DependencyGraphConfig, build_dependency_graph, load_root_packages
+
+
+class FakeFetcher:
+    # Реестр в памяти с задержкой, имитирующей сетевой запрос
+
+    def __init__(self, registry, delay=0.0):
+        self.registry = registry
+        self.delay = delay
+        self.requests = []
+        self.lock = threading.Lock()
+
+    def get_dependencies(self, package_name, version=None):
+        time.sleep(self.delay)
+        with self.lock:
+            self.requests.append(package_name)
+        return dict(self.registry.get(package_name, {}))
+
+    def get_dependency_sets(self, package_name, version=None):
+        return {"prod": self.get_dependencies(package_name, version)}
+
+
+REGISTRY = {
+    "A": {"B": "^1.0.0", "C": "^2.0.0"},
+    "B": {"D": "^1.0.0", "E": "^1.0.0"},
+    "C": {"D": "^1.0.0", "F": "^1.0.0"},
+    "D": {"B": "^1.0.0", "G": "^1.0.0"},
+    "E": {"H": "^1.0.0"},
+    "F": {"I": "^1.0.0"},
+    "G": {"A": "^1.0.0"},
+    "H": {},
+    "I": {"J": "^1.0.0"},
+    "J": {}
+}
+
+
+class TestConcurrentCrawler(unittest.TestCase):
+
+    def test_same_graph_as_serial_crawl(self):
+
+        serial = build_dependency_graph(FakeFetcher(REGISTRY), "A", max_depth=3, concurrency=1)
+        parallel = build_dependency_graph(FakeFetcher(REGISTRY), "A", max_depth=3, concurrency=8)
+
+        self.assertEqual(serial, parallel)
+        self.assertEqual(list(serial), list(parallel))
+
+    def test_respects_max_depth(self):
+
+        fetcher = FakeFetcher(REGISTRY)
+        graph = build_dependency_graph(fetcher, "A", max_depth=1)
+
+        self.assertEqual(graph, {"A": REGISTRY["A"], "B": {}, "C": {}})
+        self.assertEqual(fetcher.requests, ["A"])
+
+    def test_each_package_fetched_once(self):
+
+        fetcher = FakeFetcher(REGISTRY)
+        graph = build_dependency_graph(fetcher, "A", max_depth=10)
+
+        self.assertEqual(set(graph), set(REGISTRY))
+        self.assertEqual(sorted(fetcher.requests), sorted(REGISTRY))
+
+    def test_level_is_fetched_in_parallel(self):
+
+        registry = {"root": {f"dep{i}": "1.0.0" for i in range(8)}}
+        fetcher = FakeFetcher(registry, delay=0.1)
+
+        start = time.perf_counter()
+        build_dependency_graph(fetcher, "root", max_depth=2, concurrency=8)
+        elapsed = time.perf_counter() - start
+
+        # Два уровня по ~0.1с, а не девять последовательных запросов
+        self.assertLess(elapsed, 0.6)
+
+
+class TestBatchCrawl(unittest.TestCase):
+
+    def test_shared_packages_fetched_once(self):
+
+        fetcher = FakeFetcher(REGISTRY)
+        graph = build_dependency_graph(fetcher, "E", max_depth=10, extra_roots=[("C", None), ("F", None)])
+
+        # Поддеревья E, C и F пересекаются, но каждый пакет запрошен один раз
+        self.assertEqual(set(graph), set(REGISTRY))
+        self.assertEqual(sorted(fetcher.requests), sorted(REGISTRY))
+
+    def test_depth_counted_from_nearest_root(self):
+
+        fetcher = FakeFetcher(REGISTRY)
+        graph = build_dependency_graph(fetcher, "A", max_depth=1, extra_roots=[("F", None)])
+
+        self.assertEqual(graph, {"A": REGISTRY["A"], "F": REGISTRY["F"], "B": {}, "C": {}, "I": {}})
+        self.assertEqual(fetcher.requests, ["A", "F"])
+
+    def test_duplicate_roots(self):
+
+        fetcher = FakeFetcher(REGISTRY)
+        build_dependency_graph(fetcher, "E", max_depth=3, extra_roots=[("E", None), ("H", None)])
+
+        self.assertEqual(sorted(fetcher.requests), ["E", "H"])
+
+
+class TestFilterPushdown(unittest.TestCase):
+
+    def test_excluded_subtrees_not_fetched(self):
+
+        fetcher = FakeFetcher(REGISTRY)
+        build_dependency_graph(fetcher, "A", max_depth=10, package_filter=PackageFilter(exclude=["c"]))
+
+        # F, I и J достижимы только через C
+        self.assertEqual(sorted(fetcher.requests), ["A", "B", "D", "E", "G", "H"])
+
+    def test_same_result_as_filtering_after_crawl(self):
+
+        package_filter = PackageFilter(exclude=["re:^[dg]$"])
+        pruned = DependencyGraph()
+        for package, dependencies in build_dependency_graph(FakeFetcher(REGISTRY), "A", max_depth=10,
+                                                            package_filter=package_filter).items():
+            pruned.add_dependency(package, dependencies)
+        full = DependencyGraph()
+        for package, dependencies in REGISTRY.items():
+            full.add_dependency(package, dependencies)
+
+        self.assertEqual(pruned.bfs_traversal("A", package_filter), full.bfs_traversal("A", package_filter))
+
+    def test_excluded_root_still_crawled(self):
+
+        fetcher = FakeFetcher(REGISTRY)
+        graph = build_dependency_graph(fetcher, "A", max_depth=10, package_filter=PackageFilter(exclude=["a", "d"]))
+
+        self.assertEqual(graph["A"], REGISTRY["A"])
+        self.assertEqual(sorted(fetcher.requests), ["A", "B", "C", "E", "F", "H", "I", "J"])
+
+    def test_only_not_pushed_down(self):
+
+        # H лежит под неподходящими A, B и E: шаблоны --only обход не отсекают
+        fetcher = FakeFetcher(REGISTRY)
+        graph = build_dependency_graph(fetcher, "A", max_depth=10, package_filter=PackageFilter(include=["h"]))
+
+        self.assertEqual(graph, REGISTRY)
+
+
+class TypedFetcher(FakeFetcher):
+    # Реестр {package: {kind: {dep: range}}}
+
+    def get_dependency_sets(self, package_name, version=None):
+        with self.lock:
+            self.requests.append(package_name)
+        return {kind: dict(dependencies) for kind, dependencies in self.registry.get(package_name, {}).items()}
+
+
+TYPED_REGISTRY = {
+    "app": {"prod": {"lib": "^1.0.0"}, "dev": {"jest": "^29.0.0"}},
+    "lib": {"prod": {"util": "^1.0.0"}, "dev": {"mocha": "^10.0.0"}, "peer": {"react": ">=16"}},
+    "jest": {"prod": {"expect": "^29.0.0"}},
+    "util": {},
+    "react": {},
+    "expect": {},
+    "mocha": {"prod": {"chai": "^4.0.0"}},
+    "chai": {}
+}
+
+
+class TestDependencyKinds(unittest.TestCase):
+
+    def test_all_kinds_by_default(self):
+
+        fetcher = TypedFetcher(TYPED_REGISTRY)
+        build_dependency_graph(fetcher, "app", max_depth=10)
+
+        self.assertEqual(sorted(fetcher.requests), sorted(TYPED_REGISTRY))
+
+    def test_production_crawl(self):
+
+        fetcher = TypedFetcher(TYPED_REGISTRY)
+        graph = build_dependency_graph(fetcher, "app", max_depth=10, kinds=["prod"])
+
+        self.assertEqual(graph, {"app": {"lib": "^1.0.0"}, "lib": {"util": "^1.0.0"}, "util": {}})
+        self.assertEqual(sorted(fetcher.requests), ["app", "lib", "util"])
+
+    def test_dev_only_for_roots(self):
+
+        fetcher = TypedFetcher(TYPED_REGISTRY)
+        edge_kinds = {}
+        graph = build_dependency_graph(fetcher, "app", max_depth=10, kinds=["prod", "peer"],
+                                       root_kinds=["prod", "peer", "dev"], edge_kinds=edge_kinds)
+
+        # devDependencies библиотеки (mocha) не устанавливаются и не запрашиваются
+        self.assertEqual(set(graph), {"app", "lib", "jest", "expect", "util", "react"})
+        self.assertEqual(edge_kinds, {"app": {"jest": "dev"}, "lib": {"react": "peer"}})
+
+
+class TestLoadRootPackages(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def write(self, name, content):
+        path = os.path.join(self.temp_dir.name, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        return path
+
+    def test_text_file(self):
+
+        path = self.write("roots.txt", "express\n# comment\nlodash@4.17.21\n\n@types/node@^20.0.0\n@scope/pkg\nexpress\n")
+
+        self.assertEqual(load_root_packages(path), [
+            ("express", None), ("lodash", "4.17.21"), ("@types/node", "^20.0.0"), ("@scope/pkg", None)
+        ])
+
+    def test_package_json(self):
+
+        path = self.write("package.json", json.dumps({
+            "name": "service",
+            "dependencies": {"express": "^4.18.0"},
+            "devDependencies": {"jest": "^29.0.0", "express": "^5.0.0"}
+        }))
+
+        self.assertEqual(load_root_packages(path), [("express", "^4.18.0"), ("jest", "^29.0.0")])
+
+    def test_package_json_kinds(self):
+
+        path = self.write("package.json", json.dumps({
+            "dependencies": {"jest": "^29.0.0"},
+            "devDependencies": {"lib": "^1.0.0"},
+            "peerDependencies": {"react": ">=16"}
+        }))
+
+        self.assertEqual(load_root_packages(path, ["prod"]), [("jest", "^29.0.0")])
+
+        config = DependencyGraphConfig()
+        config.packages_file = path
+        config.dependency_kinds = ["prod", "dev"]
+        roots = load_root_packages(path, config.dependency_kinds)
+        kinds, root_kinds = config.crawl_kinds()
+
+        fetcher = TypedFetcher(TYPED_REGISTRY)
+        graph = build_dependency_graph(fetcher, roots[0][0], roots[0][1], max_depth=10, extra_roots=roots[1:],
+                                       kinds=kinds, root_kinds=root_kinds)
+
+        # Проект - сам package.json: devDependency lib устанавливается, но dev самой lib (mocha) - нет
+        self.assertEqual(roots, [("jest", "^29.0.0"), ("lib", "^1.0.0")])
+        self.assertEqual(set(graph), {"jest", "expect", "lib", "util"})
+        self.assertNotIn("mocha", fetcher.requests)
+
+
+if __name__ == '__main__':
+    unittest.main()
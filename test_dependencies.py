@@ -3,9 +3,13 @@
 Тесты для проверки функциональности получения зависимостей
 """
 
+import threading
+import time
 import unittest
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import patch, MagicMock
 from main import NPMDependencyFetcher
+from NPMDependencyFetcher import merge_dependency_sets
 
 
 class TestNPMDependencyFetcher(unittest.TestCase):
@@ -54,6 +58,90 @@ class TestNPMDependencyFetcher(unittest.TestCase):
 
         self.assertEqual(len(dependencies), 0)
 
+    @patch('urllib.request.urlopen')
+    def test_get_dependencies_memoized(self, mock_urlopen):
+
+        mock_response = MagicMock()
+        mock_response.status = 200
+        mock_response.read.return_value = b'{"name": "react", "version": "18.2.0", "dependencies": {"a": "1"}}'
+        mock_urlopen.return_value.__enter__.return_value = mock_response
+
+        first = self.fetcher.get_dependencies('react', '18.2.0')
+        second = self.fetcher.get_dependencies('react', '18.2.0')
+
+        self.assertEqual(first, {'a': '1'})
+        self.assertEqual(first, second)
+        self.assertEqual(mock_urlopen.call_count, 1)
+        self.assertEqual(self.fetcher.memo_hits, 1)
+
+    def test_concurrent_requests_coalesced(self):
+
+        calls = []
+        release = threading.Event()
+
+        def slow_get_package_info(package_name, version=None):
+            calls.append(package_name)
+            release.wait(1)
+            return {'version': '1.0.0', 'dependencies': {'b': '^1.0.0'}}
+
+        self.fetcher.get_package_info = slow_get_package_info
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            futures = [executor.submit(self.fetcher.get_dependencies, 'a', '1.0.0') for _ in range(4)]
+            time.sleep(0.1)
+            release.set()
+            results = [f.result() for f in futures]
+
+        self.assertEqual(calls, ['a'])
+        self.assertTrue(all(r == {'b': '^1.0.0'} for r in results))
+        self.assertEqual(self.fetcher.coalesced_requests, 3)
+
+    def test_extract_dependencies_uses_given_version(self):
+
+        package_info = {
+            'dist-tags': {'latest': '2.0.0'},
+            'versions': {
+                '1.0.0': {'dependencies': {'old': '^1.0.0'}},
+                '2.0.0': {'dependencies': {'new': '^2.0.0'}}
+            }
+        }
+
+        self.assertEqual(self.fetcher.extract_dependencies(package_info, '1.0.0'), {'old': '^1.0.0'})
+        self.assertEqual(self.fetcher.extract_dependencies(package_info), {'new': '^2.0.0'})
+
+    def test_dependency_kinds(self):
+
+        package_info = {
+            'version': '1.0.0',
+            'dependencies': {'a': '^1.0.0', 'b': '^1.0.0'},
+            'devDependencies': {'jest': '^29.0.0'},
+            'peerDependencies': {'react': '>=16'},
+            'optionalDependencies': {'b': '^1.1.0'}
+        }
+
+        self.assertEqual(self.fetcher.extract_dependencies(package_info, kinds=['prod']),
+                         {'a': '^1.0.0', 'b': '^1.0.0'})
+        self.assertEqual(set(self.fetcher.extract_dependencies(package_info)), {'a', 'b', 'jest', 'react'})
+
+        dependencies, edge_kinds = merge_dependency_sets(self.fetcher.extract_dependency_sets(package_info),
+                                                         ['prod', 'peer', 'optional'])
+        self.assertEqual(dependencies, {'a': '^1.0.0', 'b': '^1.1.0', 'react': '>=16'})
+        self.assertEqual(edge_kinds, {'b': 'optional', 'react': 'peer'})
+
+    def test_kind_selection_reuses_memo(self):
+
+        calls = []
+
+        def get_package_info(package_name, version=None):
+            calls.append(package_name)
+            return {'version': '1.0.0', 'dependencies': {'a': '1'}, 'devDependencies': {'b': '1'}}
+
+        self.fetcher.get_package_info = get_package_info
+
+        self.assertEqual(self.fetcher.get_dependencies('x', '1.0.0', kinds=['prod']), {'a': '1'})
+        self.assertEqual(self.fetcher.get_dependencies('x', '1.0.0'), {'a': '1', 'b': '1'})
+        self.assertEqual(calls, ['x'])
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
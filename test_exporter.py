@@ -0,0 +1,105 @@
+import io
+import json
+import unittest
+
+from DependencyGrapf import DependencyGraph
+from GraphExporter import export_graph
+from GraphLoader import load_graph
+
+
+def load_test_repo():
+    return DependencyGraph.from_compact(load_graph('test_repo.json'))
+
+
+def export(format_name, roots=('A',), **kwargs):
+    out = io.StringIO()
+    exporter = export_graph(load_test_repo(), format_name, out, list(roots), **kwargs)
+    return exporter, out.getvalue()
+
+
+class TestGraphExporter(unittest.TestCase):
+
+    def test_jsonl_nodes_and_edges(self):
+
+        exporter, output = export('jsonl')
+        records = [json.loads(line) for line in output.splitlines()]
+
+        nodes = {record['id']: record['depth'] for record in records if record['type'] == 'node'}
+        edges = {(record['from'], record['to']): record['cycle'] for record in records if record['type'] == 'edge'}
+
+        self.assertEqual(nodes, {'A': 0, 'B': 1, 'C': 1, 'D': 2, 'E': 2, 'F': 2, 'G': 3, 'H': 3, 'I': 3, 'J': 4})
+        self.assertEqual(len(edges), 12)
+        self.assertEqual(exporter.edges_written, 12)
+        self.assertEqual({edge for edge, cyclic in edges.items() if cyclic},
+                         {('A', 'B'), ('A', 'C'), ('B', 'D'), ('C', 'D'), ('D', 'B'), ('D', 'G'), ('G', 'A')})
+
+    def test_node_written_before_its_edges(self):
+
+        _, output = export('jsonl')
+        seen = set()
+        for record in map(json.loads, output.splitlines()):
+            if record['type'] == 'node':
+                seen.add(record['id'])
+            else:
+                self.assertIn(record['from'], seen)
+
+    def test_depth_and_filter(self):
+
+        _, output = export('jsonl', max_depth=1, filter_substring='c')
+        records = [json.loads(line) for line in output.splitlines()]
+
+        self.assertEqual([(record['type'], record.get('id') or record['to']) for record in records],
+                         [('node', 'A'), ('edge', 'B'), ('node', 'B')])
+
+    def test_multiple_roots(self):
+
+        _, output = export('jsonl', roots=('E', 'F', 'missing'))
+        nodes = {record['id']: record['depth'] for record in map(json.loads, output.splitlines())
+                 if record['type'] == 'node'}
+
+        self.assertEqual(nodes, {'E': 0, 'F': 0, 'H': 1, 'I': 1, 'J': 2})
+
+    def test_dot(self):
+
+        _, output = export('dot', roots=('G',), max_depth=1)
+
+        self.assertTrue(output.startswith("digraph dependencies {\n"))
+        self.assertIn('"G" [depth=0, tooltip="depth 0", style=bold];', output)
+        self.assertIn('"G" -> "A" [label="^1.0.0", color=red, cycle=true];', output)
+        self.assertTrue(output.endswith("}\n"))
+
+    def test_edge_kinds(self):
+
+        graph = DependencyGraph()
+        graph.add_dependency('app', {'lib': '1.0.0', 'jest': '29.0.0'}, {'jest': 'dev'})
+        out = io.StringIO()
+        export_graph(graph, 'jsonl', out, ['app'])
+        kinds = {record['to']: record['kind'] for record in map(json.loads, out.getvalue().splitlines())
+                 if record['type'] == 'edge'}
+
+        self.assertEqual(kinds, {'lib': 'prod', 'jest': 'dev'})
+
+        out = io.StringIO()
+        export_graph(graph, 'dot', out, ['app'])
+        self.assertIn('"app" -> "jest" [label="29.0.0", style=dashed, kind=dev];', out.getvalue())
+
+    def test_mermaid(self):
+
+        graph = DependencyGraph()
+        graph.add_dependency('root', {'say"hi"': '1.0.0'})
+        out = io.StringIO()
+        export_graph(graph, 'mermaid', out, ['root'])
+
+        self.assertEqual(out.getvalue(), 'graph LR\n'
+                                         '  n0["root<br/>depth 0"]\n'
+                                         '  n0 --> n1\n'
+                                         '  n1["say#quot;hi#quot;<br/>depth 1"]\n')
+
+    def test_unknown_format(self):
+
+        with self.assertRaises(ValueError):
+            export('svg')
+
+
+if __name__ == '__main__':
+    unittest.main()
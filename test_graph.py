@@ -0,0 +1,324 @@
+import json
+import os
+import threading
+import time
+import tracemalloc
+import unittest
+
+from DependencyGrapf import DependencyGraph, CompactGraph, ReachabilityIndex
+
+
+def load_graph(data):
+    graph = DependencyGraph()
+    for package, deps in data.items():
+        graph.add_dependency(package, deps)
+    return graph
+
+
+with open(os.path.join(os.path.dirname(__file__), 'test_repo.json'), encoding='utf-8') as f:
+    TEST_REPO = json.load(f)
+
+
+class TestDependencyGraph(unittest.TestCase):
+
+    def test_levels(self):
+
+        result = load_graph(TEST_REPO).bfs_traversal('A')
+
+        self.assertEqual(result['dependencies'],
+                         {'A': 0, 'B': 1, 'C': 1, 'D': 2, 'E': 2, 'F': 2, 'G': 3, 'H': 3, 'I': 3, 'J': 4})
+
+    def test_cycles_from_components(self):
+
+        result = load_graph(TEST_REPO).bfs_traversal('A')
+
+        self.assertEqual(result['components'], [['A', 'B', 'C', 'D', 'G']])
+        self.assertEqual(result['cycles'], [['A', 'B', 'D', 'G', 'A']])
+
+    def test_filter_breaks_cycle(self):
+
+        result = load_graph(TEST_REPO).bfs_traversal('A', filter_substring='g')
+
+        self.assertNotIn('G', result['dependencies'])
+        self.assertEqual(result['components'], [['B', 'D']])
+        self.assertEqual(result['cycles'], [['B', 'D', 'B']])
+
+    def test_self_loop(self):
+
+        result = load_graph({'A': {'A': '*', 'B': '*'}, 'B': {}}).bfs_traversal('A')
+
+        self.assertEqual(result['cycles'], [['A', 'A']])
+
+    def test_dense_cyclic_graph(self):
+
+        # Полный граф: прежний обход с копированием путей здесь не завершался
+        names = [f"p{i}" for i in range(300)]
+        graph = load_graph({name: {other: '*' for other in names if other != name} for name in names})
+
+        start = time.perf_counter()
+        result = graph.bfs_traversal('p0')
+
+        self.assertLess(time.perf_counter() - start, 2)
+        self.assertEqual(len(result['components']), 1)
+        self.assertEqual(len(result['components'][0]), 300)
+        self.assertEqual(result['cycles'], [['p0', 'p1', 'p0']])
+
+    def test_deep_chain_does_not_recurse(self):
+
+        chain = {f"n{i}": {f"n{i + 1}": '*'} for i in range(20000)}
+        chain['n20000'] = {'n0': '*'}
+
+        result = load_graph(chain).bfs_traversal('n0')
+
+        self.assertEqual(len(result['components'][0]), 20001)
+        self.assertEqual(len(result['cycles'][0]), 20002)
+
+
+
+class TestBoundedTraversal(unittest.TestCase):
+
+    def test_depth_limit_stops_traversal(self):
+
+        result = load_graph(TEST_REPO).bfs_traversal('A', max_depth=2, build_tree=True)
+
+        self.assertEqual(result['dependencies'], {'A': 0, 'B': 1, 'C': 1, 'D': 2, 'E': 2, 'F': 2})
+        self.assertEqual(result['tree'], {'A': ['B', 'C'], 'B': ['D', 'E'], 'C': ['F']})
+        # Цикл через G глубже границы, виден только цикл среди посещённых пакетов
+        self.assertEqual(result['cycles'], [['B', 'D', 'B']])
+        self.assertFalse(result['truncated'])
+
+    def test_node_budget(self):
+
+        result = load_graph(TEST_REPO).bfs_traversal('A', max_nodes=4, build_tree=True)
+
+        self.assertEqual(result['dependencies'], {'A': 0, 'B': 1, 'C': 1, 'D': 2})
+        self.assertEqual(result['tree'], {'A': ['B', 'C'], 'B': ['D']})
+        self.assertTrue(result['truncated'])
+
+    def test_same_as_full_traversal_when_limit_not_reached(self):
+
+        graph = load_graph(TEST_REPO)
+        graph.freeze()
+
+        result = graph.bfs_traversal('A', 'd', max_depth=10)
+
+        self.assertEqual(result, graph.bfs_traversal('A', 'd'))
+
+    def test_bounded_cost_independent_of_graph_size(self):
+
+        def peak_memory(size):
+            # Бинарное дерево с обратными рёбрами: циклы есть и внутри бюджета
+            data = {f"n{i}": {f"n{j}": '*' for j in (2 * i + 1, 2 * i + 2, i // 2) if j < size} for i in range(size)}
+            graph = DependencyGraph.from_compact(CompactGraph.from_dict(data))
+
+            tracemalloc.start()
+            try:
+                result = graph.bfs_traversal('n0', max_nodes=50, build_tree=True)
+                return tracemalloc.get_traced_memory()[1], result
+            finally:
+                tracemalloc.stop()
+
+        small_peak, small = peak_memory(1000)
+        large_peak, large = peak_memory(200000)
+
+        self.assertEqual(small, large)
+        self.assertTrue(large['cycles'])
+        # Массив из int на каждый узел большого графа занял бы 800 КБ
+        self.assertLess(large_peak, small_peak + 64 * 1024)
+
+    def test_tree_matches_build_tree_structure(self):
+
+        from main import build_tree_structure
+
+        graph = load_graph(TEST_REPO)
+        full = graph.get_transitive_dependencies('A')
+        for depth in range(1, 6):
+            with self.subTest(depth=depth):
+                self.assertEqual(graph.get_transitive_dependencies('A', 'e', max_depth=depth)['tree'],
+                                 build_tree_structure('A', full, 'e', depth))
+
+
+class TestCompactGraph(unittest.TestCase):
+
+    def test_round_trip(self):
+
+        compact = CompactGraph.from_dict(TEST_REPO)
+
+        self.assertEqual(compact.to_dict(), TEST_REPO)
+        self.assertEqual(compact.edge_count, sum(len(deps) for deps in TEST_REPO.values()))
+        self.assertEqual(len(compact.range_table), 2)
+
+    def test_leaf_only_packages(self):
+
+        compact = CompactGraph.from_dict({'A': {'B': '^1.0.0'}})
+
+        self.assertIn('A', compact)
+        self.assertNotIn('B', compact)
+        self.assertEqual(compact.node_count, 2)
+        self.assertEqual(list(compact.successors(compact.id_of('B'))), [])
+
+    def test_freeze_keeps_results(self):
+
+        graph = load_graph(TEST_REPO)
+        before = graph.bfs_traversal('A', 'f')
+
+        frozen = graph.freeze()
+
+        self.assertIsInstance(graph.graph, CompactGraph)
+        self.assertIs(frozen, graph.graph)
+        self.assertEqual(graph.bfs_traversal('A', 'f'), before)
+        self.assertEqual(graph.get_transitive_dependencies('A')['graph']['A'], TEST_REPO['A'])
+
+    def test_add_dependency_after_freeze(self):
+
+        graph = load_graph(TEST_REPO)
+        graph.freeze()
+
+        graph.add_dependency('J', {'K': '^1.0.0'})
+
+        self.assertIsInstance(graph.graph, dict)
+        self.assertEqual(graph.bfs_traversal('A')['dependencies']['K'], 5)
+
+
+class TestEdgeKinds(unittest.TestCase):
+
+    def test_kinds_kept_across_freeze(self):
+
+        graph = DependencyGraph()
+        graph.add_dependency('app', {'lib': '^1.0.0', 'jest': '^29.0.0'}, {'jest': 'dev', 'gone': 'peer'})
+        graph.freeze()
+
+        self.assertEqual(graph.edge_kind('app', 'jest'), 'dev')
+        self.assertEqual(graph.edge_kind('app', 'lib'), 'prod')
+        self.assertEqual(graph.edge_kinds, {'app': {'jest': 'dev'}})
+
+        graph.add_dependency('app', {'lib': '^1.0.0'})
+        self.assertEqual(graph.edge_kinds, {})
+
+
+class TestReachabilityIndex(unittest.TestCase):
+
+    def test_matches_bfs(self):
+
+        graph = load_graph(TEST_REPO)
+        index = graph.reachability()
+
+        for package in TEST_REPO:
+            expected = set(graph.bfs_traversal(package)['dependencies']) - {package}
+            self.assertEqual(set(index.closure(package)) - {package}, expected)
+            for dependency in TEST_REPO:
+                self.assertEqual(index.reaches(package, dependency),
+                                 dependency in expected or (dependency == package and package in index.closure(package)))
+
+    def test_point_queries(self):
+
+        graph = load_graph(TEST_REPO)
+
+        self.assertTrue(graph.depends_on('A', 'J'))
+        self.assertTrue(graph.depends_on('G', 'A'))
+        self.assertTrue(graph.depends_on('A', 'A'))
+        self.assertFalse(graph.depends_on('E', 'A'))
+        self.assertFalse(graph.depends_on('H', 'H'))
+        self.assertFalse(graph.depends_on('A', 'missing'))
+        self.assertEqual(graph.reachability().closure_size('F'), 2)
+
+    def test_self_loop_reaches_itself(self):
+
+        graph = load_graph({'A': {'A': '1'}, 'B': {}})
+
+        self.assertTrue(graph.depends_on('A', 'A'))
+        self.assertFalse(graph.depends_on('B', 'B'))
+
+    def test_rebuilt_after_add_dependency(self):
+
+        graph = load_graph(TEST_REPO)
+        graph.freeze()
+        index = graph.reachability()
+        self.assertIs(graph.reachability(), index)
+        self.assertFalse(graph.depends_on('J', 'A'))
+
+        graph.add_dependency('J', {'A': '^1.0.0'})
+
+        self.assertIsNot(graph.reachability(), index)
+        self.assertTrue(graph.depends_on('J', 'A'))
+        self.assertTrue(graph.depends_on('H', 'H') is False and graph.depends_on('I', 'I'))
+
+    def test_on_demand_matches_bitsets(self):
+
+        graph = load_graph(dict(TEST_REPO, H={'H': '1'}, K={'A': '1'}))
+        index = graph.reachability()
+        on_demand = ReachabilityIndex(graph.compact(), max_bytes=0)
+
+        self.assertIsNotNone(index.closures)
+        self.assertIsNone(on_demand.closures)
+        for package in graph.graph:
+            self.assertEqual(on_demand.closure(package), index.closure(package))
+            for dependency in graph.graph:
+                self.assertEqual(on_demand.reaches(package, dependency), index.reaches(package, dependency))
+
+    def test_built_once_by_concurrent_queries(self):
+
+        graph = load_graph(TEST_REPO)
+        indexes = []
+        threads = [threading.Thread(target=lambda: indexes.append(graph.reachability())) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len({id(index) for index in indexes}), 1)
+
+    def test_deep_chain(self):
+
+        graph = load_graph({f"p{i}": {f"p{i + 1}": "1"} for i in range(5000)})
+
+        self.assertTrue(graph.depends_on('p0', 'p5000'))
+        self.assertFalse(graph.depends_on('p5000', 'p0'))
+        self.assertEqual(graph.reachability().closure_size('p0'), 5000)
+
+
+class TestReverseIndex(unittest.TestCase):
+
+    def test_reverse_distances(self):
+
+        graph = load_graph(TEST_REPO)
+
+        self.assertEqual(graph.reverse_dependencies('H'), {'E': 1, 'B': 2, 'A': 3, 'D': 3, 'G': 4, 'C': 4})
+        self.assertEqual(graph.reverse_dependencies('A'), {'G': 1, 'D': 2, 'B': 3, 'C': 3})
+        self.assertEqual(graph.reverse_dependencies('missing'), {})
+
+    def test_filter_stops_reverse_walk(self):
+
+        graph = load_graph(TEST_REPO)
+
+        self.assertEqual(graph.reverse_dependencies('H', filter_substring='b'), {'E': 1})
+
+    def test_matches_forward_reachability(self):
+
+        graph = load_graph(TEST_REPO)
+
+        for package in TEST_REPO:
+            expected = {other for other in TEST_REPO if other != package and graph.depends_on(other, package)}
+            self.assertEqual(set(graph.reverse_dependencies(package)), expected)
+
+    def test_updated_incrementally(self):
+
+        graph = load_graph(TEST_REPO)
+        graph.freeze()
+        index = graph.reverse_index()
+        self.assertEqual(graph.dependents('D'), ['B', 'C'])
+
+        graph.add_dependency('C', {'F': '^1.0.0', 'H': '^1.0.0'})
+        graph.add_dependency('K', {'H': '^1.0.0'})
+
+        self.assertIs(graph.reverse_index(), index)
+        self.assertEqual(graph.dependents('D'), ['B'])
+        self.assertEqual(graph.dependents('H'), ['C', 'E', 'K'])
+        self.assertEqual(graph.reverse_dependencies('H')['K'], 1)
+
+        rebuilt = load_graph(graph.graph).reverse_index()
+        self.assertEqual({key: value for key, value in index.items() if value}, rebuilt)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from GraphLoader import load_graph, iter_json_entries
+
+
+with open(os.path.join(os.path.dirname(__file__), 'test_repo.json'), encoding='utf-8') as f:
+    TEST_REPO = json.load(f)
+
+
+class TestGraphLoader(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, name, content):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        return path
+
+    def test_load_json(self):
+
+        path = self.write('repo.json', json.dumps(TEST_REPO))
+
+        self.assertEqual(load_graph(path).to_dict(), TEST_REPO)
+
+    def test_load_json_lines(self):
+
+        lines = [json.dumps({'name': 'A', 'dependencies': TEST_REPO['A']})]
+        lines += [json.dumps({package: deps}) for package, deps in TEST_REPO.items() if package != 'A']
+        path = self.write('repo.jsonl', '\n'.join(lines) + '\n\n')
+
+        self.assertEqual(load_graph(path).to_dict(), TEST_REPO)
+
+    def test_unwanted_entries_skipped(self):
+
+        path = self.write('repo.json', json.dumps(TEST_REPO))
+
+        entries = list(iter_json_entries(path, wanted=lambda package: package in ('B', 'J')))
+
+        self.assertEqual(entries, [('B', TEST_REPO['B']), ('J', {})])
+
+    def test_reachable_only(self):
+
+        # Порядок файла не совпадает с порядком обхода: нужны повторные проходы
+        data = {'leaf': {}, 'mid': {'leaf': '1'}, 'root': {'mid': '1'}, 'other': {'leaf': '1'}}
+        path = self.write('repo.json', json.dumps(data))
+
+        graph = load_graph(path, root='root', max_depth=5)
+
+        self.assertEqual(graph.to_dict(), {'root': {'mid': '1'}, 'mid': {'leaf': '1'}, 'leaf': {}})
+
+    def test_reachable_only_respects_depth(self):
+
+        path = self.write('repo.json', json.dumps(TEST_REPO))
+
+        graph = load_graph(path, root='A', max_depth=2)
+
+        self.assertEqual(set(graph), {'A', 'B', 'C'})
+        self.assertIn('D', graph.names)
+
+    def test_shorter_path_found_later(self):
+
+        data = {'A': {'B': '1', 'X': '1'}, 'B': {'C': '1'}, 'C': {'D': '1'}, 'X': {'D': '1'}, 'D': {'E': '1'}}
+        path = self.write('repo.json', json.dumps(data))
+
+        graph = load_graph(path, root='A', max_depth=3)
+
+        self.assertIn('D', graph)
+        self.assertNotIn('E', graph)
+
+    def test_invalid_entry(self):
+
+        path = self.write('repo.json', '{"A": []}')
+
+        with self.assertRaises(ValueError):
+            load_graph(path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from DependencyCrawler import IncrementalCrawler
+from NPMDependencyFetcher import NPMDependencyFetcher
+
+
+PACKAGES = {}
+
+
+def packument(name, dependencies):
+    return {'name': name, 'dist-tags': {'latest': '1.0.0'},
+            'versions': {'1.0.0': {'name': name, 'version': '1.0.0', 'dependencies': dependencies}}}
+
+
+class EtagRegistryHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        name = self.path.strip('/')
+        if name not in PACKAGES:
+            self.send_error(404)
+            return
+
+        body = json.dumps(PACKAGES[name]).encode('utf-8')
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header('ETag', etag)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestIncrementalCrawler(unittest.TestCase):
+
+    def setUp(self):
+        PACKAGES.clear()
+        PACKAGES.update({
+            'app': packument('app', {'a': '^1.0.0', 'b': '^1.0.0'}),
+            'a': packument('a', {'c': '^1.0.0'}),
+            'b': packument('b', {}),
+            'c': packument('c', {}),
+        })
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), EtagRegistryHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.state_dir = tempfile.mkdtemp()
+        self.state_path = os.path.join(self.state_dir, 'state.json')
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.state_dir)
+
+    def crawl(self):
+        crawler = IncrementalCrawler(NPMDependencyFetcher(self.url), self.state_path, concurrency=4)
+        return crawler, crawler.crawl('app', max_depth=5)
+
+    def test_unchanged_graph_reused(self):
+
+        first, graph = self.crawl()
+        second, again = self.crawl()
+
+        self.assertEqual(first.refetched, 4)
+        self.assertEqual(second.reused, 4)
+        self.assertEqual(second.refetched, 0)
+        self.assertEqual(graph, again)
+
+    def test_only_changed_subtree_refetched(self):
+
+        self.crawl()
+        PACKAGES['b'] = packument('b', {'d': '^1.0.0'})
+        PACKAGES['d'] = packument('d', {})
+
+        crawler, graph = self.crawl()
+
+        self.assertEqual(graph['b'], {'d': '^1.0.0'})
+        self.assertIn('d', graph)
+        self.assertEqual(crawler.reused, 3)
+        self.assertEqual(crawler.refetched, 2)
+        self.assertEqual(crawler.changed, 1)
+
+    def test_state_for_other_root_ignored(self):
+
+        self.crawl()
+        crawler = IncrementalCrawler(NPMDependencyFetcher(self.url), self.state_path)
+        crawler.crawl('a', max_depth=5)
+
+        self.assertEqual(crawler.reused, 0)
+        self.assertEqual(crawler.refetched, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
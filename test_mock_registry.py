@@ -0,0 +1,181 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import time
+import unittest
+import urllib.error
+import urllib.request
+
+from ConnectionPool import ConnectionPool
+from MockRegistry import FaultProfile, MockRegistry, RecordedPackuments, RegistryHandler, packuments_from_graph
+from NPMDependencyFetcher import NPMDependencyFetcher
+from PackumentCache import PackumentCache
+from RequestScheduler import RegistryUnavailable, RequestScheduler
+from main import build_dependency_graph
+
+
+with open(os.path.join(os.path.dirname(__file__), 'test_repo.json'), encoding='utf-8') as f:
+    TEST_REPO = json.load(f)
+
+
+def fetch_json(url):
+    with urllib.request.urlopen(url) as response:
+        return json.loads(response.read())
+
+
+class TestMockRegistry(unittest.TestCase):
+
+    def test_end_to_end_crawl(self):
+
+        with MockRegistry(packuments_from_graph(TEST_REPO)) as registry:
+            pool = ConnectionPool()
+            fetcher = NPMDependencyFetcher(registry.url, connection_pool=pool)
+            with contextlib.redirect_stdout(io.StringIO()):
+                graph = build_dependency_graph(fetcher, 'A', max_depth=10, concurrency=4)
+            pool.close()
+
+        self.assertEqual(graph, TEST_REPO)
+        self.assertEqual(registry.requests, len(TEST_REPO))
+        self.assertEqual(registry.responses, {200: len(TEST_REPO)})
+        self.assertGreater(pool.connections_reused, 0)
+
+    def test_ranges_resolve_to_generated_versions(self):
+
+        documents = packuments_from_graph({'app': {'lib': '^2.1.0'}})
+
+        self.assertEqual(sorted(documents['lib']['versions']), ['1.0.0', '2.1.0'])
+
+    def test_version_document_and_scoped_names(self):
+
+        self.assertEqual(RegistryHandler.parse_path('/@scope%2fpkg/1.0.0'), ('@scope/pkg', '1.0.0'))
+        self.assertEqual(RegistryHandler.parse_path('/@scope/pkg'), ('@scope/pkg', None))
+        self.assertEqual(RegistryHandler.parse_path('/left-pad'), ('left-pad', None))
+
+        with MockRegistry(packuments_from_graph({'@scope/pkg': {'dep': '1.0.0'}})) as registry:
+            document = fetch_json(f"{registry.url}/@scope/pkg/latest")
+
+        self.assertEqual(document['version'], '1.0.0')
+        self.assertEqual(document['dependencies'], {'dep': '1.0.0'})
+
+    def test_throttling_and_errors(self):
+
+        with MockRegistry(packuments_from_graph(TEST_REPO), FaultProfile(throttle_rate=1.0, retry_after=7)) as registry:
+            with self.assertRaises(urllib.error.HTTPError) as raised:
+                fetch_json(f"{registry.url}/A")
+
+        self.assertEqual(raised.exception.code, 429)
+        self.assertEqual(raised.exception.headers['Retry-After'], '7')
+
+        with MockRegistry(packuments_from_graph(TEST_REPO), FaultProfile(error_rate=1.0, seed=1)) as registry:
+            with self.assertRaises(urllib.error.HTTPError) as raised:
+                fetch_json(f"{registry.url}/A")
+
+        self.assertIn(raised.exception.code, (500, 502, 503))
+
+    def test_crawl_survives_throttling_and_errors(self):
+
+        faults = FaultProfile(throttle_rate=0.3, error_rate=0.2, retry_after=0, seed=3)
+        scheduler = RequestScheduler(max_concurrency=4, max_retries=20, base_delay=0.001, max_delay=0.01, seed=1)
+        with MockRegistry(packuments_from_graph(TEST_REPO), faults) as registry:
+            fetcher = NPMDependencyFetcher(registry.url, connection_pool=ConnectionPool(), scheduler=scheduler)
+            with contextlib.redirect_stdout(io.StringIO()):
+                graph = build_dependency_graph(fetcher, 'A', max_depth=10, concurrency=4)
+
+        # Ни один пакет не потерян и не записан без зависимостей
+        self.assertEqual(graph, TEST_REPO)
+        self.assertEqual(registry.responses[200], len(TEST_REPO))
+        self.assertEqual(scheduler.retries, registry.requests - len(TEST_REPO))
+        self.assertGreater(scheduler.throttled, 0)
+
+    def test_unavailable_registry_fails_the_crawl(self):
+
+        scheduler = RequestScheduler(max_retries=2, base_delay=0.001)
+        with MockRegistry(packuments_from_graph(TEST_REPO), FaultProfile(error_rate=1.0, seed=1)) as registry:
+            fetcher = NPMDependencyFetcher(registry.url, scheduler=scheduler)
+            with contextlib.redirect_stdout(io.StringIO()):
+                with self.assertRaises(RegistryUnavailable):
+                    build_dependency_graph(fetcher, 'A', max_depth=10)
+
+        self.assertEqual(registry.requests, 3)
+
+    def test_latency_and_bandwidth(self):
+
+        faults = FaultProfile(latency=0.1, bandwidth=100 * 1024, inflate_versions=40)
+        with MockRegistry(packuments_from_graph(TEST_REPO), faults) as registry:
+            start = time.perf_counter()
+            document = fetch_json(f"{registry.url}/A")
+            elapsed = time.perf_counter() - start
+
+        # ~20 КБ при 100 КБ/с плюс задержка
+        self.assertGreater(registry.bytes_sent, 20 * 1024)
+        self.assertGreater(elapsed, 0.25)
+        self.assertEqual(len(document['versions']), 41)
+
+    def test_inflated_documents_with_streaming_fetcher(self):
+
+        with MockRegistry(packuments_from_graph(TEST_REPO), FaultProfile(inflate_versions=200)) as registry:
+            fetcher = NPMDependencyFetcher(registry.url, streaming=True)
+            with contextlib.redirect_stdout(io.StringIO()):
+                dependencies = fetcher.get_dependencies('A')
+
+        self.assertEqual(dependencies, TEST_REPO['A'])
+        # Потоково разобранное тело тоже учитывается
+        self.assertGreater(fetcher.bytes_received, 200 * 512)
+
+    def test_streaming_fetcher_with_cache(self):
+
+        with tempfile.TemporaryDirectory() as directory:
+            cache = PackumentCache(directory)
+            try:
+                with MockRegistry(packuments_from_graph(TEST_REPO), FaultProfile(inflate_versions=200)) as registry:
+                    fetcher = NPMDependencyFetcher(registry.url, cache=cache, streaming=True)
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        dependencies = fetcher.get_dependencies('A')
+                        document = fetch_json(f"{registry.url}/A")
+
+                    # Тело сохранено целиком, хотя разбор остановился на выбранной версии
+                    key = PackumentCache.make_key(registry.url, 'A')
+                    self.assertEqual(json.loads(cache.get(key).body), document)
+                    self.assertEqual(cache.size(), fetcher.bytes_received)
+
+                    # Повторный разбор берёт тело из кэша, а не из сети
+                    offline = NPMDependencyFetcher(registry.url, cache=cache, offline=True, streaming=True)
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        self.assertEqual(offline.get_dependencies('A'), TEST_REPO['A'])
+            finally:
+                cache.close()
+
+        self.assertEqual(dependencies, TEST_REPO['A'])
+        self.assertEqual(offline.network_requests, 0)
+
+    def test_recorded_packuments(self):
+
+        with tempfile.TemporaryDirectory() as directory:
+            document = packuments_from_graph({'@types/node': {}})['@types/node']
+            with open(os.path.join(directory, RecordedPackuments.file_name('@types/node')), 'w') as f:
+                json.dump(document, f)
+
+            with MockRegistry(RecordedPackuments(directory)) as registry:
+                self.assertEqual(fetch_json(f"{registry.url}/@types%2fnode")['name'], '@types/node')
+                with self.assertRaises(urllib.error.HTTPError) as raised:
+                    fetch_json(f"{registry.url}/missing")
+
+        self.assertEqual(raised.exception.code, 404)
+
+    def test_etag_revalidation(self):
+
+        with MockRegistry(packuments_from_graph(TEST_REPO)) as registry:
+            with urllib.request.urlopen(f"{registry.url}/A") as response:
+                etag = response.headers['ETag']
+
+            request = urllib.request.Request(f"{registry.url}/A", headers={'If-None-Match': etag})
+            with self.assertRaises(urllib.error.HTTPError) as raised:
+                urllib.request.urlopen(request)
+
+        self.assertEqual(raised.exception.code, 304)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+import contextlib
+import gc
+import io
+import json
+import os
+import unittest
+import weakref
+
+from DependencyGrapf import DependencyGraph
+from GraphExporter import export_graph
+from GraphLoader import load_graph
+from PackageFilter import PackageFilter, compile_filter, make_filter
+from main import DependencyGraphConfig, fetch_and_display_dependencies
+
+
+TEST_REPO = os.path.join(os.path.dirname(__file__), 'test_repo.json')
+
+
+class TestPackageFilter(unittest.TestCase):
+
+    def test_substring_is_case_insensitive(self):
+
+        package_filter = PackageFilter(exclude=['Lodash'])
+
+        self.assertTrue(package_filter.excluded('lodash.merge'))
+        self.assertTrue(package_filter.excluded('my-lodash'))
+        self.assertFalse(package_filter.excluded('underscore'))
+
+    def test_glob_matches_whole_name(self):
+
+        package_filter = PackageFilter(exclude=['@types/*', 'eslint-plugin-?'])
+
+        self.assertTrue(package_filter.excluded('@types/node'))
+        self.assertFalse(package_filter.excluded('x-@types/node'))
+        self.assertTrue(package_filter.excluded('eslint-plugin-a'))
+        self.assertFalse(package_filter.excluded('eslint-plugin-ab'))
+
+    def test_regex_and_include(self):
+
+        package_filter = PackageFilter(exclude=['re:^babel-'], include=['re:^babel', 'react*'])
+
+        self.assertTrue(package_filter.excluded('babel-core'))
+        self.assertFalse(package_filter.excluded('babel'))
+        self.assertFalse(package_filter.excluded('react-dom'))
+        self.assertTrue(package_filter.excluded('vue'))
+
+    def test_verdict_cached(self):
+
+        package_filter = PackageFilter(exclude=['a'])
+        package_filter.excluded('abc')
+        package_filter._exclude = None
+
+        self.assertTrue(package_filter.excluded('abc'))
+        self.assertFalse(package_filter.excluded('xyz'))
+
+    def test_mask_does_not_keep_graph_alive(self):
+
+        package_filter = PackageFilter(exclude=['c'])
+        compact = load_graph(TEST_REPO)
+        mask = package_filter.mask(compact)
+
+        self.assertIs(package_filter.mask(compact), mask)
+        self.assertEqual(mask[compact.id_of('C')], 1)
+
+        graph = weakref.ref(compact)
+        del compact
+        gc.collect()
+        self.assertIsNone(graph())
+
+    def test_invalid_regex(self):
+
+        with self.assertRaises(ValueError):
+            PackageFilter(exclude=['re:('])
+
+    def test_compile_filter(self):
+
+        self.assertIsNone(compile_filter(None))
+        self.assertIsNone(compile_filter(''))
+        self.assertIsNone(compile_filter(PackageFilter()))
+        self.assertIs(compile_filter('core'), compile_filter('core'))
+        self.assertIs(make_filter(('a',), ('b',)), make_filter(('a',), ('b',)))
+        self.assertEqual(str(make_filter(('a', 'b*'), ('re:c',))), 'a, b*, only re:c')
+
+
+class TestLoaderPushdown(unittest.TestCase):
+
+    def test_excluded_packages_not_expanded(self):
+
+        compact = load_graph(TEST_REPO, roots=['A'], package_filter=PackageFilter(exclude=['c']))
+
+        # C остаётся целью ребра A → C, но его поддерево (F, I, J) не загружается
+        self.assertFalse(compact.has_entry[compact.id_of('C')])
+        self.assertIsNone(compact.id_of('F'))
+
+    def test_only_and_excluded_root_not_pruned(self):
+
+        compact = load_graph(TEST_REPO, roots=['A'], package_filter=PackageFilter(exclude=['a'], include=['j']))
+
+        # Корень A загружается под шаблоном exclude, а J - под неподходящими родителями
+        self.assertEqual(set(compact), set('ABCDEFGHIJ'))
+
+
+class TestOnlyPatterns(unittest.TestCase):
+
+    def test_matching_packages_under_other_parents(self):
+
+        graph = DependencyGraph.from_compact(load_graph(TEST_REPO))
+        only = PackageFilter(include=['h', 'j'])
+
+        result = graph.bfs_traversal('A', only, build_tree=True)
+
+        self.assertEqual(result['dependencies'], {'A': 0, 'H': 3, 'J': 4})
+        self.assertEqual(result['tree'], {'A': ['H', 'J'], 'H': [], 'J': []})
+        self.assertEqual(result['cycles'], graph.bfs_traversal('A')['cycles'])
+        self.assertEqual(graph.reverse_dependencies('H', PackageFilter(include=['a', 'c'])), {'A': 3, 'C': 4})
+
+    def test_cli_shows_matching_packages(self):
+
+        config = DependencyGraphConfig()
+        config.package_name = 'A'
+        config.repository_path = TEST_REPO
+        config.test_mode = True
+        config.include_patterns = ['B']
+
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            fetch_and_display_dependencies(config)
+
+        self.assertNotIn('not have dependencies', out.getvalue())
+        self.assertIn('└── B', out.getvalue())
+        self.assertNotIn('── C', out.getvalue())
+
+    def test_export_shows_matching_packages(self):
+
+        out = io.StringIO()
+        export_graph(DependencyGraph.from_compact(load_graph(TEST_REPO)), 'jsonl', out, ['A'],
+                     PackageFilter(include=['h', 'i']))
+        records = [json.loads(line) for line in out.getvalue().splitlines()]
+
+        self.assertEqual([record['id'] for record in records if record['type'] == 'node'], ['A', 'H', 'I'])
+        self.assertEqual([record for record in records if record['type'] == 'edge'], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
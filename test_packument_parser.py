@@ -0,0 +1,82 @@
+import io
+import json
+import unittest
+
+from PackumentParser import extract_version
+from NPMDependencyFetcher import NPMDependencyFetcher
+
+
+PACKUMENT = {
+    "_id": "demo",
+    "name": "demo",
+    "description": "quote \" and backslash \\ and {braces} [brackets]",
+    "dist-tags": {"latest": "2.0.0", "next": "3.0.0-beta.1"},
+    "versions": {
+        "1.0.0": {"name": "demo", "version": "1.0.0", "dependencies": {"old": "^1.0.0"},
+                  "scripts": {"test": "echo \"}\""}},
+        "2.0.0": {"name": "demo", "version": "2.0.0", "dependencies": {"a": "^1.0.0"},
+                  "peerDependencies": {"b": "^2.0.0"}, "deprecated": False, "size": 12345},
+        "3.0.0-beta.1": {"name": "demo", "version": "3.0.0-beta.1", "dependencies": {"c": "~3.0.0"}}
+    },
+    "time": {"1.0.0": "2020-01-01T00:00:00.000Z"},
+    "readme": "x" * 5000
+}
+
+
+def stream(document):
+    return io.BytesIO(json.dumps(document).encode('utf-8'))
+
+
+class TestPackumentParser(unittest.TestCase):
+
+    def test_selects_latest_version(self):
+
+        result = extract_version(stream(PACKUMENT), chunk_size=7)
+
+        self.assertEqual(result['dist-tags'], PACKUMENT['dist-tags'])
+        self.assertEqual(result['versions'], {"2.0.0": PACKUMENT['versions']['2.0.0']})
+        self.assertEqual(result['version_list'], list(PACKUMENT['versions']))
+
+    def test_selects_requested_version(self):
+
+        result = extract_version(stream(PACKUMENT), '1.0.0', chunk_size=5)
+
+        self.assertEqual(result['versions']['1.0.0'], PACKUMENT['versions']['1.0.0'])
+        self.assertNotIn('3.0.0-beta.1', result['versions'])
+
+    def test_dist_tags_after_versions(self):
+
+        document = {"versions": PACKUMENT['versions'], "dist-tags": {"latest": "1.0.0"}}
+
+        result = extract_version(stream(document), chunk_size=11)
+
+        self.assertEqual(result['versions']['1.0.0']['dependencies'], {"old": "^1.0.0"})
+
+    def test_single_version_document(self):
+
+        document = PACKUMENT['versions']['2.0.0']
+
+        result = extract_version(stream(document))
+        dependencies = NPMDependencyFetcher().extract_dependencies(result)
+
+        self.assertEqual(dependencies, {"a": "^1.0.0", "b": "^2.0.0"})
+
+    def test_matches_full_parse(self):
+
+        fetcher = NPMDependencyFetcher()
+
+        for version in (None, '1.0.0', '3.0.0-beta.1', 'missing'):
+            streamed = extract_version(stream(PACKUMENT), version, chunk_size=3)
+            self.assertEqual(fetcher.extract_dependencies(streamed, version),
+                             fetcher.extract_dependencies(PACKUMENT, version))
+
+    def test_truncated_document(self):
+
+        raw = json.dumps(PACKUMENT).encode('utf-8')[:200]
+
+        with self.assertRaises(ValueError):
+            extract_version(io.BytesIO(raw))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+import contextlib
+import io
+import json
+import os
+import random
+import unittest
+
+from DependencyGrapf import DependencyGraph
+from PackageFilter import PackageFilter
+from ParallelAnalysis import ClosureAnalyzer, analyze_closures
+from main import DependencyGraphConfig, write_closure_report
+
+
+with open(os.path.join(os.path.dirname(__file__), 'test_repo.json'), encoding='utf-8') as f:
+    TEST_REPO = json.load(f)
+
+
+def load_graph(data):
+    graph = DependencyGraph()
+    for package, deps in data.items():
+        graph.add_dependency(package, deps)
+    graph.freeze()
+    return graph
+
+
+def random_graph(seed, size=40, edges=80):
+    rng = random.Random(seed)
+    names = [f"pkg-{i}" for i in range(size)]
+    data = {name: {} for name in names[:size - 5]}
+    for _ in range(edges):
+        data[rng.choice(names[:size - 5])][rng.choice(names)] = '^1.0.0'
+    return data
+
+
+def expected_record(graph, package, filter_substring=None):
+    # Эталон - однопоточный обход от корня
+    result = graph.bfs_traversal(package, filter_substring)
+    levels = result['dependencies']
+    return {
+        'package': package,
+        'dependencies': len(levels) - 1,
+        'depth': max(levels.values()),
+        'cycles': result['cycles'],
+        'closure': [name for name in levels if name != package]
+    }
+
+
+class TestParallelAnalysis(unittest.TestCase):
+
+    def test_matches_bfs_traversal(self):
+
+        for seed in range(20):
+            graph = load_graph(random_graph(seed))
+            filter_substring = 'pkg-1' if seed % 2 else None
+            expected = [expected_record(graph, package, filter_substring) for package in graph.graph
+                        if filter_substring is None or filter_substring not in package]
+            with self.subTest(seed=seed):
+                self.assertEqual(list(analyze_closures(graph, filter_substring=filter_substring,
+                                                       with_closure=True)), expected)
+
+    def test_only_patterns_match_bfs_traversal(self):
+
+        graph = load_graph(random_graph(3))
+        only = PackageFilter(exclude=['pkg-2'], include=['re:[05]$'])
+        expected = [expected_record(graph, package, only) for package in graph.graph if not only.excluded(package)]
+
+        self.assertTrue(expected)
+        self.assertEqual(list(analyze_closures(graph, filter_substring=only, with_closure=True)), expected)
+        self.assertEqual(list(analyze_closures(graph, ['pkg-1'], only, with_closure=True)),
+                         [expected_record(graph, 'pkg-1', only)])
+
+    def test_process_pool_merges_in_root_order(self):
+
+        graph = load_graph(random_graph(7, size=200, edges=500))
+        analyzer = ClosureAnalyzer(graph.compact(), 're:-3$')
+        roots = analyzer.roots()
+
+        serial = list(analyzer.analyze(roots, workers=1, with_closure=True))
+        parallel = list(analyzer.analyze(roots, workers=2, with_closure=True, chunk_size=7))
+
+        self.assertEqual(parallel, serial)
+        self.assertEqual([record[0] for record in parallel], roots)
+
+    def test_selected_roots(self):
+
+        graph = load_graph(TEST_REPO)
+
+        records = list(analyze_closures(graph, ['E', 'missing', 'A']))
+
+        self.assertEqual([record['package'] for record in records], ['E', 'A'])
+        self.assertEqual(records[0], {'package': 'E', 'dependencies': 1, 'depth': 1, 'cycles': []})
+        self.assertNotIn('closure', records[1])
+
+    def test_report_is_json_lines(self):
+
+        config = DependencyGraphConfig()
+        config.all_packages = True
+        config.workers = 2
+        out = io.StringIO()
+        with contextlib.redirect_stdout(io.StringIO()):
+            report = write_closure_report(config, load_graph(TEST_REPO), None, out)
+
+        records = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(report, {'packages': len(TEST_REPO), 'with_cycles': 5, 'workers': 2})
+        self.assertEqual(sorted(record['package'] for record in records), sorted(TEST_REPO))
+
+
+    def test_report_rejects_export_format(self):
+
+        config = DependencyGraphConfig()
+        config.all_packages = True
+        config.test_mode = True
+        config.repository_path = os.path.join(os.path.dirname(__file__), 'test_repo.json')
+        self.assertTrue(config.validate())
+
+        config.output_format = 'jsonl'
+        self.assertFalse(config.validate())
+        self.assertTrue(any('--format' in error for error in config.errors))
+
+
+if __name__ == '__main__':
+    unittest.main()
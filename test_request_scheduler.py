@@ -0,0 +1,153 @@
+import contextlib
+import io
+import threading
+import time
+import unittest
+import urllib.error
+
+from RequestScheduler import AdaptiveLimit, RegistryUnavailable, RequestScheduler, TokenBucket, parse_retry_after
+
+
+class FakeClock:
+    # Время, которое идёт только во время sleep
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def http_error(code, headers=None):
+    return urllib.error.HTTPError('http://registry/pkg', code, 'error', headers or {}, None)
+
+
+def failing(*errors, result='ok'):
+    # send, который сначала поднимает errors по очереди, затем возвращает result
+    pending = list(errors)
+
+    def send():
+        if pending:
+            raise pending.pop(0)
+        return result
+
+    return send
+
+
+class TestRequestScheduler(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+
+    def scheduler(self, **kwargs):
+        return RequestScheduler(seed=1, sleep=self.clock.sleep, clock=self.clock, **kwargs)
+
+    def test_retries_with_growing_jittered_backoff(self):
+
+        scheduler = self.scheduler(base_delay=1.0)
+        errors = [http_error(500), http_error(502), urllib.error.URLError('reset')]
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(scheduler.call(failing(*errors)), 'ok')
+
+        self.assertEqual(scheduler.retries, 3)
+        self.assertEqual(scheduler.attempts, 4)
+        for attempt, delay in enumerate(self.clock.sleeps, 1):
+            ceiling = 2 ** (attempt - 1)
+            self.assertGreaterEqual(delay, ceiling / 2)
+            self.assertLessEqual(delay, ceiling)
+
+    def test_retry_after_pauses_every_request(self):
+
+        scheduler = self.scheduler(base_delay=0.1)
+        with contextlib.redirect_stdout(io.StringIO()):
+            scheduler.call(failing(http_error(429, {'Retry-After': '3'})))
+
+        self.assertEqual(scheduler.throttled, 1)
+        self.assertEqual(self.clock.sleeps, [3.0])
+        self.assertEqual(parse_retry_after('Wed, 21 Oct 2015 07:28:10 GMT', now=1445412480.0), 10.0)
+        self.assertIsNone(parse_retry_after('soon'))
+
+    def test_gives_up_instead_of_returning_nothing(self):
+
+        scheduler = self.scheduler(max_retries=2)
+        with contextlib.redirect_stdout(io.StringIO()):
+            with self.assertRaises(RegistryUnavailable):
+                scheduler.call(failing(*[http_error(503)] * 3), 'left-pad')
+
+        self.assertEqual(scheduler.attempts, 3)
+
+    def test_client_errors_not_retried(self):
+
+        scheduler = self.scheduler()
+        with self.assertRaises(urllib.error.HTTPError):
+            scheduler.call(failing(http_error(404)))
+
+        self.assertEqual(scheduler.attempts, 1)
+        self.assertEqual(self.clock.sleeps, [])
+
+    def test_token_bucket_paces_requests(self):
+
+        bucket = TokenBucket(rate=10, burst=2, clock=self.clock)
+
+        waits = [bucket.reserve() for _ in range(4)]
+
+        self.assertEqual(waits[:2], [0.0, 0.0])
+        self.assertAlmostEqual(waits[2], 0.1)
+        self.assertAlmostEqual(waits[3], 0.2)
+
+    def test_aimd_limit(self):
+
+        limit = AdaptiveLimit(maximum=8, latency_target=1.0, clock=self.clock)
+        for _ in range(3):
+            limit.acquire()
+
+        # Волна 429 снижает предел один раз
+        limit.release(0.5, answered=False, overloaded=True)
+        limit.release(0.5, answered=False, overloaded=True)
+        self.assertEqual(limit.limit, 4.0)
+
+        # Медленный ответ, начатый после снижения, - тоже перегрузка
+        self.clock.now += 3
+        limit.release(2.0)
+        self.assertEqual(limit.limit, 2.0)
+        self.assertEqual(limit.decreases, 2)
+
+        # Быстрые ответы возвращают предел аддитивно, не выше maximum
+        for _ in range(200):
+            limit.acquire()
+            limit.release(0.1)
+        self.assertEqual(limit.limit, 8.0)
+
+    def test_limit_bounds_requests_in_flight(self):
+
+        scheduler = self.scheduler(max_concurrency=1)
+        active = []
+        peak = []
+        lock = threading.Lock()
+
+        def send():
+            with lock:
+                active.append(1)
+                peak.append(len(active))
+            time.sleep(0.005)
+            with lock:
+                active.pop()
+            return 'ok'
+
+        threads = [threading.Thread(target=scheduler.call, args=(send,)) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(max(peak), 1)
+        self.assertEqual(scheduler.limiter.in_flight, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
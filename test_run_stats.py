@@ -0,0 +1,74 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from RunStats import RunStats
+from main import DependencyGraphConfig, fetch_and_display_dependencies
+
+
+TEST_REPO = os.path.join(os.path.dirname(__file__), 'test_repo.json')
+
+
+class TestRunStats(unittest.TestCase):
+
+    def test_phases_accumulate(self):
+
+        stats = RunStats()
+        for _ in range(2):
+            with stats.phase('tree'):
+                pass
+        stats.count('requests', 3)
+        stats.count('requests', 2)
+        stats.set('nodes', 10)
+
+        report = stats.report()
+        self.assertEqual(list(report['phases']), ['tree'])
+        self.assertEqual(report['counters'], {'requests': 5, 'nodes': 10})
+        self.assertGreaterEqual(report['total_seconds'], report['phases']['tree'])
+
+    def test_profile_only_selected_phase(self):
+
+        stats = RunStats('analyze')
+        with stats.phase('tree'):
+            sorted(range(10))
+        with stats.phase('analyze'):
+            sum(range(10))
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'profile.pstats')
+            out = io.StringIO()
+            stats.dump_profile(path, out=out)
+            self.assertTrue(os.path.exists(path))
+
+        self.assertIn('sum', out.getvalue())
+        self.assertNotIn('sorted', out.getvalue())
+
+
+class TestPipelineStats(unittest.TestCase):
+
+    def test_stats_report_written(self):
+
+        with tempfile.TemporaryDirectory() as directory:
+            config = DependencyGraphConfig()
+            config.package_name = 'A'
+            config.repository_path = TEST_REPO
+            config.test_mode = True
+            config.stats_path = os.path.join(directory, 'stats.json')
+
+            with contextlib.redirect_stdout(io.StringIO()):
+                fetch_and_display_dependencies(config)
+
+            with open(config.stats_path, encoding='utf-8') as f:
+                report = json.load(f)
+
+        self.assertEqual(list(report['phases']), ['load', 'analyze', 'tree', 'render'])
+        self.assertEqual(report['counters']['nodes'], 10)
+        self.assertEqual(report['counters']['edges'], 12)
+        self.assertEqual(report['counters']['cycles'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
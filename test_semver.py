@@ -0,0 +1,96 @@
+import json
+import unittest
+from unittest.mock import patch, MagicMock
+
+from SemverResolver import compile_range, max_satisfying, pick_version, is_exact
+from NPMDependencyFetcher import NPMDependencyFetcher
+
+
+VERSIONS = ['0.0.1', '0.0.2', '0.1.0', '0.1.5', '1.0.0', '1.2.3', '1.2.4-beta.1', '1.2.4',
+            '1.3.0', '2.0.0-rc.1', '2.0.0', '2.1.0', '3.0.0-alpha']
+
+
+class TestSemverResolver(unittest.TestCase):
+
+    def test_max_satisfying(self):
+
+        cases = {
+            '^1.0.0': '1.3.0',
+            '~1.2.3': '1.2.4',
+            '^0.0.1': '0.0.1',
+            '^0.1.0': '0.1.5',
+            '1.x': '1.3.0',
+            '*': '2.1.0',
+            '1.2.3 - 2': '2.1.0',
+            '<2': '1.3.0',
+            '>1.3': '2.1.0',
+            '1 || 2.0': '2.0.0',
+            '>= 1.2.4-beta <1.2.5': '1.2.4',
+            '>=3.0.0-alpha': '3.0.0-alpha',
+            '^4.0.0': None,
+        }
+
+        for spec, expected in cases.items():
+            self.assertEqual(max_satisfying(VERSIONS, spec), expected, spec)
+
+    def test_prerelease_excluded_by_default(self):
+
+        compiled = compile_range('^1.2.0')
+
+        self.assertFalse(compiled.test('1.2.4-beta.1'))
+        self.assertTrue(compile_range('^1.2.4-beta.0').test('1.2.4-beta.1'))
+
+    def test_non_semver_specs(self):
+
+        self.assertIsNone(compile_range('github:user/repo'))
+        self.assertFalse(is_exact('^1.0.0'))
+        self.assertTrue(is_exact('1.0.0'))
+
+    def test_compiled_ranges_cached(self):
+
+        self.assertIs(compile_range('^1.0.0'), compile_range('^1.0.0'))
+
+    def test_pick_version_prefers_tags_and_latest(self):
+
+        dist_tags = {'latest': '1.2.3', 'next': '2.0.0-rc.1'}
+
+        self.assertEqual(pick_version(VERSIONS, dist_tags, None), '1.2.3')
+        self.assertEqual(pick_version(VERSIONS, dist_tags, 'next'), '2.0.0-rc.1')
+        self.assertEqual(pick_version(VERSIONS, dist_tags, '^1.0.0'), '1.2.3')
+        self.assertEqual(pick_version(VERSIONS, dist_tags, '^2.0.0'), '2.1.0')
+
+
+class TestRangeResolutionInFetcher(unittest.TestCase):
+
+    PACKUMENT = {
+        'name': 'lib',
+        'dist-tags': {'latest': '2.0.0'},
+        'versions': {
+            '1.0.0': {'dependencies': {'a': '^1.0.0'}},
+            '1.5.0': {'dependencies': {'b': '^1.0.0'}},
+            '2.0.0': {'dependencies': {'c': '^1.0.0'}}
+        }
+    }
+
+    @patch('urllib.request.urlopen')
+    def test_ranges_resolved_to_concrete_version(self, mock_urlopen):
+
+        mock_response = MagicMock()
+        mock_response.status = 200
+        mock_response.read.return_value = json.dumps(self.PACKUMENT).encode('utf-8')
+        mock_urlopen.return_value.__enter__.return_value = mock_response
+
+        fetcher = NPMDependencyFetcher()
+
+        self.assertEqual(fetcher.get_dependencies('lib', '^1.0.0'), {'b': '^1.0.0'})
+        self.assertEqual(fetcher.get_dependencies('lib', '~1.5.0'), {'b': '^1.0.0'})
+        self.assertEqual(fetcher.get_dependencies('lib', '1.5.0'), {'b': '^1.0.0'})
+        self.assertEqual(fetcher.get_dependencies('lib'), {'c': '^1.0.0'})
+
+        # Диапазон запрашивается как документ пакета, а не /lib/^1.0.0
+        self.assertEqual(mock_urlopen.call_args_list[0][0][0].full_url, 'https://registry.npmjs.org/lib')
+        self.assertEqual(mock_urlopen.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,224 @@
+import contextlib
+import http.client
+import io
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from DependencyGrapf import DependencyGraph
+from DependencyServer import GraphService, create_server
+from GraphLoader import load_graph
+from MockRegistry import MockRegistry, packuments_from_graph
+from main import DependencyGraphConfig, RegistrySession, graph_loader
+
+
+def load_test_repo():
+    return DependencyGraph.from_compact(load_graph('test_repo.json'))
+
+
+class UnixConnection(http.client.HTTPConnection):
+
+    def __init__(self, path):
+        super().__init__('localhost')
+        self.path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.path)
+
+
+class TestGraphService(unittest.TestCase):
+
+    def test_queries_are_cached_until_reload(self):
+
+        loads = []
+
+        def loader():
+            loads.append(1)
+            return load_test_repo()
+
+        service = GraphService(loader)
+        self.assertTrue(service.load())
+
+        first = service.dependencies('E')
+        self.assertEqual(first['dependencies'], {'E': 0, 'H': 1})
+        self.assertEqual(service.health()['cached_results'], 1)
+
+        service.cycles('E')
+        self.assertEqual(service.health()['cached_results'], 1)
+
+        service.load()
+        self.assertEqual(service.health()['generation'], 2)
+        self.assertEqual(service.health()['cached_results'], 0)
+        self.assertEqual(len(loads), 2)
+
+    def test_tree_respects_depth(self):
+
+        service = GraphService(load_test_repo)
+        service.load()
+
+        tree = service.tree('C', max_depth=1)['tree']
+        self.assertEqual(tree, {'C': ['D', 'F']})
+
+    def test_background_refresh_swaps_graph(self):
+
+        service = GraphService(load_test_repo, refresh_interval=0.05)
+        service.load()
+        service.start_refresh()
+        try:
+            deadline = time.time() + 2
+            while service.generation < 3 and time.time() < deadline:
+                time.sleep(0.01)
+        finally:
+            service.stop()
+
+        self.assertGreaterEqual(service.generation, 3)
+
+    def test_refresh_revalidates_through_one_session(self):
+
+        with open('test_repo.json', encoding='utf-8') as f:
+            repo = json.load(f)
+
+        with tempfile.TemporaryDirectory() as cache_dir, \
+                MockRegistry(packuments_from_graph(repo)) as registry:
+            config = DependencyGraphConfig()
+            config.repository_url = registry.url
+            config.cache_dir = cache_dir
+            config.max_depth = 10
+            session = RegistrySession(config)
+            service = GraphService(graph_loader(config, [('A', None)], session))
+            try:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    service.load()
+                    opened = session.pool.connections_opened
+                    # Изменение в реестре видно при перестроении, хотя записи кэша ещё свежие
+                    registry.packuments['J'] = packuments_from_graph({'J': {'H': '^1.0.0'}})['J']
+                    registry._documents.clear()
+                    service.load()
+            finally:
+                session.close()
+
+            dependencies = service.dependencies('J')['dependencies']
+
+        self.assertIn('H', dependencies)
+        # Неизменённые пакеты подтверждены ответом 304 по тем же соединениям
+        self.assertEqual(session.cache.revalidated, len(repo) - 1)
+        self.assertEqual(session.pool.connections_opened, opened)
+
+
+class TestQueryServer(unittest.TestCase):
+
+    def setUp(self):
+        self.service = GraphService(load_test_repo)
+        self.service.load()
+        self.server = create_server(self.service, '127.0.0.1:0')
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.port = self.server.server_address[1]
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def get(self, path, connection=None):
+        connection = connection or http.client.HTTPConnection('127.0.0.1', self.port)
+        connection.request('GET', path)
+        response = connection.getresponse()
+        return response.status, json.loads(response.read())
+
+    def test_endpoints(self):
+
+        status, body = self.get('/dependencies?package=F')
+        self.assertEqual(status, 200)
+        self.assertEqual(body['dependencies'], {'F': 0, 'I': 1, 'J': 2})
+
+        status, body = self.get('/cycles?package=A')
+        self.assertEqual(status, 200)
+        self.assertEqual(sorted(body['components'][0]), ['A', 'B', 'C', 'D', 'G'])
+
+        status, body = self.get('/tree?package=F&filter=J')
+        self.assertEqual(body['tree'], {'F': ['I'], 'I': []})
+
+        status, body = self.get('/depends?package=E&dependency=A')
+        self.assertEqual((status, body['depends']), (200, False))
+        self.assertTrue(self.get('/depends?package=G&dependency=J')[1]['depends'])
+
+        status, body = self.get('/health')
+        self.assertEqual(body['status'], 'ok')
+
+    def test_errors(self):
+
+        self.assertEqual(self.get('/dependencies')[0], 400)
+        self.assertEqual(self.get('/dependencies?package=missing')[0], 404)
+        self.assertEqual(self.get('/unknown?package=A')[0], 404)
+        self.assertEqual(self.get('/tree?package=A&max_depth=x')[0], 400)
+        self.assertEqual(self.get('/depends?package=A')[0], 400)
+
+    def test_keep_alive_connection(self):
+
+        connection = http.client.HTTPConnection('127.0.0.1', self.port)
+        for package in ('A', 'E', 'F'):
+            status, body = self.get(f'/dependencies?package={package}', connection)
+            self.assertEqual(status, 200)
+            self.assertEqual(body['package'], package)
+        connection.close()
+
+    def test_concurrent_clients(self):
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(lambda package: self.get(f'/dependencies?package={package}'),
+                                        ['A', 'B', 'C', 'D'] * 10))
+
+        self.assertTrue(all(status == 200 for status, _ in results))
+        self.assertEqual(len({json.dumps(body['dependencies'], sort_keys=True)
+                              for status, body in results if body['package'] == 'A'}), 1)
+
+
+@unittest.skipUnless(hasattr(socket, 'AF_UNIX'), "Unix sockets are not available")
+class TestUnixSocketServer(unittest.TestCase):
+
+    def test_query_over_unix_socket(self):
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, 'graph.sock')
+            service = GraphService(load_test_repo)
+            service.load()
+            server = create_server(service, f'unix:{path}')
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            try:
+                connection = UnixConnection(path)
+                connection.request('GET', '/dependencies?package=E')
+                response = connection.getresponse()
+                self.assertEqual(response.status, 200)
+                self.assertEqual(json.loads(response.read())['dependencies'], {'E': 0, 'H': 1})
+                connection.close()
+            finally:
+                server.shutdown()
+                server.server_close()
+
+    def test_stale_socket_replaced_but_regular_file_kept(self):
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, 'graph.sock')
+            stale = socket.socket(socket.AF_UNIX)
+            stale.bind(path)
+            stale.close()
+
+            server = create_server(GraphService(load_test_repo), f'unix:{path}')
+            server.server_close()
+
+            notes = os.path.join(temp_dir, 'notes.txt')
+            with open(notes, 'w', encoding='utf-8') as f:
+                f.write('keep me')
+            with self.assertRaises(ValueError):
+                create_server(GraphService(load_test_repo), f'unix:{notes}')
+            with open(notes, encoding='utf-8') as f:
+                self.assertEqual(f.read(), 'keep me')
+
+
+if __name__ == '__main__':
+    unittest.main()
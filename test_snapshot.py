@@ -0,0 +1,118 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from DependencyGrapf import DependencyGraph, CompactGraph
+from GraphSnapshot import _HEADER, save_snapshot, load_snapshot
+
+
+with open(os.path.join(os.path.dirname(__file__), 'test_repo.json'), encoding='utf-8') as f:
+    TEST_REPO = json.load(f)
+
+
+class TestGraphSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'graph.snap')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_round_trip(self):
+
+        data = dict(TEST_REPO, **{'@scope/пакет': {'A': '>=1.0.0 <2'}})
+        save_snapshot(CompactGraph.from_dict(data), self.path)
+
+        snapshot = load_snapshot(self.path)
+        try:
+            self.assertEqual(snapshot.to_dict(), data)
+            self.assertEqual(snapshot.id_of('@scope/пакет'), len(data) - 1)
+            self.assertIsNone(snapshot.id_of('missing'))
+        finally:
+            snapshot.close()
+
+    def test_traversal_on_snapshot(self):
+
+        graph = DependencyGraph()
+        for package, deps in TEST_REPO.items():
+            graph.add_dependency(package, deps)
+        expected = graph.bfs_traversal('A', 'e')
+
+        save_snapshot(graph.freeze(), self.path)
+        snapshot = load_snapshot(self.path)
+        try:
+            self.assertEqual(DependencyGraph.from_compact(snapshot).bfs_traversal('A', 'e'), expected)
+        finally:
+            snapshot.close()
+
+    def test_edge_kinds_round_trip(self):
+
+        graph = DependencyGraph()
+        graph.add_dependency('app', {'lib': '^1.0.0', 'jest': '^29.0.0'}, {'jest': 'dev'})
+        graph.add_dependency('lib', {'react': '>=16', 'util': '^1.0.0'}, {'react': 'peer', 'util': 'optional'})
+
+        save_snapshot(graph.freeze(), self.path, graph.edge_kinds)
+        snapshot = load_snapshot(self.path)
+        try:
+            loaded = DependencyGraph.from_compact(snapshot)
+            self.assertEqual(loaded.edge_kinds, {})
+            self.assertEqual(loaded.edge_kind('app', 'jest'), 'dev')
+            self.assertEqual(loaded.edge_kind('app', 'lib'), 'prod')
+            self.assertEqual(loaded.kinds_of('lib'), graph.edge_kinds['lib'])
+
+            # Снимок снимка сохраняет виды без обхода рёбер в Python
+            copy = self.path + '.copy'
+            save_snapshot(snapshot, copy)
+            with open(self.path, 'rb') as original, open(copy, 'rb') as saved:
+                self.assertEqual(saved.read(), original.read())
+
+            # Изменённый граф переносит виды рёбер снимка в edge_kinds
+            loaded.add_dependency('util', {})
+            self.assertEqual(loaded.edge_kinds, graph.edge_kinds)
+        finally:
+            snapshot.close()
+
+    def test_reads_version_1(self):
+
+        compact = CompactGraph.from_dict(TEST_REPO)
+        save_snapshot(compact, self.path)
+
+        # Снимок версии 1 - тот же файл без последней секции видов рёбер
+        kinds_section = 8 + compact.edge_count + (-compact.edge_count) % 8
+        with open(self.path, 'r+b') as f:
+            header = list(_HEADER.unpack(f.read(_HEADER.size)))
+            header[1] = 1
+            f.seek(0)
+            f.write(_HEADER.pack(*header))
+            f.truncate(os.path.getsize(self.path) - kinds_section)
+
+        snapshot = load_snapshot(self.path)
+        try:
+            self.assertEqual(snapshot.to_dict(), TEST_REPO)
+            self.assertEqual(DependencyGraph.from_compact(snapshot).kinds_of('A'), {})
+        finally:
+            snapshot.close()
+
+    def test_rejects_other_files(self):
+
+        with open(self.path, 'wb') as f:
+            f.write(b'{"A": {}}')
+
+        with self.assertRaises(ValueError):
+            load_snapshot(self.path)
+
+    def test_rejects_truncated_snapshot(self):
+
+        save_snapshot(CompactGraph.from_dict(TEST_REPO), self.path)
+        with open(self.path, 'r+b') as f:
+            f.truncate(os.path.getsize(self.path) - 16)
+
+        with self.assertRaises(ValueError):
+            load_snapshot(self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+import contextlib
+import io
+import os
+import time
+import unittest
+
+from TreeRenderer import TreeRenderer
+from main import DependencyGraphConfig, fetch_and_display_dependencies
+
+
+TEST_REPO = os.path.join(os.path.dirname(__file__), 'test_repo.json')
+
+
+CYCLES = [['A', 'B', 'D', 'A']]
+
+
+def render(tree, cycles, **kwargs):
+    out = io.StringIO()
+    options = {key: kwargs.pop(key) for key in ('max_lines', 'max_children') if key in kwargs}
+    renderer = TreeRenderer(out, **options)
+    renderer.render('A', tree, cycles, **kwargs)
+    return renderer, out.getvalue()
+
+
+class TestTreeRenderer(unittest.TestCase):
+
+    def test_layout(self):
+
+        _, output = render(tree={'A': ['B', 'C'], 'B': ['D', 'E'], 'C': ['F']}, cycles=[])
+
+        self.assertEqual(output, "A\n"
+                                 "├── B\n"
+                                 "│   ├── D\n"
+                                 "│   └── E\n"
+                                 "└── C\n"
+                                 "    └── F\n")
+
+    def test_cycle_marks_node_with_cycle_member_on_path(self):
+
+        _, output = render(tree={'A': ['C', 'B'], 'B': ['D'], 'D': ['E']}, cycles=CYCLES)
+
+        # C вне цикла, B - в цикле, на пути к которому уже есть A; пакеты под B всё равно выводятся
+        self.assertEqual(output.splitlines(), ["A", "├── C", "└── B CYCLE", "    └── D CYCLE", "        └── E"])
+
+    def test_repeated_node_expanded_once(self):
+
+        _, output = render(tree={'A': ['B'], 'B': ['A']}, cycles=[['A', 'B', 'A']])
+
+        self.assertEqual(output.splitlines(), ["A", "└── B CYCLE", "    └── A CYCLE"])
+
+    def test_cycle_state_restored_after_subtree(self):
+
+        tree = {'X': ['A', 'D'], 'A': ['E'], 'D': []}
+        out = io.StringIO()
+        TreeRenderer(out).render('X', tree, [['A', 'D', 'A']])
+
+        # D - сосед A, а не потомок: цикл на его пути уже не активен
+        self.assertEqual(out.getvalue().splitlines(), ["X", "├── A", "│   └── E", "└── D"])
+
+    def test_filter_and_depth(self):
+
+        _, output = render(tree={'A': ['B', 'C'], 'B': ['D'], 'C': ['F']}, cycles=[],
+                           filter_substring='c', max_depth=1)
+
+        self.assertEqual(output.splitlines(), ["A", "├── B"])
+
+    def test_max_children(self):
+
+        tree = {'A': [f'p{i}' for i in range(5)]}
+        _, output = render(tree=tree, cycles=[], max_children=2)
+
+        self.assertEqual(output.splitlines(), ["A", "├── p0", "├── p1", "└── ... 3 more"])
+
+    def test_max_lines(self):
+
+        tree = {'A': [f'p{i}' for i in range(100)]}
+        renderer, output = render(tree=tree, cycles=[], max_lines=3)
+
+        self.assertTrue(renderer.truncated)
+        self.assertEqual(output.splitlines(), ["A", "├── p0", "├── p1", "... output truncated after 3 lines"])
+
+    def test_max_lines_counts_more_lines(self):
+
+        tree = {'A': ['B', 'C'], 'B': ['p0', 'p1'], 'C': ['q0', 'q1']}
+        renderer, output = render(tree=tree, cycles=[], max_lines=3, max_children=1)
+
+        self.assertTrue(renderer.truncated)
+        self.assertEqual(output.splitlines(), ["A", "├── B", "│   ├── p0", "... output truncated after 3 lines"])
+
+    def test_many_cycles_render_quickly(self):
+
+        # Широкое дерево с тысячами циклов: проверка принадлежности не перебирает все циклы
+        width = 2000
+        tree = {'A': [f'p{i}' for i in range(width)]}
+        tree.update({f'p{i}': [f'q{i}'] for i in range(width)})
+        cycles = [[f'p{i}', f'q{i}', f'p{i}'] for i in range(width)]
+
+        start = time.perf_counter()
+        renderer, _ = render(tree=tree, cycles=cycles)
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(renderer.lines_written, 1 + 2 * width)
+        self.assertLess(elapsed, 1.0)
+
+
+class TestRenderedTraversal(unittest.TestCase):
+
+    def test_every_visited_package_printed(self):
+
+        for max_depth in (1, 2, 3, 10):
+            config = DependencyGraphConfig()
+            config.package_name = 'A'
+            config.repository_path = TEST_REPO
+            config.test_mode = True
+            config.max_depth = max_depth
+
+            out = io.StringIO()
+            with contextlib.redirect_stdout(out):
+                result = fetch_and_display_dependencies(config)
+
+            with self.subTest(max_depth=max_depth):
+                tree_lines = out.getvalue().split('=' * 50)[1].split('\n\n')[0].splitlines()
+                printed = {line.lstrip('│├└─ ').split(' ')[0] for line in tree_lines if line.strip()}
+                self.assertEqual(printed, set(result['dependencies']))
+
+
+if __name__ == '__main__':
+    unittest.main()